@@ -0,0 +1,50 @@
+"""Headless core of the bank application: database, repositories and services.
+
+Nothing in this package imports tkinter, so scripts and batch jobs can use it
+without the GUI:
+
+    from bank_core import DatabaseManager, LedgerService
+    db = DatabaseManager("bank.db")
+    LedgerService(db).post(42, "deposit", 100.0)
+
+pro_bank_app.py is a thin tkinter client on top of it.
+
+The names below are imported from their modules on first use, so that
+``import bank_core`` stays cheap and ``python -m bank_core.<module>`` does not
+import the module it is about to run.
+"""
+import importlib
+
+_EXPORTS = {
+    "DatabaseManager": "db",
+    "DEFAULT_DB": "db",
+    "RecordNotFound": "db",
+    "UpdateConflict": "db",
+    "is_busy_error": "db",
+    "LedgerService": "ledger",
+    "PostingQueue": "ledger",
+    "LedgerError": "ledger",
+    "AccountNotFound": "ledger",
+    "InsufficientFunds": "ledger",
+    "InvalidTransfer": "ledger",
+    "KeysetPager": "paging",
+    "CustomerSearchPager": "paging",
+    "HistoryPager": "paging",
+    "fts_prefix_query": "paging",
+    "UserRepository": "repositories",
+    "CustomerRepository": "repositories",
+    "AccountRepository": "repositories",
+    "TransactionRepository": "repositories",
+    "TransferRepository": "repositories",
+    "Snapshotter": "snapshots",
+    "ColumnarLedger": "columnar",
+    "Validator": "validation",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{module}", __name__), name)
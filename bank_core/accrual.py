@@ -0,0 +1,163 @@
+"""Monthly interest and fees per account type.
+
+account_type_rates holds, for each account type, an annual interest rate,
+a monthly fee and the balance from which the fee is waived. An accrual run
+for a period (YYYY-MM) charges every account in one write transaction:
+
+    * the interest (balance x annual rate / 12) and fee of every account are
+      computed by one INSERT ... SELECT into a TEMP table, from the balance
+      at the end of the period: the current balance less the net of the
+      summary rows dated after it, as in aggregates.balance_on(),
+    * balances and versions move with one UPDATE ... FROM that table,
+    * the transactions and summary rows are written with INSERT ... SELECT
+      from it as well.
+
+Nothing loops over the accounts in Python.
+
+Interest is posted as a deposit and the fee as a withdrawal, dated the last
+day of the period, so balances, statements, summaries and exports need no
+special case. The flip side is that nothing marks them as interest or fee:
+the transactions table has no column for it, and they only stand out by
+their date and by the totals in accrual_runs. The fee is never more than the
+account holds, then or now. The run is
+recorded in accrual_runs in the same transaction, so a period can only be
+accrued once; running it again changes nothing. Periods are strictly YYYY-MM,
+and only months that have ended can be accrued.
+
+    python -m bank_core.accrual run                  # accrue last month
+    python -m bank_core.accrual run --period 2025-01
+    python -m bank_core.accrual rates                # show the rates per type
+"""
+import re
+import time
+from datetime import date, timedelta
+
+from . import aggregates
+from .ledger import LedgerService
+
+PERIOD_RE = re.compile(r"([0-9]{4})-([0-9]{2})")
+
+BATCH_SQL = """
+    WITH later AS (
+        SELECT account_id, SUM(deposits - withdrawals) AS net
+        FROM daily_account_summary WHERE day > ?1 GROUP BY account_id
+    )
+    INSERT INTO temp.accrual_batch (account_id, interest, fee)
+    SELECT id, interest, charged FROM (
+        SELECT id, interest, MIN(fee, MAX(MIN(closing, balance) + interest, 0)) AS charged FROM (
+            SELECT id, balance, closing,
+                   CASE WHEN closing > 0 THEN ROUND(closing * annual_rate / 12, 2) ELSE 0 END AS interest,
+                   CASE WHEN fee_waived_from IS NOT NULL AND closing >= fee_waived_from THEN 0
+                        ELSE monthly_fee END AS fee
+            FROM (
+                SELECT a.id, a.balance, a.balance - COALESCE(l.net, 0) AS closing,
+                       r.annual_rate, r.monthly_fee, r.fee_waived_from
+                FROM accounts a JOIN account_type_rates r ON r.account_type = a.account_type
+                LEFT JOIN later l ON l.account_id = a.id
+            )
+        )
+    )
+    WHERE interest > 0 OR charged > 0
+"""
+
+def parse_period(text):
+    """Checks that ``text`` is a YYYY-MM period and returns it; raises ValueError."""
+    match = PERIOD_RE.fullmatch(text.strip())
+    if not match or not 1 <= int(match.group(2)) <= 12:
+        raise ValueError(f"Invalid period {text!r}; expected YYYY-MM, e.g. 2025-01.")
+    return match.group(0)
+
+def period_end(period):
+    """Last day of a YYYY-MM period, as an ISO date."""
+    year, month = map(int, parse_period(period).split("-"))
+    first_of_next = date(year + month // 12, month % 12 + 1, 1)
+    return (first_of_next - timedelta(days=1)).isoformat()
+
+def previous_period(today=None):
+    today = today or date.today()
+    return (today.replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+
+class AccrualEngine:
+    """Applies the per-type interest and fees of a period to every account at once."""
+
+    def __init__(self, db):
+        self.db = db
+        self.ledger = LedgerService(db)
+
+    def run(self, period, today=None):
+        """Accrues ``period`` and returns (accounts, interest, fees, already_done).
+
+        Raises ValueError for a malformed period or one that has not ended by ``today``.
+        """
+        period = parse_period(period)
+        day = period_end(period)
+        if day >= (today or date.today()).isoformat():
+            raise ValueError(f"{period} has not ended yet.")
+        return self.ledger.run_in_transaction(lambda cur: self._accrue(cur, period, day))
+
+    def _accrue(self, cur, period, day):
+        cur.execute("SELECT accounts, interest, fees FROM accrual_runs WHERE period=?", (period,))
+        done = cur.fetchone()
+        if done:
+            return (*done, True)
+
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS accrual_batch "
+                    "(account_id INTEGER PRIMARY KEY, interest REAL NOT NULL, fee REAL NOT NULL)")
+        cur.execute("DELETE FROM temp.accrual_batch")
+        cur.execute(BATCH_SQL, (day,))
+        cur.execute("""
+            UPDATE accounts SET balance = balance + b.interest - b.fee, version = version + 1
+            FROM temp.accrual_batch b WHERE accounts.id = b.account_id
+        """)
+        cur.execute("""
+            INSERT INTO transactions (account_id, type, amount, date)
+            SELECT account_id, 'deposit', interest, ?1 FROM temp.accrual_batch WHERE interest > 0
+            UNION ALL
+            SELECT account_id, 'withdraw', fee, ?1 FROM temp.accrual_batch WHERE fee > 0
+        """, (day,))
+        aggregates.record_select(cur, "SELECT account_id, ?, interest, fee, (interest > 0) + (fee > 0) "
+                                      "FROM temp.accrual_batch", (day,))
+
+        cur.execute("SELECT COUNT(*), COALESCE(SUM(interest), 0), COALESCE(SUM(fee), 0) FROM temp.accrual_batch")
+        totals = cur.fetchone()
+        cur.execute("DELETE FROM temp.accrual_batch")
+        cur.execute("INSERT INTO accrual_runs (period, posted_on, accounts, interest, fees) VALUES (?, ?, ?, ?, ?)",
+                    (period, day, *totals))
+        return (*totals, False)
+
+def main(argv=None):
+    import argparse
+    from .db import DEFAULT_DB, DatabaseManager
+
+    parser = argparse.ArgumentParser(description="Accrue monthly interest and fees.")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="accrue one period")
+    run.add_argument("--period", default=previous_period(), help="YYYY-MM (default: last month)")
+    commands.add_parser("rates", help="show the rates per account type")
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(args.db, read_only=args.command == "rates")
+    try:
+        if args.command == "run":
+            started = time.perf_counter()
+            try:
+                accounts, interest, fees, done = AccrualEngine(db).run(args.period)
+            except ValueError as e:
+                parser.error(str(e))
+            if done:
+                print(f"{args.period} was already accrued ({accounts:,} accounts); nothing changed.")
+            else:
+                print(f"Accrued {args.period} for {accounts:,} accounts: interest ${interest:,.2f}, "
+                      f"fees ${fees:,.2f} ({time.perf_counter() - started:.2f}s).")
+        else:
+            with db.session() as conn:
+                print(f"{'Type':<12} {'Annual rate':>12} {'Monthly fee':>12} {'Waived from':>12}")
+                for acc_type, rate, fee, waived in conn.execute("SELECT * FROM account_type_rates ORDER BY 1"):
+                    print(f"{acc_type:<12} {rate:>12.3%} {fee:>12,.2f} "
+                          f"{'-' if waived is None else f'{waived:,.2f}':>12}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
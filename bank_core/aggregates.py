@@ -0,0 +1,222 @@
+"""Summary tables maintained alongside the ledger.
+
+daily_account_summary holds one row per account and day with the deposits,
+withdrawals and number of transactions of that day; monthly_type_totals holds
+the same figures per account type and month. LedgerService updates both in the
+same transaction as each posting, so reports read a few summary rows instead
+of scanning the transactions table.
+
+    python -m bank_core.aggregates rebuild                  # backfill after a bulk load
+    python -m bank_core.aggregates balance 42 2024-06-30    # balance of account 42 at end of day
+    python -m bank_core.aggregates report 2024-01 2024-06   # deposits/withdrawals by type and month
+"""
+from collections import defaultdict
+
+from . import archive
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS daily_account_summary (
+        account_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        deposits REAL NOT NULL DEFAULT 0,
+        withdrawals REAL NOT NULL DEFAULT 0,
+        tx_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (account_id, day)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS monthly_type_totals (
+        account_type TEXT NOT NULL,
+        month TEXT NOT NULL,
+        deposits REAL NOT NULL DEFAULT 0,
+        withdrawals REAL NOT NULL DEFAULT 0,
+        tx_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (account_type, month)
+    ) WITHOUT ROWID
+    """,
+)
+
+def rebuild_statements(source="transactions"):
+    """SQL that recomputes both summary tables from the ledger table (or view) ``source``."""
+    return (
+        "DELETE FROM daily_account_summary",
+        "DELETE FROM monthly_type_totals",
+        f"""
+        INSERT INTO daily_account_summary (account_id, day, deposits, withdrawals, tx_count)
+        SELECT account_id, date,
+               SUM(CASE WHEN type = 'deposit' THEN amount ELSE 0 END),
+               SUM(CASE WHEN type = 'withdraw' THEN amount ELSE 0 END),
+               COUNT(*)
+        FROM {source}
+        WHERE account_id IS NOT NULL AND date IS NOT NULL
+        GROUP BY account_id, date
+        """,
+        """
+        INSERT INTO monthly_type_totals (account_type, month, deposits, withdrawals, tx_count)
+        SELECT COALESCE(a.account_type, 'Unknown'), substr(d.day, 1, 7),
+               SUM(d.deposits), SUM(d.withdrawals), SUM(d.tx_count)
+        FROM daily_account_summary d JOIN accounts a ON a.id = d.account_id
+        GROUP BY 1, 2
+        """,
+    )
+
+REBUILD = rebuild_statements()
+
+UPSERT_DAILY = """
+    INSERT INTO daily_account_summary (account_id, day, deposits, withdrawals, tx_count)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (account_id, day) DO UPDATE SET
+        deposits = deposits + excluded.deposits,
+        withdrawals = withdrawals + excluded.withdrawals,
+        tx_count = tx_count + excluded.tx_count
+"""
+
+UPSERT_MONTHLY = """
+    INSERT INTO monthly_type_totals (account_type, month, deposits, withdrawals, tx_count)
+    SELECT COALESCE(account_type, 'Unknown'), ?, ?, ?, ? FROM accounts WHERE id = ?
+    ON CONFLICT (account_type, month) DO UPDATE SET
+        deposits = deposits + excluded.deposits,
+        withdrawals = withdrawals + excluded.withdrawals,
+        tx_count = tx_count + excluded.tx_count
+"""
+
+def record(cur, account_id, t_type, amount, day):
+    """Adds one posting to the summaries, inside the caller's transaction."""
+    record_many(cur, [(account_id, t_type, amount, day)])
+
+def record_many(cur, postings):
+    """Adds (account_id, type, amount, day) postings, pre-aggregated per account and day."""
+    daily = defaultdict(lambda: [0.0, 0.0, 0])
+    for account_id, t_type, amount, day in postings:
+        totals = daily[(account_id, day)]
+        totals[0 if t_type == "deposit" else 1] += amount
+        totals[2] += 1
+    cur.executemany(UPSERT_DAILY, [(account_id, day, *totals) for (account_id, day), totals in daily.items()])
+
+    monthly = defaultdict(lambda: [0.0, 0.0, 0])
+    for (account_id, day), (deposits, withdrawals, count) in daily.items():
+        totals = monthly[(account_id, day[:7])]
+        totals[0] += deposits
+        totals[1] += withdrawals
+        totals[2] += count
+    cur.executemany(UPSERT_MONTHLY, [(month, *totals, account_id) for (account_id, month), totals in monthly.items()])
+
+def record_select(cur, select, params=()):
+    """Adds the postings summed up by ``select``, set-based, inside the caller's transaction.
+
+    ``select`` must yield (account_id, day, deposits, withdrawals, tx_count)
+    with at most one row per account and day. It is run twice, once per
+    summary table, with ``params`` each time.
+    """
+    batch = f"WITH s (account_id, day, deposits, withdrawals, tx_count) AS ({select})"
+    cur.execute(f"""
+        {batch}
+        INSERT INTO daily_account_summary (account_id, day, deposits, withdrawals, tx_count)
+        SELECT * FROM s WHERE true
+        ON CONFLICT (account_id, day) DO UPDATE SET
+            deposits = deposits + excluded.deposits,
+            withdrawals = withdrawals + excluded.withdrawals,
+            tx_count = tx_count + excluded.tx_count
+    """, params)
+    cur.execute(f"""
+        {batch}
+        INSERT INTO monthly_type_totals (account_type, month, deposits, withdrawals, tx_count)
+        SELECT COALESCE(a.account_type, 'Unknown'), substr(s.day, 1, 7),
+               SUM(s.deposits), SUM(s.withdrawals), SUM(s.tx_count)
+        FROM s JOIN accounts a ON a.id = s.account_id
+        WHERE true GROUP BY 1, 2
+        ON CONFLICT (account_type, month) DO UPDATE SET
+            deposits = deposits + excluded.deposits,
+            withdrawals = withdrawals + excluded.withdrawals,
+            tx_count = tx_count + excluded.tx_count
+    """, params)
+
+def rebuild(conn):
+    """Recomputes both summary tables from the ledger, archived years included, in one transaction."""
+    with archive.archives_attached(conn) as years:
+        source = archive.VIEW if years else "transactions"
+        with conn:
+            for sql in rebuild_statements(source):
+                conn.execute(sql)
+
+def balance_on(conn, account_id, day):
+    """Balance of the account at the end of ``day`` (ISO date), or None if it does not exist.
+
+    Works back from the current balance by undoing the net movement of the
+    days after ``day``.
+    """
+    row = conn.execute("""
+        SELECT a.balance - COALESCE((
+            SELECT SUM(d.deposits - d.withdrawals) FROM daily_account_summary d
+            WHERE d.account_id = a.id AND d.day > ?), 0)
+        FROM accounts a WHERE a.id = ?
+    """, (day, account_id)).fetchone()
+    return row[0] if row else None
+
+def daily_activity(conn, account_id, start, end):
+    """(day, deposits, withdrawals, tx_count) rows of an account between two ISO dates."""
+    return conn.execute("""
+        SELECT day, deposits, withdrawals, tx_count FROM daily_account_summary
+        WHERE account_id = ? AND day BETWEEN ? AND ? ORDER BY day
+    """, (account_id, start, end)).fetchall()
+
+def account_summaries(conn, customer_id, since):
+    """(id, account_type, balance, last_activity, deposits, withdrawals) for each of a
+    customer's accounts; the totals cover the days from ``since`` (ISO date) on."""
+    return conn.execute("""
+        SELECT a.id, a.account_type, a.balance,
+               (SELECT MAX(day) FROM daily_account_summary WHERE account_id = a.id),
+               COALESCE(SUM(d.deposits), 0), COALESCE(SUM(d.withdrawals), 0)
+        FROM accounts a
+        LEFT JOIN daily_account_summary d ON d.account_id = a.id AND d.day >= ?
+        WHERE a.customer_id = ?
+        GROUP BY a.id
+        ORDER BY a.id
+    """, (since, customer_id)).fetchall()
+
+def period_report(conn, start_month, end_month):
+    """(month, account_type, deposits, withdrawals, tx_count) rows for YYYY-MM months."""
+    return conn.execute("""
+        SELECT month, account_type, deposits, withdrawals, tx_count FROM monthly_type_totals
+        WHERE month BETWEEN ? AND ? ORDER BY month, account_type
+    """, (start_month, end_month)).fetchall()
+
+def main(argv=None):
+    import argparse
+    from .db import DEFAULT_DB, DatabaseManager  # db imports this module for its migrations
+
+    parser = argparse.ArgumentParser(description="Maintain and query the ledger summary tables.")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="recompute the summaries from the transactions table")
+    balance = commands.add_parser("balance", help="balance of an account at the end of a day")
+    balance.add_argument("account_id", type=int)
+    balance.add_argument("day")
+    report = commands.add_parser("report", help="totals per account type and month")
+    report.add_argument("start_month")
+    report.add_argument("end_month")
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(args.db, read_only=args.command != "rebuild")
+    try:
+        with db.session() as conn:
+            if args.command == "rebuild":
+                rebuild(conn)
+                count = conn.execute("SELECT COUNT(*) FROM daily_account_summary").fetchone()[0]
+                print(f"Rebuilt {count:,} daily summary rows.")
+            elif args.command == "balance":
+                value = balance_on(conn, args.account_id, args.day)
+                if value is None:
+                    print(f"No account found with ID: {args.account_id}")
+                else:
+                    print(f"Balance of account {args.account_id} on {args.day}: ${value:,.2f}")
+            else:
+                print(f"{'Month':<8} {'Type':<10} {'Deposits':>15} {'Withdrawals':>15} {'Count':>8}")
+                for month, acc_type, deposits, withdrawals, count in period_report(conn, args.start_month, args.end_month):
+                    print(f"{month:<8} {acc_type:<10} {deposits:>15,.2f} {withdrawals:>15,.2f} {count:>8,}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Batch anomaly detection over the ledger.
+
+Works on the columnar export (see columnar.py), which the scan refreshes
+first. Each account's history is processed with whole-array NumPy
+operations, never a Python loop per row. Three rules are checked:
+
+    amount_zscore  the amount lies more than Z_THRESHOLD standard deviations above
+                   the account's previous Z_WINDOW transactions of the same type
+    velocity       more than MAX_PER_DAY transactions on the account in one day
+    balance_drain  the withdrawals among the account's last DRAIN_WINDOW transactions
+                   took at least DRAIN_SHARE of the money it held over them
+
+Flagged transactions go to the alerts table, one row per transaction and
+rule. Runs are incremental: job_state remembers the last transaction id
+scanned, and the next run flags only newer transactions. It still loads the
+full history of the accounts they belong to, as the rules need it.
+
+    python -m bank_core.anomalies scan            # flag new transactions
+    python -m bank_core.anomalies scan --full     # rescan the whole ledger
+    python -m bank_core.anomalies list            # latest alerts
+
+Needs numpy, like columnar.py.
+"""
+from datetime import datetime
+
+import numpy as np
+
+from . import columnar
+
+JOB = "anomalies"
+
+Z_WINDOW = 50
+Z_MIN_HISTORY = 10
+Z_THRESHOLD = 4.0
+MAX_PER_DAY = 10
+DRAIN_WINDOW = 5
+DRAIN_SHARE = 0.8
+DRAIN_MIN_BALANCE = 1000.0
+
+def _group_first(*keys):
+    """For rows sorted by ``keys``, the index of the first row of each row's group."""
+    new = np.zeros(len(keys[0]), dtype=bool)
+    new[:1] = True
+    for key in keys:
+        new[1:] |= key[1:] != key[:-1]
+    starts = np.flatnonzero(new)
+    return starts[np.cumsum(new) - 1]
+
+def _account_groups(account_id):
+    """Sorts the rows by account once: returns the row order (by id within an
+    account) and, for each distinct account, its id and [start, end) in that order."""
+    order = np.argsort(account_id, kind="stable")
+    accounts = account_id[order]
+    starts = np.flatnonzero(np.r_[len(order) > 0, accounts[1:] != accounts[:-1]])
+    return order, accounts[starts], starts, np.r_[starts[1:], len(order)].astype(starts.dtype)
+
+def _ranges(starts, ends):
+    """The indexes start..end-1 of each range, one after the other."""
+    lengths = ends - starts
+    return np.arange(lengths.sum()) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+
+def _window_sums(values, first, window):
+    """Sum and count of the (at most) ``window`` values before each row in its group."""
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    rows = np.arange(len(values))
+    low = np.maximum(first, rows - window)
+    return sums[rows] - sums[low], rows - low
+
+def amount_zscores(account_id, kind, amount, ids):
+    """z-score of each amount against the account's previous transactions of the same type
+    (NaN where there is too little history)."""
+    order = np.lexsort((ids, kind, account_id))
+    first = _group_first(account_id[order], kind[order])
+    x = amount[order]
+    total, count = _window_sums(x, first, Z_WINDOW)
+    squares, _ = _window_sums(x * x, first, Z_WINDOW)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / count
+        std = np.sqrt(np.maximum(squares / count - mean * mean, 0.0))
+        z = np.where((count >= Z_MIN_HISTORY) & (std > 0), (x - mean) / std, np.nan)
+    scores = np.empty_like(z)
+    scores[order] = z
+    return scores
+
+def daily_counts(account_id, day, ids):
+    """How many of the account's transactions of that day came up to and including each one."""
+    order = np.lexsort((ids, day, account_id))
+    first = _group_first(account_id[order], day[order])
+    counts = np.empty(len(ids), dtype=np.int64)
+    counts[order] = np.arange(len(ids)) - first + 1
+    return counts
+
+def drain_shares(account_id, signed, ids, balances):
+    """Share of the available money withdrawn by the last DRAIN_WINDOW transactions up to
+    each one, and that money: the balance before them plus their deposits.
+    ``balances`` holds each account's current balance, by account id."""
+    order = np.lexsort((ids, account_id))
+    accounts = account_id[order]
+    first = _group_first(accounts)
+    moves = signed[order]
+    running = np.cumsum(moves)
+    # Balance after each row: the current balance less what came after it.
+    new = first == np.arange(len(ids))
+    starts = np.flatnonzero(new)
+    last = (np.r_[starts[1:], len(ids)] - 1)[np.cumsum(new) - 1]
+    after = balances[accounts] - (running[last] - running)
+    # Withdrawn over the window ending at (and including) each row.
+    withdrawn = np.concatenate(([0.0], np.cumsum(np.maximum(-moves, 0.0))))
+    rows = np.arange(len(ids))
+    withdrawn = withdrawn[rows + 1] - withdrawn[np.maximum(first, rows - DRAIN_WINDOW + 1)]
+    # The balance before the window plus its deposits.
+    funds = after + withdrawn
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = np.where(funds > 0, withdrawn / funds, 0.0)
+    shares, available = np.empty_like(share), np.empty_like(share)
+    shares[order] = share
+    available[order] = funds
+    return shares, available
+
+def detect(ledger, rows, balances, since_id):
+    """(row index, rule, score) of the flagged transactions among ``rows`` (indexes into
+    the ledger's columns, covering whole account histories) with an id above ``since_id``."""
+    ids = np.asarray(ledger.id[rows])
+    account_id = np.asarray(ledger.account_id[rows]).astype(np.int64)
+    kind = np.asarray(ledger.type[rows])
+    amount = np.asarray(ledger.amount[rows])
+    day = np.asarray(ledger.day[rows])
+    withdrawal = kind == ledger.type_code("withdraw")
+    fresh = ids > since_id
+
+    z = amount_zscores(account_id, kind, amount, ids)
+    counts = daily_counts(account_id, day, ids)
+    shares, funds = drain_shares(account_id, np.where(withdrawal, -amount, amount), ids, balances)
+    with np.errstate(invalid="ignore"):
+        flags = (
+            ("amount_zscore", fresh & (z > Z_THRESHOLD), z),
+            ("velocity", fresh & (counts > MAX_PER_DAY) & (day != columnar.NO_DAY), counts),
+            ("balance_drain", fresh & withdrawal & (funds >= DRAIN_MIN_BALANCE) & (shares >= DRAIN_SHARE), shares),
+        )
+    return [(rows[hit], rule, score[hit]) for rule, mask, score in flags for hit in [np.flatnonzero(mask)]]
+
+def current_balances(conn, ledger):
+    """Balances by account id as of the ledger's last exported transaction."""
+    top = max(conn.execute("SELECT MAX(id) FROM accounts").fetchone()[0] or 0,
+              int(ledger.account_id.max()) if ledger.rows else 0)
+    balances = np.zeros(top + 1)
+    for account_id, balance in conn.execute("SELECT id, balance FROM accounts"):
+        balances[account_id] = balance
+    # Undo the postings that came in after the export.
+    for account_id, net in conn.execute("""
+        SELECT account_id, SUM(CASE WHEN type = 'deposit' THEN amount ELSE -amount END)
+        FROM transactions WHERE id > ? AND account_id IS NOT NULL GROUP BY account_id
+    """, (ledger.manifest["last_id"],)):
+        if account_id <= top:
+            balances[account_id] -= net
+    return balances
+
+def scan(conn, directory=columnar.OUT_DIR, full=False, accounts_per_chunk=50000, report=print):
+    """Exports new transactions, flags the anomalies among them and returns the number of alerts added."""
+    columnar.export(conn, directory)
+    ledger = columnar.ColumnarLedger(directory)
+    row = conn.execute("SELECT last_id FROM job_state WHERE job=?", (JOB,)).fetchone()
+    since_id = 0 if full or row is None else row[0]
+    start = int(np.searchsorted(ledger.id, since_id, side="right"))
+    accounts = np.unique(ledger.account_id[start:])
+    accounts = accounts[accounts >= 0]
+    balances = current_balances(conn, ledger)
+    # Every chunk's rows are slices of one sort of the ledger by account.
+    order, groups, starts, ends = _account_groups(np.asarray(ledger.account_id))
+    positions = np.searchsorted(groups, accounts)
+
+    added = 0
+    for low in range(0, len(accounts), accounts_per_chunk):
+        chunk = positions[low:low + accounts_per_chunk]
+        rows = order[_ranges(starts[chunk], ends[chunk])]
+        alerts = []
+        for hits, rule, scores in detect(ledger, rows, balances, since_id):
+            days = np.datetime_as_string(ledger.day[hits].astype("datetime64[D]"))
+            alerts.extend(zip(ledger.id[hits].tolist(), ledger.account_id[hits].tolist(), [rule] * len(hits),
+                              scores.astype(float).tolist(), days.tolist()))
+        with conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO alerts (transaction_id, account_id, rule, score, day) "
+                             "SELECT ?, ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM accounts WHERE id = ?)",
+                             [(*alert, alert[1]) for alert in alerts])
+            added += conn.total_changes - before
+        report(f"accounts {low + 1:,}-{low + len(chunk):,} of {len(accounts):,}: {len(alerts):,} flagged")
+    with conn:
+        conn.execute("INSERT INTO job_state (job, last_id, updated_at) VALUES (?, ?, ?) "
+                     "ON CONFLICT (job) DO UPDATE SET last_id = excluded.last_id, updated_at = excluded.updated_at",
+                     (JOB, ledger.manifest["last_id"], datetime.now().isoformat(timespec="seconds")))
+    return added
+
+def main(argv=None):
+    import argparse
+    from .db import DEFAULT_DB, DatabaseManager
+
+    parser = argparse.ArgumentParser(description="Flag unusual transactions.")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+    scan_cmd = commands.add_parser("scan", help="flag the transactions posted since the last scan")
+    scan_cmd.add_argument("--dir", default=columnar.OUT_DIR, help="columnar export directory")
+    scan_cmd.add_argument("--full", action="store_true", help="rescan every transaction")
+    list_cmd = commands.add_parser("list", help="show the latest alerts")
+    list_cmd.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(args.db, read_only=args.command == "list")
+    try:
+        conn = db.connect()
+        if args.command == "scan":
+            added = scan(conn, args.dir, args.full)
+            print(f"{added:,} new alerts.")
+        else:
+            for t_id, account_id, rule, score, day in conn.execute(
+                    "SELECT transaction_id, account_id, rule, score, day FROM alerts ORDER BY id DESC LIMIT ?",
+                    (args.limit,)):
+                print(f"{day}  account {account_id:<8} transaction {t_id:<10} {rule:<14} {score:8.2f}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Hot/cold partitioning of the transactions table.
+
+Transactions older than a cut-off are moved out of the live database into one
+SQLite file per year next to it (bank.db -> bank-archive-2023.db), so the
+transactions table that the day-to-day screens and postings use stays small.
+The summary tables keep covering the archived years, so balances and reports
+do not change.
+
+Full history is read through all_transactions, a TEMP view that
+attach_archives() creates on a connection after attaching the year files:
+it is the live table UNION ALL every attached archive. Readers attach them for
+one read with archives_attached(), which drops the view and detaches them
+again, so pooled connections do not keep the year files open. SQLite attaches
+at most 10 databases per connection, i.e. ten archived years.
+
+    python -m bank_core.archive move --keep-days 365   # archive everything older than a year
+    python -m bank_core.archive list                   # row counts per archive file
+"""
+import contextlib
+import glob
+import os
+import pathlib
+import re
+from datetime import date, timedelta
+
+VIEW = "all_transactions"
+
+ARCHIVE_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS {schema}.transactions (
+        id INTEGER PRIMARY KEY,
+        account_id INTEGER,
+        type TEXT,
+        amount REAL,
+        date TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_transactions_account_date ON transactions(account_id, date, id)",
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_transactions_date ON transactions(date, id)",
+)
+
+COLUMNS = "id, account_id, type, amount, date"
+
+def archive_path(db_name, year):
+    root, ext = os.path.splitext(db_name)
+    return f"{root}-archive-{year}{ext}"
+
+def archive_years(db_name):
+    """Years that have an archive file next to ``db_name``, oldest first."""
+    root, ext = os.path.splitext(db_name)
+    pattern = re.compile(re.escape(root) + r"-archive-(\d{4})" + re.escape(ext) + "$")
+    years = (pattern.match(path) for path in glob.glob(glob.escape(root) + "-archive-*" + glob.escape(ext)))
+    return sorted(int(match.group(1)) for match in years if match)
+
+def delete_archives(db_name):
+    """Deletes the archive files next to ``db_name``, e.g. before it is reseeded,
+    and returns their years. They must not be attached anywhere."""
+    years = archive_years(db_name)
+    for year in years:
+        path = archive_path(db_name, year)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    return years
+
+def _attached(conn):
+    return {name: path for _, name, path in conn.execute("PRAGMA database_list")}
+
+def _attach(conn, year, path):
+    schema = f"archive_{year}"
+    if conn.execute("PRAGMA query_only").fetchone()[0]:
+        # Read-only connections are opened from a URI, so the archive can be too.
+        uri = pathlib.Path(path).absolute().as_uri() + "?mode=ro"
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (uri,))
+    else:
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+    return schema
+
+def attach_archives(conn, first_year=None):
+    """Attaches the archive files from ``first_year`` on (default: all) and points
+    the all_transactions view at them. Returns the archived years now attached.
+
+    Must run outside a transaction, as SQLite refuses ATTACH inside one.
+    """
+    attached = _attached(conn)
+    for year in archive_years(attached["main"]):
+        if (first_year is None or year >= first_year) and f"archive_{year}" not in attached:
+            _attach(conn, year, archive_path(attached["main"], year))
+    schemas = sorted(name for name in _attached(conn) if name.startswith("archive_"))
+
+    body = " UNION ALL ".join(f"SELECT {COLUMNS} FROM {schema}.transactions"
+                              for schema in ("main", *schemas))
+    current = conn.execute("SELECT sql FROM sqlite_temp_master WHERE type='view' AND name=?", (VIEW,)).fetchone()
+    if current is None or not current[0].endswith(body):
+        _write_temp(conn, f"DROP VIEW IF EXISTS temp.{VIEW}", f"CREATE TEMP VIEW {VIEW} AS {body}")
+    return [int(schema[len("archive_"):]) for schema in schemas]
+
+def detach_archives(conn):
+    """Drops the all_transactions view and detaches every archive file.
+
+    Must run outside a transaction, with no statement still reading them.
+    """
+    _write_temp(conn, f"DROP VIEW IF EXISTS temp.{VIEW}")
+    for name in _attached(conn):
+        if name.startswith("archive_"):
+            conn.execute(f"DETACH DATABASE {name}")
+
+@contextlib.contextmanager
+def archives_attached(conn, first_year=None):
+    """attach_archives() for the length of a with block, which gets the attached years."""
+    years = attach_archives(conn, first_year)
+    try:
+        yield years
+    finally:
+        detach_archives(conn)
+
+def _write_temp(conn, *statements):
+    # The TEMP schema lives in memory, so writing it is harmless even on a
+    # query_only connection.
+    query_only = conn.execute("PRAGMA query_only").fetchone()[0]
+    conn.execute("PRAGMA query_only=OFF")
+    try:
+        for sql in statements:
+            conn.execute(sql)
+    finally:
+        conn.execute(f"PRAGMA query_only={query_only}")
+
+def move_to_archive(conn, before, batch_size=50000, report=print):
+    """Moves transactions dated before ``before`` (ISO date) into the year archives.
+
+    Works in batches of ``batch_size`` rows in date order, each one short
+    write transaction that copies the rows and deletes them from the live
+    table. A batch commits in both files, but not atomically across them: if
+    the process dies in between, the rows show up twice in all_transactions
+    until the move is run again, which skips rows already archived.
+    Returns the number of rows moved. The archives are detached afterwards.
+    """
+    try:
+        return _move_years(conn, before, batch_size, report)
+    finally:
+        detach_archives(conn)
+
+def _move_years(conn, before, batch_size, report):
+    row = conn.execute("SELECT MIN(date) FROM main.transactions WHERE date < ?", (before,)).fetchone()
+    if row[0] is None:
+        return 0
+    main = _attached(conn)["main"]
+    moved = 0
+    for year in range(int(row[0][:4]), int(before[:4]) + 1):
+        start, end = f"{year}-01-01", min(f"{year + 1}-01-01", before)
+        if not conn.execute("SELECT 1 FROM main.transactions WHERE date >= ? AND date < ? LIMIT 1",
+                            (start, end)).fetchone():
+            continue
+        schema = f"archive_{year}"
+        if schema not in _attached(conn):
+            _attach(conn, year, archive_path(main, year))
+        # Only takes effect on a new file; lets maintenance reclaim purged pages.
+        conn.execute(f"PRAGMA {schema}.auto_vacuum=INCREMENTAL")
+        for sql in ARCHIVE_SCHEMA:
+            conn.execute(sql.format(schema=schema))
+        year_moved = 0
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # The (date, id) of the batch's last row bounds both statements.
+                last = conn.execute("""
+                    SELECT date, id FROM (
+                        SELECT date, id FROM main.transactions WHERE date >= ? AND date < ?
+                        ORDER BY date, id LIMIT ?
+                    ) ORDER BY date DESC, id DESC LIMIT 1
+                """, (start, end, batch_size)).fetchone()
+                if last is None:
+                    conn.rollback()
+                    break
+                batch = "date >= ? AND (date, id) <= (?, ?)"
+                conn.execute(f"INSERT OR IGNORE INTO {schema}.transactions ({COLUMNS}) "
+                             f"SELECT {COLUMNS} FROM main.transactions WHERE {batch}", (start, *last))
+                cur = conn.execute(f"DELETE FROM main.transactions WHERE {batch}", (start, *last))
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            year_moved += cur.rowcount
+        moved += year_moved
+        report(f"{year}: {year_moved:,} transactions moved to {archive_path(main, year)}")
+    return moved
+
+def archive_counts(conn):
+    """(year, rows, first date, last date) for each archive file."""
+    with archives_attached(conn) as years:
+        return [(year, *conn.execute(f"SELECT COUNT(*), MIN(date), MAX(date) FROM archive_{year}.transactions").fetchone())
+                for year in years]
+
+def main(argv=None):
+    import argparse
+    from .db import DEFAULT_DB, DatabaseManager  # db imports aggregates, which imports this module
+
+    parser = argparse.ArgumentParser(description="Move old transactions into per-year archive databases.")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+    move = commands.add_parser("move", help="archive transactions older than a cut-off")
+    cutoff = move.add_mutually_exclusive_group()
+    cutoff.add_argument("--keep-days", type=int, default=365, help="days of history kept live (default: 365)")
+    cutoff.add_argument("--before", type=date.fromisoformat, help="archive everything dated before this day")
+    move.add_argument("--batch-size", type=int, default=50000)
+    commands.add_parser("list", help="rows per archive file")
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(args.db, read_only=args.command == "list")
+    try:
+        conn = db.connect()
+        if args.command == "move":
+            before = args.before or date.today() - timedelta(days=args.keep_days)
+            moved = move_to_archive(conn, before.isoformat(), args.batch_size)
+            print(f"Archived {moved:,} transactions dated before {before}.")
+        else:
+            for year, count, first, last in archive_counts(conn):
+                print(f"{year}  {count:>12,} rows  {first} .. {last}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
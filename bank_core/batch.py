@@ -0,0 +1,59 @@
+"""Building blocks of the batch loaders (import_data.py, bank_core.transfers).
+
+Both read a file of records, work through it in chunks of one transaction
+each, write the records they refuse to a JSONL reject file and report their
+progress on stderr.
+"""
+import json
+import sys
+import time
+from itertools import islice
+
+def chunks(items, size):
+    """Lists of up to ``size`` consecutive items."""
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+class RejectFile:
+    """Writes rejected records to ``out`` as JSONL, one {"line", "error", "record"} per line.
+
+    Rejects are held back until flush(), which writes them sorted by line: a
+    chunk finds its bad records in several passes (parsing, then the
+    database), not in file order.
+    """
+
+    def __init__(self, out):
+        self.out = out
+        self.count = 0
+        self._pending = []
+
+    def add(self, line_no, reason, record):
+        self.count += 1
+        self._pending.append((line_no, reason, record))
+
+    def flush(self):
+        self._pending.sort(key=lambda reject: reject[0])
+        for line_no, reason, record in self._pending:
+            self.out.write(json.dumps({"line": line_no, "error": reason, "record": record}) + "\n")
+        self._pending.clear()
+
+class Progress:
+    """Progress callback that keeps one "<done> <unit> (<rate>/s)" line up to date on stderr."""
+
+    def __init__(self, unit, out=sys.stderr):
+        self.unit = unit
+        self.out = out
+        self.started = time.perf_counter()
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def __call__(self, done):
+        print(f"\r{done:,} {self.unit} ({done / self.elapsed():,.0f}/s)", end="", file=self.out)
+
+    def finish(self):
+        print(file=self.out)
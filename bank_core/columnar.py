@@ -0,0 +1,199 @@
+"""Columnar export of the ledger for NumPy analytics.
+
+The transactions are written to a directory of fixed-width binary columns,
+one file per column, plus a manifest.json that records the row count, the
+dtypes, the type codes and the last exported id:
+
+    id.bin          int64     transaction id, ascending
+    account_id.bin  int32     -1 when missing
+    amount.bin      float64
+    type.bin        uint8     index into manifest["types"]
+    day.bin         int32     days since 1970-01-01, NO_DAY when missing
+
+Each export appends the rows above the manifest's last id, archived years
+included (see archive.py), so it only costs as much as the new postings.
+Rows deleted after they were exported stay in the copy; export with
+``--full`` to start over. Readers map the files with numpy.memmap, so
+aggregations run over the whole ledger without loading it or building
+Python tuples:
+
+    python -m bank_core.columnar export                # append new transactions to ledger_columns/
+    python -m bank_core.columnar summary               # totals computed from the columns
+
+    ledger = ColumnarLedger("ledger_columns")
+    net = np.bincount(ledger.account_id, weights=ledger.signed_amount())
+
+Needs numpy, which the rest of bank_core does not.
+"""
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from . import archive
+
+OUT_DIR = "ledger_columns"
+MANIFEST = "manifest.json"
+FORMAT = 1
+COLUMNS = {
+    "id": "<i8",
+    "account_id": "<i4",
+    "amount": "<f8",
+    "type": "u1",
+    "day": "<i4",
+}
+NO_DAY = np.iinfo(np.int32).min
+
+def read_manifest(directory):
+    """The directory's manifest, or a new, empty one."""
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {"format": FORMAT, "rows": 0, "last_id": 0, "columns": COLUMNS, "types": ["deposit", "withdraw"]}
+    if manifest.get("format") != FORMAT:
+        raise ValueError(f"{directory} holds columnar format {manifest.get('format')}, expected {FORMAT}")
+    return manifest
+
+def _write_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def _encode(rows, types):
+    """Column arrays for a chunk of (id, account_id, type, amount, date) rows."""
+    ids, account_ids, kinds, amounts, days = zip(*rows)
+    codes = []
+    for kind in kinds:
+        if kind not in types:
+            types.append(kind)  # new codes are appended, so existing ones never change
+        codes.append(types.index(kind))
+    dates = np.array([d if d else "NaT" for d in days], dtype="datetime64[D]")
+    day = dates.astype(np.int64)
+    day[np.isnat(dates)] = NO_DAY
+    return {
+        "id": np.array(ids, dtype=COLUMNS["id"]),
+        "account_id": np.array([-1 if a is None else a for a in account_ids], dtype=COLUMNS["account_id"]),
+        "amount": np.array([0.0 if a is None else a for a in amounts], dtype=COLUMNS["amount"]),
+        "type": np.array(codes, dtype=COLUMNS["type"]),
+        "day": day.astype(COLUMNS["day"]),
+    }
+
+def export(conn, directory=OUT_DIR, chunk_size=100000, full=False):
+    """Appends the transactions above the last exported id and returns how many were added.
+
+    Column files are written first and the manifest last. Bytes past the
+    manifest's row count, left behind by an interrupted export, are cut off
+    before appending.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = read_manifest(directory)
+    if full:
+        manifest.update(rows=0, last_id=0)
+    with archive.archives_attached(conn) as years:
+        source = archive.VIEW if years else "transactions"
+        files = {}
+        try:
+            for name, dtype in COLUMNS.items():
+                path = os.path.join(directory, f"{name}.bin")
+                f = open(path, "r+b" if os.path.exists(path) else "w+b")
+                files[name] = f
+                f.truncate(manifest["rows"] * np.dtype(dtype).itemsize)
+                f.seek(0, os.SEEK_END)
+
+            cur = conn.execute(f"SELECT id, account_id, type, amount, date FROM {source} WHERE id > ? ORDER BY id",
+                               (manifest["last_id"],))
+            added = 0
+            try:
+                while True:
+                    rows = cur.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    for name, column in _encode(rows, manifest["types"]).items():
+                        column.tofile(files[name])
+                    added += len(rows)
+                    manifest["last_id"] = rows[-1][0]
+            finally:
+                cur.close()
+            for f in files.values():
+                f.flush()
+                os.fsync(f.fileno())
+        finally:
+            for f in files.values():
+                f.close()
+    manifest["rows"] += added
+    manifest["exported_at"] = datetime.now().isoformat(timespec="seconds")
+    _write_manifest(directory, manifest)
+    return added
+
+class ColumnarLedger:
+    """Read-only, memory-mapped view of an exported ledger.
+
+    ``id``, ``account_id``, ``amount``, ``type`` and ``day`` are numpy.memmap
+    arrays of ``rows`` elements; pages are read from disk as they are touched.
+    """
+
+    def __init__(self, directory=OUT_DIR):
+        self.directory = directory
+        self.manifest = read_manifest(directory)
+        self.rows = self.manifest["rows"]
+        self.types = self.manifest["types"]
+        for name, dtype in self.manifest["columns"].items():
+            if self.rows:
+                column = np.memmap(os.path.join(directory, f"{name}.bin"), dtype=dtype, mode="r",
+                                   shape=(self.rows,))
+            else:
+                column = np.empty(0, dtype=dtype)  # memmap cannot map an empty file
+            setattr(self, name, column)
+
+    def type_code(self, kind):
+        return self.types.index(kind)
+
+    def dates(self):
+        """``day`` as datetime64[D]; missing dates come out as very old days, not NaT."""
+        return self.day.astype("datetime64[D]")
+
+    def signed_amount(self):
+        """Amounts with withdrawals negated, i.e. each transaction's effect on the balance."""
+        return np.where(self.type == self.type_code("withdraw"), -self.amount, self.amount)
+
+def main(argv=None):
+    import argparse
+    from .db import DEFAULT_DB, DatabaseManager
+
+    parser = argparse.ArgumentParser(description="Export the ledger to memory-mappable NumPy columns.")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    parser.add_argument("--dir", default=OUT_DIR, help=f"column directory (default: {OUT_DIR})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_cmd = commands.add_parser("export", help="append transactions exported since the last run")
+    export_cmd.add_argument("--full", action="store_true", help="rewrite the columns from scratch")
+    export_cmd.add_argument("--chunk-size", type=int, default=100000)
+    commands.add_parser("summary", help="row count, date range and totals from the columns")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        db = DatabaseManager(args.db, read_only=True)
+        try:
+            started = time.perf_counter()
+            added = export(db.connect(), args.dir, args.chunk_size, args.full)
+            print(f"Exported {added:,} transactions to {args.dir} in {time.perf_counter() - started:.2f}s.")
+        finally:
+            db.close()
+        return
+
+    ledger = ColumnarLedger(args.dir)
+    print(f"{ledger.rows:,} transactions up to id {ledger.manifest['last_id']}")
+    if not ledger.rows:
+        return
+    dated = ledger.day[ledger.day != NO_DAY]
+    if dated.size:
+        print(f"Dates {dated.min().astype('datetime64[D]')} .. {dated.max().astype('datetime64[D]')}")
+    totals = np.bincount(ledger.type, weights=ledger.amount, minlength=len(ledger.types))
+    for kind, total in zip(ledger.types, totals):
+        print(f"{kind:<10} {total:>20,.2f}")
+
+if __name__ == "__main__":
+    main()
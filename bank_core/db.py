@@ -0,0 +1,431 @@
+"""SQLite connection management and schema migrations."""
+import contextlib
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+
+from . import aggregates, metrics
+
+DEFAULT_DB = "bank.db"
+
+# Ordered schema migrations, applied once each and tracked in PRAGMA user_version.
+# Never edit a released migration; append a new one instead.
+MIGRATIONS = (
+    (1, (
+        """
+        CREATE TABLE IF NOT EXISTS customers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT,
+            phone TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS accounts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id INTEGER,
+            account_type TEXT,
+            balance REAL DEFAULT 0,
+            FOREIGN KEY (customer_id) REFERENCES customers(id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            account_id INTEGER,
+            type TEXT,
+            amount REAL,
+            date TEXT,
+            FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL DEFAULT 'customer',
+            customer_id INTEGER,
+            FOREIGN KEY (customer_id) REFERENCES customers(id)
+        )
+        """,
+        "INSERT OR IGNORE INTO users (username, password, role) VALUES ('admin', 'admin', 'admin')",
+        "INSERT OR IGNORE INTO users (username, password, role, customer_id) VALUES ('user', 'user', 'customer', 1)",
+    )),
+    # Indexes for the hot lookups. users(username) is already covered by its UNIQUE index.
+    (2, (
+        "CREATE INDEX IF NOT EXISTS idx_accounts_customer ON accounts(customer_id)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_account_date ON transactions(account_id, date, id)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(date, id)",
+    )),
+    # Full-text index over customers, kept in sync by triggers. prefix='2 3'
+    # stores 2- and 3-character prefixes so typeahead queries stay fast.
+    (3, (
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS customers_fts USING fts5(
+            name, email, phone,
+            content='customers', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS customers_fts_insert AFTER INSERT ON customers BEGIN
+            INSERT INTO customers_fts(rowid, name, email, phone)
+            VALUES (new.id, new.name, new.email, new.phone);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS customers_fts_delete AFTER DELETE ON customers BEGIN
+            INSERT INTO customers_fts(customers_fts, rowid, name, email, phone)
+            VALUES ('delete', old.id, old.name, old.email, old.phone);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS customers_fts_update AFTER UPDATE OF name, email, phone ON customers BEGIN
+            INSERT INTO customers_fts(customers_fts, rowid, name, email, phone)
+            VALUES ('delete', old.id, old.name, old.email, old.phone);
+            INSERT INTO customers_fts(rowid, name, email, phone)
+            VALUES (new.id, new.name, new.email, new.phone);
+        END
+        """,
+        "INSERT INTO customers_fts(customers_fts) VALUES ('rebuild')",
+    )),
+    # Daily per-account and monthly per-type summaries, backfilled from the ledger.
+    (4, (*aggregates.SCHEMA, *aggregates.REBUILD)),
+    # Row versions for optimistic concurrency: every write to a row bumps its
+    # version, and edits only apply if the version they read is still current.
+    (5, (
+        "ALTER TABLE customers ADD COLUMN version INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE accounts ADD COLUMN version INTEGER NOT NULL DEFAULT 0",
+    )),
+    # With foreign keys enforced, deleting a customer looks up their logins, and
+    # deleting an account (directly or by cascade) drops its daily summaries.
+    # monthly_type_totals keep the figures, as they are per type, not per account.
+    (6, (
+        "CREATE INDEX IF NOT EXISTS idx_users_customer ON users(customer_id)",
+        """
+        CREATE TRIGGER IF NOT EXISTS accounts_summary_delete AFTER DELETE ON accounts BEGIN
+            DELETE FROM daily_account_summary WHERE account_id = old.id;
+        END
+        """,
+    )),
+    # Transactions flagged by the anomaly scan (see anomalies.py), and how far
+    # each batch job has got through the ledger.
+    (7, (
+        """
+        CREATE TABLE IF NOT EXISTS alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            transaction_id INTEGER NOT NULL,
+            account_id INTEGER NOT NULL,
+            rule TEXT NOT NULL,
+            score REAL NOT NULL,
+            day TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (transaction_id, rule),
+            FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_alerts_account ON alerts(account_id)",
+        """
+        CREATE TABLE IF NOT EXISTS job_state (
+            job TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT
+        )
+        """,
+    )),
+    # Monthly interest and fees per account type (see accrual.py), and the
+    # periods already accrued, so that a period is never charged twice.
+    (8, (
+        """
+        CREATE TABLE IF NOT EXISTS account_type_rates (
+            account_type TEXT PRIMARY KEY,
+            annual_rate REAL NOT NULL DEFAULT 0,
+            monthly_fee REAL NOT NULL DEFAULT 0,
+            fee_waived_from REAL
+        )
+        """,
+        """
+        INSERT OR IGNORE INTO account_type_rates (account_type, annual_rate, monthly_fee, fee_waived_from)
+        VALUES ('Savings', 0.02, 0, NULL), ('Checking', 0.001, 5, 1500), ('Business', 0.005, 15, 10000)
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS accrual_runs (
+            period TEXT PRIMARY KEY,
+            posted_on TEXT NOT NULL,
+            accounts INTEGER NOT NULL,
+            interest REAL NOT NULL,
+            fees REAL NOT NULL,
+            run_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    )),
+    # Account-to-account transfers (see LedgerService.transfer). Each one is a
+    # withdrawal and a deposit in transactions; debit_id and credit_id point at
+    # them. Those are not foreign keys, so the rows can move to the archives.
+    (9, (
+        """
+        CREATE TABLE IF NOT EXISTS transfers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            from_account_id INTEGER,
+            to_account_id INTEGER,
+            amount REAL NOT NULL,
+            date TEXT NOT NULL,
+            debit_id INTEGER NOT NULL,
+            credit_id INTEGER NOT NULL,
+            FOREIGN KEY (from_account_id) REFERENCES accounts(id) ON DELETE SET NULL,
+            FOREIGN KEY (to_account_id) REFERENCES accounts(id) ON DELETE SET NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_transfers_from ON transfers(from_account_id)",
+        "CREATE INDEX IF NOT EXISTS idx_transfers_to ON transfers(to_account_id)",
+        "CREATE INDEX IF NOT EXISTS idx_transfers_date ON transfers(date, id)",
+    )),
+)
+
+class RecordNotFound(LookupError):
+    """Raised when an operation refers to a customer or account that does not exist."""
+
+class UpdateConflict(Exception):
+    """Raised when an edit is based on a row version that someone else has since changed."""
+
+    def __init__(self, kind, record_id):
+        super().__init__(f"This {kind} was changed by someone else after you loaded it. "
+                         "The latest values have been reloaded; please review them and save again.")
+        self.kind = kind
+        self.record_id = record_id
+
+class DatabaseManager:
+    """Handles all database operations for customers, accounts, and transactions."""
+
+    # Applied to every connection the manager opens.
+    PRAGMAS = (
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),
+        ("mmap_size", 256 * 1024 * 1024),
+        ("cache_size", -32000),
+        ("busy_timeout", 5000),
+        ("foreign_keys", "ON"),
+    )
+
+    def __init__(self, db_name=DEFAULT_DB, pooled=True, slow_query_ms=100, trace_sql=False, read_only=False):
+        self.db_name = db_name
+        self.pooled = pooled
+        # Read-only managers are for reports and exports: their connections can
+        # never take the write lock, and they do not run migrations.
+        self.read_only = read_only
+        self.slow_query_ms = slow_query_ms
+        # Off by default: the callback runs for every statement SQLite executes,
+        # FTS5's internal ones included, which doubles the cost of a search.
+        self.trace_sql = trace_sql
+        self._local = threading.local()
+        self._pool_lock = threading.Lock()
+        self._pool = {}
+        self.pool_hits = 0
+        self.pool_misses = 0
+        self._watch_lock = threading.Lock()
+        self._watch_conn = None
+        if not read_only:
+            self.migrate()
+
+    def _connect(self, **kwargs):
+        if self.read_only:
+            uri = pathlib.Path(self.db_name).absolute().as_uri() + "?mode=ro"
+            return sqlite3.connect(uri, uri=True, **kwargs)
+        return sqlite3.connect(self.db_name, **kwargs)
+
+    def _open(self):
+        """Opens a new, instrumented connection and applies the tuning PRAGMAs."""
+        conn = self._connect(check_same_thread=not self.pooled, factory=metrics.TimedConnection)
+        conn.slow_query_seconds = self.slow_query_ms / 1000
+        if self.trace_sql:
+            conn.set_trace_callback(metrics.trace_statement)
+        for name, value in self.PRAGMAS:
+            if self.read_only and name == "journal_mode":
+                continue  # changing it needs write access; the writers have set it
+            conn.execute(f"PRAGMA {name}={value}")
+        if self.read_only:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def connect(self):
+        """Returns this thread's pooled connection, or a new one when pooling is off.
+
+        The pooled connection can still be used as ``with db.connect() as conn``:
+        the block commits or rolls back, and the connection stays open for reuse.
+        """
+        if not self.pooled:
+            return self._open()
+
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            with self._pool_lock:
+                self.pool_hits += 1
+            return conn
+
+        conn = self._open()
+        thread = threading.current_thread()
+        with self._pool_lock:
+            self.pool_misses += 1
+            self._reap_dead_threads()
+            self._pool[thread] = conn
+        self._local.conn = conn
+        return conn
+
+    @contextlib.contextmanager
+    def session(self):
+        """Yields a connection for one unit of work.
+
+        Commits on success and rolls back on error; the connection is closed
+        afterwards only when pooling is off.
+        """
+        conn = self.connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            if not self.pooled:
+                conn.close()
+
+    def _reap_dead_threads(self):
+        """Closes connections whose owning thread has exited."""
+        for thread in [t for t in self._pool if not t.is_alive()]:
+            self._pool.pop(thread).close()
+
+    def release(self):
+        """Closes the calling thread's pooled connection, if any."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._pool_lock:
+            self._pool.pop(threading.current_thread(), None)
+        conn.close()
+
+    def close(self):
+        """Closes every pooled connection."""
+        with self._pool_lock:
+            connections = list(self._pool.values())
+            self._pool.clear()
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+        with self._watch_lock:
+            if self._watch_conn is not None:
+                self._watch_conn.close()
+                self._watch_conn = None
+
+    def change_token(self):
+        """Returns a value that changes whenever the database has been written to.
+
+        Reads ``PRAGMA data_version`` on a dedicated connection that never writes,
+        so a commit from any other connection, in this process or another, bumps it.
+        Safe to call from any thread.
+        """
+        with self._watch_lock:
+            if self._watch_conn is None:
+                self._watch_conn = self._connect(check_same_thread=False)
+            return self._watch_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def pool_stats(self):
+        """Returns pool hit/miss counters and the number of open connections."""
+        with self._pool_lock:
+            hits, misses, size = self.pool_hits, self.pool_misses, len(self._pool)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "open_connections": size,
+        }
+
+    def snapshot(self, target, pages_per_step=256, pause=0.001):
+        """Copies a consistent snapshot of the database to ``target`` with the online backup API.
+
+        The copy runs inside one read transaction on its own connection, so
+        it reflects a single point in time. Under WAL, writers carry on
+        meanwhile. Pages are copied ``pages_per_step`` at a time, with a short
+        ``pause`` between steps. The file is built next to ``target`` and
+        moved into place once complete, so readers never open a partial
+        snapshot. Returns the number of pages copied.
+        """
+        partial = target + ".partial"
+        if os.path.exists(partial):
+            os.remove(partial)
+        pages = 0
+
+        def progress(status, remaining, total):
+            nonlocal pages
+            pages = total
+            time.sleep(pause)
+
+        source = self._connect()
+        try:
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master")  # pins the read snapshot
+            dest = sqlite3.connect(partial)
+            try:
+                source.backup(dest, pages=pages_per_step, progress=progress)
+                # The copy inherits WAL mode; a rollback journal lets read-only
+                # connections open it without creating -wal/-shm files.
+                dest.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                dest.close()
+            source.rollback()
+        finally:
+            source.close()
+        os.replace(partial, target)
+        return pages
+
+    def schema_version(self, conn):
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def migrate(self):
+        """Brings the schema up to the latest version in MIGRATIONS.
+
+        Costs a single PRAGMA read when the database is already current.
+        """
+        latest = MIGRATIONS[-1][0]
+        conn = self.connect()
+        try:
+            if self.schema_version(conn) >= latest:
+                return
+            if not conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0]:
+                # A new file: turn on incremental vacuum once, before any table
+                # exists, so that the VACUUM that applies it costs nothing.
+                # Older files are converted with
+                # ``python -m bank_core.maintenance vacuum --convert``.
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
+            # Off while the schema changes, as SQLite recommends: the first
+            # migration seeds a login before any customer exists. It cannot
+            # be switched inside a transaction, hence before BEGIN.
+            conn.execute("PRAGMA foreign_keys=OFF")
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Another process may have migrated while we waited for the lock.
+                current = self.schema_version(conn)
+                for version, statements in MIGRATIONS:
+                    if version <= current:
+                        continue
+                    for sql in statements:
+                        conn.execute(sql)
+                    conn.execute(f"PRAGMA user_version={version}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.execute("PRAGMA foreign_keys=ON")
+        finally:
+            if not self.pooled:
+                conn.close()
+
+def is_busy_error(error):
+    """True for SQLITE_BUSY / SQLITE_LOCKED, i.e. errors worth retrying."""
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return "locked" in str(error) or "busy" in str(error)
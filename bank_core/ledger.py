@@ -0,0 +1,286 @@
+"""Posting of deposits, withdrawals and transfers."""
+import collections
+import concurrent.futures
+import math
+import queue
+import random
+import sqlite3
+import threading
+import time
+from datetime import date
+
+from . import aggregates
+from .db import is_busy_error
+from .metrics import percentile
+
+class LedgerError(Exception):
+    """Raised when a posting is rejected."""
+
+class AccountNotFound(LedgerError):
+    pass
+
+class InsufficientFunds(LedgerError):
+    pass
+
+class InvalidTransfer(LedgerError):
+    pass
+
+class LedgerService:
+    """Posts deposits, withdrawals and transfers; usable from the GUI and from batch jobs.
+
+    Each posting is one short write transaction: the balance is changed with a
+    single guarded ``UPDATE`` (no read-modify-write in Python) and the
+    transaction row is inserted before committing. If another writer holds the
+    database lock, the posting is retried with exponential backoff.
+
+    A transfer is a withdrawal from one account and a deposit to another in the
+    same transaction, linked by a row in transfers. Every check that can reject
+    it runs before its first write, so a rejected transfer leaves nothing behind
+    and the batch it was part of carries on.
+    """
+
+    TYPES = ("deposit", "withdraw")
+
+    def __init__(self, db, retries=5, backoff=0.05):
+        self.db = db
+        self.retries = retries
+        self.backoff = backoff
+
+    def post(self, account_id, t_type, amount, day=None):
+        """Applies one posting and returns the account's new balance."""
+        day = day or date.today().isoformat()
+        return self.run_in_transaction(lambda cur: self.apply(cur, account_id, t_type, amount, day))
+
+    def apply(self, cur, account_id, t_type, amount, day):
+        """Applies one posting inside the caller's open write transaction."""
+        self._move(cur, account_id, t_type, amount, day)
+        cur.execute("SELECT balance FROM accounts WHERE id=?", (account_id,))
+        return cur.fetchone()[0]
+
+    def transfer(self, from_id, to_id, amount, day=None):
+        """Moves ``amount`` from one account to another and returns the transfer id."""
+        day = day or date.today().isoformat()
+        return self.run_in_transaction(lambda cur: self.apply_transfer(cur, from_id, to_id, amount, day))
+
+    def transfer_many(self, transfers):
+        """Applies (from_id, to_id, amount, day) transfers in the given order, all in
+        one transaction. Returns a (transfer id, None) or (None, LedgerError) per transfer.
+
+        The summary tables are updated once for the whole batch.
+        """
+        def work(cur):
+            outcomes = []
+            postings = []
+            for from_id, to_id, amount, day in transfers:
+                try:
+                    outcomes.append((self.apply_transfer(cur, from_id, to_id, amount, day, postings), None))
+                except LedgerError as e:
+                    outcomes.append((None, e))
+            aggregates.record_many(cur, postings)
+            return outcomes
+
+        return self.run_in_transaction(work)
+
+    def apply_transfer(self, cur, from_id, to_id, amount, day, postings=None):
+        """Applies one transfer inside the caller's open write transaction.
+
+        If a ``postings`` list is given, the two postings are appended to it for
+        the caller to add to the summaries, instead of being added right away.
+        """
+        if from_id == to_id:
+            raise InvalidTransfer("Cannot transfer to the same account.")
+        cur.execute("SELECT 1 FROM accounts WHERE id=?", (to_id,))
+        if not cur.fetchone():
+            raise AccountNotFound(f"No account found with ID: {to_id}")
+        debit_id = self._move(cur, from_id, "withdraw", amount, day, postings)
+        credit_id = self._move(cur, to_id, "deposit", amount, day, postings)
+        cur.execute("INSERT INTO transfers (from_account_id, to_account_id, amount, date, debit_id, credit_id) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", (from_id, to_id, amount, day, debit_id, credit_id))
+        return cur.lastrowid
+
+    def _move(self, cur, account_id, t_type, amount, day, postings=None):
+        """Changes the balance, records the transaction and returns its id."""
+        if t_type not in self.TYPES:
+            raise LedgerError(f"Unknown transaction type: {t_type}")
+        if not math.isfinite(amount) or amount <= 0:
+            raise LedgerError("Invalid amount. Must be a positive number.")
+
+        if t_type == "withdraw":
+            cur.execute("UPDATE accounts SET balance = balance - ?, version = version + 1 WHERE id=? AND balance >= ?",
+                        (amount, account_id, amount))
+        else:
+            cur.execute("UPDATE accounts SET balance = balance + ?, version = version + 1 WHERE id=?",
+                        (amount, account_id))
+        if cur.rowcount == 0:
+            cur.execute("SELECT 1 FROM accounts WHERE id=?", (account_id,))
+            if not cur.fetchone():
+                raise AccountNotFound(f"No account found with ID: {account_id}")
+            raise InsufficientFunds("Insufficient funds for this withdrawal.")
+
+        cur.execute("INSERT INTO transactions (account_id, type, amount, date) VALUES (?, ?, ?, ?)",
+                    (account_id, t_type, amount, day))
+        transaction_id = cur.lastrowid
+        if postings is None:
+            aggregates.record(cur, account_id, t_type, amount, day)
+        else:
+            postings.append((account_id, t_type, amount, day))
+        return transaction_id
+
+    def run_in_transaction(self, work):
+        """Runs ``work(cursor)`` in a BEGIN IMMEDIATE transaction, retrying while the database is busy."""
+        conn = self.db.connect()
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        result = work(conn.cursor())
+                        conn.commit()
+                        return result
+                    except BaseException:
+                        conn.rollback()
+                        raise
+                except sqlite3.OperationalError as e:
+                    if not is_busy_error(e) or attempt == self.retries:
+                        raise
+                    time.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+        finally:
+            if not self.db.pooled:
+                conn.close()
+
+class PostingQueue:
+    """Group-commit front end for LedgerService.
+
+    ``submit()`` enqueues a posting and returns a Future. A single writer thread
+    drains the queue and applies up to ``max_batch`` postings, or whatever
+    arrived within ``max_delay_ms`` of the first one, in one transaction, so a
+    burst of postings shares one commit (and one fsync). Each Future resolves to
+    the new balance, or to the LedgerError that rejected that posting.
+
+    ``synchronous`` sets the writer connection's durability: "FULL" syncs every
+    commit, "NORMAL" (the default under WAL) may lose the last commits on power
+    loss but never corrupts the database.
+
+    If the writer thread dies, the error is passed to every queued posting and
+    to the ones submitted afterwards.
+    """
+
+    SYNCHRONOUS = ("OFF", "NORMAL", "FULL", "EXTRA")
+    _STOP = object()
+
+    def __init__(self, ledger, max_batch=500, max_delay_ms=5, synchronous="NORMAL"):
+        if synchronous.upper() not in self.SYNCHRONOUS:
+            raise ValueError(f"synchronous must be one of {', '.join(self.SYNCHRONOUS)}, not {synchronous!r}")
+        self.ledger = ledger
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.synchronous = synchronous.upper()
+        self.error = None
+        self.batches = 0
+        self.postings = 0
+        self.largest_batch = 0
+        self._batch_sizes = collections.deque(maxlen=1000)
+        self._commit_seconds = collections.deque(maxlen=1000)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="posting-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, account_id, t_type, amount, day=None):
+        future = concurrent.futures.Future()
+        self._queue.put((future, account_id, t_type, amount, day or date.today().isoformat()))
+        if self.error is not None:
+            self._fail_queued()
+        return future
+
+    def close(self):
+        """Flushes the queued postings and stops the writer thread."""
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    def stats(self):
+        sizes = sorted(self._batch_sizes)
+        latencies = sorted(self._commit_seconds)
+        return {
+            "batches": self.batches,
+            "postings": self.postings,
+            "largest_batch": self.largest_batch,
+            "avg_batch": self.postings / self.batches if self.batches else 0.0,
+            "batch_p50": percentile(sizes, 50),
+            "commit_ms_p50": percentile(latencies, 50) * 1000,
+            "commit_ms_p99": percentile(latencies, 99) * 1000,
+        }
+
+    def _next_batch(self):
+        """Blocks for the first item, then gathers more until the batch is full or the delay expires."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while batch[-1] is not self._STOP and len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        batch = []
+        try:
+            self.ledger.db.connect().execute(f"PRAGMA synchronous={self.synchronous}")
+            stopping = False
+            while not stopping:
+                batch = self._next_batch()
+                if batch[-1] is self._STOP:
+                    batch.pop()
+                    stopping = True
+                batch = [item for item in batch if item[0].set_running_or_notify_cancel()]
+                if batch:
+                    self._commit(batch)
+        except BaseException as e:
+            self.error = e
+            for future, *_ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            self._fail_queued()
+        finally:
+            self.ledger.db.release()
+
+    def _fail_queued(self):
+        """Fails the postings left in the queue with the error that stopped the writer."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not self._STOP and item[0].set_running_or_notify_cancel():
+                item[0].set_exception(self.error)
+
+    def _commit(self, batch):
+        def work(cur):
+            outcomes = []
+            for _, account_id, t_type, amount, day in batch:
+                try:
+                    outcomes.append((self.ledger.apply(cur, account_id, t_type, amount, day), None))
+                except LedgerError as e:
+                    outcomes.append((None, e))
+            return outcomes
+
+        started = time.perf_counter()
+        try:
+            outcomes = self.ledger.run_in_transaction(work)
+        except Exception as e:
+            for future, *_ in batch:
+                future.set_exception(e)
+            return
+        self._commit_seconds.append(time.perf_counter() - started)
+        self._batch_sizes.append(len(batch))
+        self.batches += 1
+        self.postings += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        for (future, *_), (balance, error) in zip(batch, outcomes):
+            if error is None:
+                future.set_result(balance)
+            else:
+                future.set_exception(error)
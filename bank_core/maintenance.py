@@ -0,0 +1,154 @@
+"""Orphan cleanup and space reclamation.
+
+Foreign keys are enforced on every connection since schema version 6, so
+deleting a customer or account cascades to their accounts and transactions.
+Databases written before that can still hold orphans: accounts without a
+customer, logins of deleted customers, transactions without an account (in
+the archives too, which no cascade reaches) and daily summaries of deleted
+accounts. purge_orphans() deletes them in short batches, and
+incremental_vacuum() then hands the freed pages back to the file system a few
+at a time, so neither holds the write lock for long.
+
+    python -m bank_core.maintenance check               # count orphans, nothing is changed
+    python -m bank_core.maintenance purge               # delete them
+    python -m bank_core.maintenance vacuum              # reclaim free pages
+    python -m bank_core.maintenance vacuum --convert    # one-off: enable incremental vacuum on an old file
+"""
+import time
+
+from . import archive
+
+
+# (table, key column walked in batches, orphan condition). Parents come before
+# children: purging an orphaned account cascades to its transactions. Only
+# customer logins can be orphans; the demo login that migration 1 seeds
+# points at customer 1 before it exists and is kept too.
+ORPHANS = (
+    ("users", "id",
+     "role = 'customer' AND username != 'user' AND customer_id IS NOT NULL "
+     "AND NOT EXISTS (SELECT 1 FROM main.customers c WHERE c.id = customer_id)"),
+    ("accounts", "id",
+     "customer_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM main.customers c WHERE c.id = customer_id)"),
+    ("transactions", "id",
+     "account_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM main.accounts a WHERE a.id = account_id)"),
+    ("daily_account_summary", "account_id",
+     "NOT EXISTS (SELECT 1 FROM main.accounts a WHERE a.id = account_id)"),
+)
+
+def _orphan_tables(years):
+    """ORPHANS, plus the transactions table of every attached archive year."""
+    transactions = ORPHANS[2]
+    return [*ORPHANS, *((f"archive_{year}.{transactions[0]}", *transactions[1:]) for year in years)]
+
+def count_orphans(conn):
+    """{table: number of orphaned rows}. Purging can find more, as removing an
+    orphaned account orphans its archived transactions."""
+    with archive.archives_attached(conn) as years:
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {condition}").fetchone()[0]
+                for table, _, condition in _orphan_tables(years)}
+
+def purge_orphans(conn, batch_size=10000, pause=0.01, report=print):
+    """Deletes orphaned rows and returns {table: rows deleted}.
+
+    Each table is walked in ranges of ``batch_size`` keys, one short write
+    transaction per range with a ``pause`` in between, so postings keep going.
+    """
+    with archive.archives_attached(conn) as years:
+        return _purge(conn, _orphan_tables(years), batch_size, pause, report)
+
+def _purge(conn, tables, batch_size, pause, report):
+    purged = {}
+    for table, key, condition in tables:
+        last = conn.execute(f"SELECT MAX({key}) FROM {table}").fetchone()[0] or 0
+        deleted = 0
+        for low in range(0, last, batch_size):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = conn.execute(f"DELETE FROM {table} WHERE {key} > ? AND {key} <= ? AND {condition}",
+                                   (low, low + batch_size))
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            deleted += cur.rowcount
+            time.sleep(pause)
+        purged[table] = deleted
+        report(f"{table}: {deleted:,} orphaned rows deleted")
+    return purged
+
+def incremental_vacuum(conn, pages_per_step=1000, pause=0.01, schemas=None):
+    """Releases the free pages of each schema (default: main and the attached
+    archives) in steps of ``pages_per_step``. Returns the number of pages released.
+
+    Only databases with auto_vacuum=INCREMENTAL can do this; others are skipped.
+    Under WAL the file shrinks at the next checkpoint.
+    """
+    with archive.archives_attached(conn) as years:
+        if schemas is None:
+            schemas = ["main", *(f"archive_{year}" for year in years)]
+        return _vacuum(conn, schemas, pages_per_step, pause)
+
+def _vacuum(conn, schemas, pages_per_step, pause):
+    released = 0
+    for schema in schemas:
+        if conn.execute(f"PRAGMA {schema}.auto_vacuum").fetchone()[0] != 2:
+            continue
+        while True:
+            free = conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+            if not free:
+                break
+            conn.execute(f"PRAGMA {schema}.incremental_vacuum({min(free, pages_per_step)})").fetchall()
+            released += min(free, pages_per_step)
+            time.sleep(pause)
+    conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+    return released
+
+def enable_incremental_vacuum(conn):
+    """Switches an existing database to auto_vacuum=INCREMENTAL.
+
+    Needs a full VACUUM, which rewrites the whole file under an exclusive
+    lock: run it once, in a maintenance window. New databases are created
+    with incremental vacuum already on.
+    """
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+
+def main(argv=None):
+    import argparse
+    from .db import DEFAULT_DB, DatabaseManager
+
+    parser = argparse.ArgumentParser(description="Purge orphaned rows and reclaim free space.")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("check", help="count orphaned rows")
+    purge = commands.add_parser("purge", help="delete orphaned rows in batches")
+    purge.add_argument("--batch-size", type=int, default=10000, help="keys scanned per transaction")
+    vacuum = commands.add_parser("vacuum", help="release free pages with incremental vacuum")
+    vacuum.add_argument("--pages", type=int, default=1000, help="pages released per step")
+    vacuum.add_argument("--convert", action="store_true",
+                        help="first enable incremental vacuum on an old database (full VACUUM, exclusive lock)")
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(args.db, read_only=args.command == "check")
+    try:
+        conn = db.connect()
+        if args.command == "check":
+            for table, count in count_orphans(conn).items():
+                print(f"{table:<36} {count:>12,} orphaned rows")
+        elif args.command == "purge":
+            purged = purge_orphans(conn, args.batch_size)
+            print(f"Deleted {sum(purged.values()):,} orphaned rows; run 'vacuum' to reclaim the space.")
+        else:
+            if args.convert and conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                started = time.perf_counter()
+                enable_incremental_vacuum(conn)
+                print(f"Incremental vacuum enabled ({time.perf_counter() - started:.1f}s).")
+            elif conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                print("Incremental vacuum is off for this database; run with --convert once to enable it.")
+            pages = incremental_vacuum(conn, args.pages)
+            print(f"Released {pages:,} free pages.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Counters and latency histograms, and the SQL hooks that feed them.
+
+DatabaseManager opens its connections with TimedConnection: every execute() is
+timed, and queries slower than the connection's threshold are logged on the
+"bank.sql" logger. With tracing on, every statement SQLite runs is also counted
+(and logged at DEBUG level) through the trace callback. The GUI adds the time
+its views take to load and render.
+
+Everything lands in REGISTRY, which can be written out as Prometheus text
+(e.g. for node_exporter's textfile collector) or as JSON:
+
+    metrics.REGISTRY.export("bank.prom")
+    metrics.REGISTRY.export("bank_metrics.json")
+"""
+import bisect
+import contextlib
+import functools
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+log = logging.getLogger("bank.sql")
+
+# Upper bounds in seconds, as in Prometheus' default buckets plus finer ones
+# at the low end, where most SQLite queries fall.
+BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """(upper bound, observations <= bound) pairs, ending with +Inf."""
+        total = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            yield bound, total
+
+class Registry:
+    """Thread-safe store of labelled counters and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def to_json(self):
+        with self._lock:
+            return {
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in sorted(self.counters.items())],
+                "histograms": [{"name": name, "labels": dict(labels), "count": h.count, "sum": h.sum,
+                                "buckets": {_format_bound(bound): count for bound, count in h.cumulative()}}
+                               for (name, labels), h in sorted(self.histograms.items())],
+            }
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), h in sorted(self.histograms.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} histogram")
+                for bound, count in h.cumulative():
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', _format_bound(bound)),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {h.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Writes the metrics to ``path``: JSON for a .json file, Prometheus text otherwise.
+
+        The file is replaced atomically, so a collector never reads half of it.
+        """
+        if path.endswith(".json"):
+            text = json.dumps(self.to_json(), indent=2)
+        else:
+            text = self.to_prometheus()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+REGISTRY = Registry()
+
+_KIND_RE = re.compile(r"[\s\-]*(\w+)")
+
+@functools.lru_cache(maxsize=1024)
+def statement_kind(sql):
+    """First keyword of a statement (SELECT, INSERT, ...), used as a low-cardinality label."""
+    match = _KIND_RE.match(sql)
+    return match.group(1).upper() if match else "OTHER"
+
+def trace_statement(sql):
+    """SQLite trace callback: counts every statement the engine runs, including
+    the implicit BEGIN/COMMIT and trigger bodies ("-- TRIGGER ...")."""
+    REGISTRY.inc("bank_sql_statements_total", kind=statement_kind(sql))
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("%s", sql)
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor whose execute calls are timed by its TimedConnection.
+
+    For a SELECT the time covers running the statement up to the first row;
+    rows fetched afterwards are not included.
+    """
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.connection.record(sql, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection.record(sql, time.perf_counter() - started)
+
+class TimedConnection(sqlite3.Connection):
+    """Connection factory for sqlite3.connect() that times every query."""
+
+    slow_query_seconds = 0.1
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    # The built-in shortcuts create a plain Cursor, bypassing cursor().
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def record(self, sql, seconds):
+        kind = statement_kind(sql)
+        REGISTRY.observe("bank_sql_query_seconds", seconds, kind=kind)
+        if seconds >= self.slow_query_seconds:
+            REGISTRY.inc("bank_sql_slow_queries_total", kind=kind)
+            log.warning("Slow query (%.1f ms): %s", seconds * 1000, " ".join(sql.split()))
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list (0 when empty)."""
+    if not sorted_values:
+        return 0
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
@@ -0,0 +1,123 @@
+"""Keyset pagination over tables and full-text search results."""
+import re
+
+from . import archive
+
+class KeysetPager:
+    """Fetches fixed-size pages of a table using keyset pagination.
+
+    ``order`` lists the sort columns; the last one must be unique (usually ``id``)
+    so that every row has a distinct key. All columns sort in the same direction,
+    which lets a page boundary be expressed as a single row-value comparison.
+    """
+
+    def __init__(self, db, table, columns, order=("id",), descending=False, where="", params=()):
+        self.db = db
+        self.table = table
+        self.columns = tuple(columns)
+        self.order = tuple(order)
+        self.descending = descending
+        self.where = where
+        self.params = tuple(params)
+        self._key_index = [self.columns.index(col) for col in self.order]
+        self.id_index = self.columns.index("id")
+
+    def key_of(self, row):
+        return tuple(row[i] for i in self._key_index)
+
+    def _query(self, sql, params):
+        with self.db.session() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def _select(self, bound=None, forward=True, limit=100):
+        conditions = [self.where] if self.where else []
+        params = list(self.params)
+        # Walking "forward" follows the display order; backwards flips it.
+        ascending = forward != self.descending
+        if bound is not None:
+            keys = ", ".join(self.order)
+            marks = ", ".join("?" * len(self.order))
+            conditions.append(f"({keys}) {'>' if ascending else '<'} ({marks})")
+            params.extend(bound)
+        direction = "ASC" if ascending else "DESC"
+        sql = f"SELECT {', '.join(self.columns)} FROM {self.table}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY " + ", ".join(f"{col} {direction}" for col in self.order)
+        sql += " LIMIT ?"
+        params.append(limit)
+        rows = self._query(sql, params)
+        return rows if forward else rows[::-1]
+
+    def first_page(self, limit):
+        return self._select(limit=limit)
+
+    def page_after(self, key, limit):
+        """Rows that follow ``key`` in display order."""
+        return self._select(key, forward=True, limit=limit)
+
+    def page_before(self, key, limit):
+        """Rows that precede ``key``, returned in display order."""
+        return self._select(key, forward=False, limit=limit)
+
+    def max_id(self):
+        rows = self._query(f"SELECT MAX(id) FROM {self.table}", ())
+        return rows[0][0] or 0
+
+    def rows_since(self, last_id, limit):
+        """Rows with an id above ``last_id``, oldest first."""
+        where = f"({self.where}) AND id > ?" if self.where else "id > ?"
+        sql = f"SELECT {', '.join(self.columns)} FROM {self.table} WHERE {where} ORDER BY id LIMIT ?"
+        return self._query(sql, (*self.params, last_id, limit))
+
+    def rows_by_id(self, ids):
+        """Current version of the given rows, keyed by id; deleted rows are absent."""
+        if not ids:
+            return {}
+        marks = ",".join("?" * len(ids))
+        where = f"({self.where}) AND id IN ({marks})" if self.where else f"id IN ({marks})"
+        sql = f"SELECT {', '.join(self.columns)} FROM {self.table} WHERE {where}"
+        return {row[self.id_index]: row for row in self._query(sql, (*self.params, *ids))}
+
+class HistoryPager(KeysetPager):
+    """KeysetPager over all_transactions: live and archived transactions alike.
+
+    The archives are attached to the connection for each query and detached
+    after it, which costs a directory listing and opening the year files.
+    """
+
+    def __init__(self, db, columns, **options):
+        super().__init__(db, archive.VIEW, columns, **options)
+
+    def _query(self, sql, params):
+        with self.db.session() as conn:
+            with archive.archives_attached(conn):
+                return conn.execute(sql, params).fetchall()
+
+def fts_prefix_query(text):
+    """Turns free text into an FTS5 query matching every word as a prefix.
+
+    Each word is quoted, so user input can never be parsed as FTS syntax.
+    Returns "" when the text holds no searchable word.
+    """
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+class CustomerSearchPager(KeysetPager):
+    """Ranked full-text matches over customers, paged on (score, id).
+
+    Rows carry their bm25 score as a trailing value, which the Treeview ignores
+    since it is not one of its columns. Name matches weigh the most.
+    """
+
+    MATCHES = """(
+        SELECT c.id, c.name, c.email, c.phone, c.version, bm25(customers_fts, 10.0, 2.0, 1.0) AS score
+        FROM customers_fts JOIN customers c ON c.id = customers_fts.rowid
+        WHERE customers_fts MATCH ?
+    )"""
+
+    def __init__(self, db, query):
+        super().__init__(db, self.MATCHES, ("id", "name", "email", "phone", "version", "score"),
+                         order=("score", "id"), params=(query,))
+
+    def max_id(self):
+        return 0
@@ -0,0 +1,184 @@
+"""Data access for users, customers, accounts, transactions and transfers.
+
+Each method is one short unit of work on the DatabaseManager's connection for
+the calling thread, so it is safe to run on a worker thread.
+
+Customers and accounts carry a version that every write bumps. Edits and
+deletes take the version the caller read and only apply if it is still
+current (compare-and-swap); otherwise they raise UpdateConflict.
+"""
+from datetime import date, timedelta
+
+from . import aggregates
+from .db import RecordNotFound, UpdateConflict
+from .paging import CustomerSearchPager, HistoryPager, KeysetPager, fts_prefix_query
+
+def check_swapped(conn, cursor, table, kind, record_id):
+    """Raises if a versioned UPDATE/DELETE matched no row: UpdateConflict when the
+    row still exists (its version moved on), RecordNotFound when it is gone."""
+    if cursor.rowcount:
+        return
+    if conn.execute(f"SELECT 1 FROM {table} WHERE id=?", (record_id,)).fetchone():
+        raise UpdateConflict(kind, record_id)
+    raise RecordNotFound(f"No {kind} found with ID: {record_id}")
+
+class UserRepository:
+    def __init__(self, db):
+        self.db = db
+
+    def authenticate(self, username, password):
+        """Returns (role, customer_id) for valid credentials, otherwise None."""
+        with self.db.session() as conn:
+            row = conn.execute("SELECT password, role, customer_id FROM users WHERE username=?",
+                               (username,)).fetchone()
+        if row and row[0] == password:
+            return row[1], row[2]
+        return None
+
+class CustomerRepository:
+    COLUMNS = ("id", "name", "email", "phone", "version")
+
+    def __init__(self, db):
+        self.db = db
+
+    def name(self, customer_id):
+        with self.db.session() as conn:
+            row = conn.execute("SELECT name FROM customers WHERE id=?", (customer_id,)).fetchone()
+        return row[0] if row else None
+
+    def add(self, name, email, phone):
+        with self.db.session() as conn:
+            return conn.execute("INSERT INTO customers (name, email, phone) VALUES (?, ?, ?)",
+                                (name, email, phone)).lastrowid
+
+    def get(self, customer_id):
+        with self.db.session() as conn:
+            return conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM customers WHERE id=?",
+                                (customer_id,)).fetchone()
+
+    def update(self, customer_id, version, name, email, phone):
+        """Saves the edit if the customer is still at ``version``; returns the new version."""
+        with self.db.session() as conn:
+            cur = conn.execute("UPDATE customers SET name=?, email=?, phone=?, version = version + 1 "
+                               "WHERE id=? AND version=?", (name, email, phone, customer_id, version))
+            check_swapped(conn, cur, "customers", "customer", customer_id)
+        return version + 1
+
+    def delete(self, customer_id, version):
+        """Deletes the customer with their logins; their accounts and transactions cascade."""
+        with self.db.session() as conn:
+            conn.execute("DELETE FROM users WHERE customer_id=?", (customer_id,))
+            cur = conn.execute("DELETE FROM customers WHERE id=? AND version=?", (customer_id, version))
+            check_swapped(conn, cur, "customers", "customer", customer_id)
+
+    def pager(self):
+        return KeysetPager(self.db, "customers", self.COLUMNS)
+
+    def search_pager(self, text):
+        """Ranked prefix matches for free text, or None when it holds no searchable word."""
+        query = fts_prefix_query(text)
+        return CustomerSearchPager(self.db, query) if query else None
+
+class AccountRepository:
+    COLUMNS = ("id", "customer_id", "account_type", "balance", "version")
+
+    def __init__(self, db):
+        self.db = db
+
+    def add(self, customer_id, account_type, balance):
+        with self.db.session() as conn:
+            if not conn.execute("SELECT 1 FROM customers WHERE id=?", (customer_id,)).fetchone():
+                raise RecordNotFound(f"No customer found with ID: {customer_id}")
+            return conn.execute("INSERT INTO accounts (customer_id, account_type, balance) VALUES (?, ?, ?)",
+                                (customer_id, account_type, balance)).lastrowid
+
+    def get(self, account_id):
+        with self.db.session() as conn:
+            return conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM accounts WHERE id=?",
+                                (account_id,)).fetchone()
+
+    def update(self, account_id, version, account_type, balance):
+        """Saves the edit if the account is still at ``version``; returns the new version.
+
+        Postings bump the version too, so a balance typed in before a deposit
+        was posted is refused instead of silently undoing the deposit.
+
+        A changed balance is posted as a deposit or withdrawal of the
+        difference, dated today, so that past balances and statements, which
+        are worked out backwards from the current balance, do not move.
+        """
+        with self.db.session() as conn:
+            row = conn.execute("SELECT balance FROM accounts WHERE id=? AND version=?",
+                               (account_id, version)).fetchone()
+            cur = conn.execute("UPDATE accounts SET account_type=?, balance=?, version = version + 1 "
+                               "WHERE id=? AND version=?", (account_type, balance, account_id, version))
+            check_swapped(conn, cur, "accounts", "account", account_id)
+            adjustment = balance - (row[0] or 0)
+            if adjustment:
+                t_type = "deposit" if adjustment > 0 else "withdraw"
+                day = date.today().isoformat()
+                conn.execute("INSERT INTO transactions (account_id, type, amount, date) VALUES (?, ?, ?, ?)",
+                             (account_id, t_type, abs(adjustment), day))
+                aggregates.record(conn.cursor(), account_id, t_type, abs(adjustment), day)
+        return version + 1
+
+    def delete(self, account_id, version):
+        with self.db.session() as conn:
+            cur = conn.execute("DELETE FROM accounts WHERE id=? AND version=?", (account_id, version))
+            check_swapped(conn, cur, "accounts", "account", account_id)
+
+    def for_customer(self, customer_id):
+        with self.db.session() as conn:
+            return conn.execute("SELECT id, account_type, balance FROM accounts WHERE customer_id=?",
+                                (customer_id,)).fetchall()
+
+    def summaries(self, customer_id, days=30):
+        """Balance, last activity day and the last ``days`` days' deposits and withdrawals
+        of each of the customer's accounts, read from the summary tables."""
+        since = (date.today() - timedelta(days=days - 1)).isoformat()
+        with self.db.session() as conn:
+            return aggregates.account_summaries(conn, customer_id, since)
+
+    def pager(self):
+        return KeysetPager(self.db, "accounts", self.COLUMNS)
+
+class TransactionRepository:
+    COLUMNS = ("id", "account_id", "type", "amount", "date")
+
+    def __init__(self, db):
+        self.db = db
+
+    def pager(self):
+        """All transactions, newest first."""
+        return KeysetPager(self.db, "transactions", self.COLUMNS, order=("date", "id"), descending=True)
+
+    def account_pager(self, account_id, history=False):
+        """One account's transactions, newest first, paged on the (account_id, date, id) index.
+
+        Only the live (recent) transactions unless ``history`` is set, in which
+        case the archived years are included too.
+        """
+        options = dict(order=("date", "id"), descending=True, where="account_id = ?", params=(account_id,))
+        if history:
+            return HistoryPager(self.db, self.COLUMNS, **options)
+        return KeysetPager(self.db, "transactions", self.COLUMNS, **options)
+
+class TransferRepository:
+    COLUMNS = ("id", "from_account_id", "to_account_id", "amount", "date", "debit_id", "credit_id")
+
+    def __init__(self, db):
+        self.db = db
+
+    def pager(self):
+        """All transfers, newest first."""
+        return KeysetPager(self.db, "transfers", self.COLUMNS, order=("date", "id"), descending=True)
+
+    def for_account(self, account_id, limit=50):
+        """The account's latest transfers, in or out, newest first."""
+        with self.db.session() as conn:
+            return conn.execute(f"""
+                SELECT {', '.join(self.COLUMNS)} FROM transfers WHERE from_account_id = ?1
+                UNION ALL
+                SELECT {', '.join(self.COLUMNS)} FROM transfers WHERE to_account_id = ?1
+                ORDER BY date DESC, id DESC LIMIT ?2
+            """, (account_id, limit)).fetchall()
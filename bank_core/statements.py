@@ -0,0 +1,120 @@
+"""Account statements with opening, running and closing balances.
+
+The running balance is computed by SQLite with a window function over the
+(account_id, date, id) index, and rows are written to the output as the cursor
+produces them, so memory use stays flat however long the statement is. The
+opening balance comes from the summary tables (see aggregates.py). Periods
+that reach back into archived years read the archives as well (see archive.py).
+
+    python -m bank_core.statements 42 2024-01-01 2024-12-31 -o statement.csv
+    python -m bank_core.statements 42 2024-01-01 2024-12-31 --format html -o statement.html
+"""
+import csv
+import html
+import sys
+from datetime import date, timedelta
+
+from . import aggregates, archive
+from .db import DEFAULT_DB, DatabaseManager
+
+STATEMENT_SQL = """
+    SELECT id, date, type, amount,
+           ? + SUM(CASE WHEN type = 'deposit' THEN amount ELSE -amount END)
+               OVER (ORDER BY date, id ROWS UNBOUNDED PRECEDING) AS running_balance
+    FROM {source}
+    WHERE account_id = ? AND date BETWEEN ? AND ?
+    ORDER BY date, id
+"""
+
+class Statement:
+    """Streams one statement; ``closing`` and ``count`` are final once ``rows()`` is exhausted."""
+
+    def __init__(self, conn, account_id, start, end):
+        self.conn = conn
+        self.account_id = account_id
+        self.start = start
+        self.end = end
+        previous_day = (date.fromisoformat(start) - timedelta(days=1)).isoformat()
+        self.opening = aggregates.balance_on(conn, account_id, previous_day)
+        if self.opening is None:
+            raise LookupError(f"No account found with ID: {account_id}")
+        self.closing = self.opening
+        self.count = 0
+
+    def rows(self):
+        """Yields (id, date, type, amount, running_balance) in date order.
+
+        The archives the period reaches into are attached until the rows run
+        out or the generator is closed.
+        """
+        with archive.archives_attached(self.conn, first_year=int(self.start[:4])) as years:
+            source = archive.VIEW if years else "transactions"
+            cur = self.conn.execute(STATEMENT_SQL.format(source=source),
+                                    (self.opening, self.account_id, self.start, self.end))
+            try:
+                for row in cur:
+                    self.closing = row[4]
+                    self.count += 1
+                    yield row
+            finally:
+                cur.close()
+
+def write_csv(statement, out):
+    writer = csv.writer(out)
+    writer.writerow(["Account", statement.account_id, "From", statement.start, "To", statement.end])
+    writer.writerow(["Opening balance", f"{statement.opening:.2f}"])
+    writer.writerow(["id", "date", "type", "amount", "balance"])
+    for t_id, day, t_type, amount, balance in statement.rows():
+        writer.writerow([t_id, day, t_type, f"{amount:.2f}", f"{balance:.2f}"])
+    writer.writerow(["Closing balance", f"{statement.closing:.2f}"])
+
+def write_html(statement, out):
+    out.write("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+              f"<title>Statement for account {statement.account_id}</title></head><body>\n"
+              f"<h1>Account {statement.account_id}</h1>\n"
+              f"<p>{html.escape(statement.start)} to {html.escape(statement.end)}</p>\n"
+              f"<p>Opening balance: ${statement.opening:,.2f}</p>\n"
+              "<table>\n<tr><th>Id</th><th>Date</th><th>Type</th><th>Amount</th><th>Balance</th></tr>\n")
+    for t_id, day, t_type, amount, balance in statement.rows():
+        out.write(f"<tr><td>{t_id}</td><td>{html.escape(str(day))}</td><td>{html.escape(str(t_type))}</td>"
+                  f"<td>{amount:,.2f}</td><td>{balance:,.2f}</td></tr>\n")
+    out.write(f"</table>\n<p>Closing balance: ${statement.closing:,.2f}</p>\n</body></html>\n")
+
+WRITERS = {"csv": write_csv, "html": write_html}
+
+def export_statement(db, account_id, start, end, path, fmt="csv"):
+    """Writes a statement file and returns (transaction count, opening, closing)."""
+    with db.session() as conn:
+        statement = Statement(conn, account_id, start, end)
+        with open(path, "w", newline="", encoding="utf-8") as out:
+            WRITERS[fmt](statement, out)
+    return statement.count, statement.opening, statement.closing
+
+def main(argv=None):
+    import argparse  # only the command line needs it
+
+    parser = argparse.ArgumentParser(description="Export an account statement.")
+    parser.add_argument("account_id", type=int)
+    parser.add_argument("start", type=date.fromisoformat)
+    parser.add_argument("end", type=date.fromisoformat)
+    parser.add_argument("--format", choices=sorted(WRITERS), default="csv")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(args.db, read_only=True)
+    try:
+        if args.output:
+            count, opening, closing = export_statement(db, args.account_id, args.start.isoformat(),
+                                                       args.end.isoformat(), args.output, args.format)
+            print(f"{count:,} transactions written to {args.output} "
+                  f"(opening ${opening:,.2f}, closing ${closing:,.2f}).")
+        else:
+            with db.session() as conn:
+                statement = Statement(conn, args.account_id, args.start.isoformat(), args.end.isoformat())
+                WRITERS[args.format](statement, sys.stdout)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
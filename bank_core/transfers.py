@@ -0,0 +1,133 @@
+"""Batch transfers between accounts.
+
+A batch file is a CSV with one transfer per line (the date is optional and
+defaults to today):
+
+    from_account_id,to_account_id,amount,date
+    1042,77,250.00,2025-01-31
+
+Transfers are applied strictly in file order, ``batch_size`` per write
+transaction (LedgerService.transfer_many). A run therefore always has the same
+outcome: which transfers bounce for lack of funds depends only on the file and
+the starting balances. Each transaction takes the database write lock up front
+(BEGIN IMMEDIATE) and no other lock. Concurrent writers wait for each other,
+so there is no lock order that could deadlock. Rejected transfers leave no
+postings. They go to a JSONL file with the reason.
+
+    python -m bank_core.transfers apply transfers.csv --batch-size 2000
+    python -m bank_core.transfers list --account 1042
+"""
+import csv
+import time
+from datetime import date
+
+from .batch import Progress, RejectFile, chunks
+from .ledger import InvalidTransfer, LedgerService
+from .metrics import percentile
+from .validation import Validator
+
+
+def read_transfers(path):
+    """Yields (line_number, record dict) from a CSV batch file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from enumerate(csv.DictReader(f), start=2)
+
+def parse_transfer(record):
+    """(from_id, to_id, amount, day) from a batch file record; raises InvalidTransfer."""
+    fields = {key: (record.get(key) or "").strip() for key in ("from_account_id", "to_account_id", "amount", "date")}
+    for key in ("from_account_id", "to_account_id"):
+        if not fields[key].isdigit():
+            raise InvalidTransfer(f"Invalid {key}: {fields[key] or 'missing'}")
+    if not Validator.is_valid_amount(fields["amount"]) or float(fields["amount"]) <= 0:
+        raise InvalidTransfer("Invalid amount. Must be a positive number.")
+    try:
+        day = date.fromisoformat(fields["date"]).isoformat() if fields["date"] else date.today().isoformat()
+    except ValueError:
+        raise InvalidTransfer(f"Invalid date: {fields['date']}")
+    return int(fields["from_account_id"]), int(fields["to_account_id"]), float(fields["amount"]), day
+
+class BatchRun:
+    """Applies a stream of batch file records and keeps the counters for the report."""
+
+    def __init__(self, ledger, rejects, batch_size=2000):
+        self.ledger = ledger
+        self.rejects = RejectFile(rejects)
+        self.batch_size = batch_size
+        self.applied = 0
+        self.commit_seconds = []
+
+    @property
+    def rejected(self):
+        return self.rejects.count
+
+    def run(self, records, progress=None):
+        """Applies the records; ``progress`` is called with the number done after each batch."""
+        for chunk in chunks(records, self.batch_size):
+            parsed = []
+            for line_no, record in chunk:
+                try:
+                    parsed.append((line_no, record, parse_transfer(record)))
+                except InvalidTransfer as e:
+                    self.rejects.add(line_no, str(e), record)
+            if parsed:
+                started = time.perf_counter()
+                outcomes = self.ledger.transfer_many([transfer for _, _, transfer in parsed])
+                self.commit_seconds.append(time.perf_counter() - started)
+                for (line_no, record, _), (_, error) in zip(parsed, outcomes):
+                    if error is None:
+                        self.applied += 1
+                    else:
+                        self.rejects.add(line_no, str(error), record)
+            self.rejects.flush()
+            if progress:
+                progress(self.applied + self.rejected)
+
+def main(argv=None):
+    import argparse
+    from .db import DEFAULT_DB, DatabaseManager
+    from .repositories import TransferRepository
+
+    parser = argparse.ArgumentParser(description="Apply and list account-to-account transfers.")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+    apply_cmd = commands.add_parser("apply", help="apply a CSV batch file, in file order")
+    apply_cmd.add_argument("path")
+    apply_cmd.add_argument("--batch-size", type=int, default=2000, help="transfers per transaction")
+    apply_cmd.add_argument("--rejects", help="reject file (default: <path>.rejects.jsonl)")
+    list_cmd = commands.add_parser("list", help="show the latest transfers")
+    list_cmd.add_argument("--account", type=int, help="only transfers in or out of this account")
+    list_cmd.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(args.db, read_only=args.command == "list")
+    try:
+        if args.command == "list":
+            transfers = TransferRepository(db)
+            if args.account is None:
+                rows = transfers.pager().first_page(args.limit)
+            else:
+                rows = transfers.for_account(args.account, args.limit)
+            for t_id, from_id, to_id, amount, day, debit_id, credit_id in rows:
+                print(f"{day}  transfer {t_id:<8} {from_id or '-':>8} -> {to_id or '-':<8} {amount:>14,.2f}  "
+                      f"(transactions {debit_id}, {credit_id})")
+            return
+
+        rejects_path = args.rejects or args.path + ".rejects.jsonl"
+        progress = Progress("transfers")
+        with open(rejects_path, "w", encoding="utf-8") as rejects:
+            batch = BatchRun(LedgerService(db), rejects, args.batch_size)
+            batch.run(read_transfers(args.path), progress)
+        elapsed = progress.elapsed()
+        commits = sorted(batch.commit_seconds)
+        progress.finish()
+        print(f"Applied {batch.applied:,} transfers, rejected {batch.rejected:,} in {elapsed:.2f}s "
+              f"({(batch.applied + batch.rejected) / elapsed if elapsed else 0:,.0f}/s); "
+              f"{len(commits):,} commits, p50 {percentile(commits, 50) * 1000:.1f} ms, "
+              f"p99 {percentile(commits, 99) * 1000:.1f} ms.")
+        if batch.rejected:
+            print(f"Rejected transfers written to {rejects_path}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
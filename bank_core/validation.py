@@ -0,0 +1,29 @@
+"""Input validation shared by the GUI forms and the bulk importer."""
+import math
+import re
+
+class Validator:
+    # Compiled once; bulk imports call these for every row.
+    EMAIL_RE = re.compile(r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)")
+    PHONE_RE = re.compile(r"^\+?[0-9\s.-]{10,15}$")
+
+    @staticmethod
+    def is_valid_email(email):
+        """Simple regex for email validation."""
+        if not email: return True 
+        return Validator.EMAIL_RE.match(email)
+
+    @staticmethod
+    def is_valid_phone(phone):
+        """Simple regex for phone validation (10-15 digits, optional +)."""
+        if not phone: return True 
+        return Validator.PHONE_RE.match(phone)
+
+    @staticmethod
+    def is_valid_amount(amount_str):
+        """Checks if a string is a valid positive float (not inf or nan)."""
+        try:
+            amount = float(amount_str)
+            return math.isfinite(amount) and amount >= 0
+        except ValueError:
+            return False
@@ -0,0 +1,281 @@
+"""Headless benchmarks of the data layer at several dataset sizes.
+
+Each tier is seeded with populate_db, then the queries behind the GUI screens
+are timed through the bank_core repositories and services, without opening a
+window. The start-up time of the command-line entry points is measured too.
+Latencies (p50/p95/p99) and throughput are printed and saved as JSON, and a
+previous result file can be given to flag regressions.
+
+    python benchmark.py                              # tiers 1k and 100k
+    python benchmark.py --tiers 1k 100k 10m --reuse  # keep seeded databases between runs
+    python benchmark.py -o after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import date, datetime
+
+import populate_db
+from bank_core import (AccountRepository, CustomerRepository, DatabaseManager, LedgerError, LedgerService,
+                       TransactionRepository, UserRepository, metrics)
+from bank_core.metrics import percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PAGE_SIZE = 100
+# Fixed so that the seeded data, and therefore the timings, are comparable between runs.
+END_DATE = date(2025, 1, 1)
+# Entry points whose start-up time is measured, as fresh interpreter runs.
+COLD_START = {
+    "import core": ["-c", "from bank_core import DatabaseManager, LedgerService, CustomerRepository"],
+    "aggregates --help": ["-m", "bank_core.aggregates", "--help"],
+    "statements --help": ["-m", "bank_core.statements", "--help"],
+    "import_data.py --help": ["import_data.py", "--help"],
+    "pro_bank_app.py --help": ["pro_bank_app.py", "--help"],
+}
+OPERATIONS = ("customer_list", "customer_search", "account_lookup", "account_list",
+              "transaction_list", "transaction_posting", "transfer", "transfer_batch", "customer_portal", "login")
+# Transfers per transfer_batch operation, i.e. per commit.
+TRANSFER_BATCH = 1000
+
+def seed_database(path, tier, seed, workers, reuse):
+    if reuse and os.path.exists(path):
+        print(f"  reusing {path}")
+        return
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    conn = populate_db.populate(path, tier, seed, workers, END_DATE, report=lambda msg: print(f"  {msg}"))
+    conn.close()
+
+def table_sizes(db):
+    with db.session() as conn:
+        return {table: conn.execute(f"SELECT MAX(id) FROM {table}").fetchone()[0] or 0
+                for table in ("customers", "accounts", "transactions")}
+
+def operations(db, sizes, rng):
+    """Name -> callable for each timed operation; inputs are drawn from ``rng``."""
+    users = UserRepository(db)
+    customers = CustomerRepository(db)
+    accounts = AccountRepository(db)
+    transactions = TransactionRepository(db)
+    customer_pager = customers.pager()
+    account_pager = accounts.pager()
+    transaction_pager = transactions.pager()
+    ledger = LedgerService(db)
+    with db.session() as conn:
+        logins = conn.execute("SELECT username, password FROM users WHERE role='customer' "
+                              "ORDER BY id LIMIT 10000").fetchall()
+        names = [row[0] for row in conn.execute("SELECT name FROM customers ORDER BY id LIMIT 10000")]
+
+    def customer_id():
+        return rng.randint(1, sizes["customers"])
+
+    def account_id():
+        return rng.randint(1, sizes["accounts"])
+
+    def customer_list():
+        # First screen plus one page further down, as when the user scrolls.
+        customer_pager.first_page(PAGE_SIZE)
+        customer_pager.page_after((customer_id(),), PAGE_SIZE)
+
+    def customer_search():
+        customers.search_pager(rng.choice(names)[:3]).first_page(PAGE_SIZE)
+
+    def account_lookup():
+        accounts.for_customer(customer_id())
+
+    def account_list():
+        account_pager.page_after((account_id(),), PAGE_SIZE)
+
+    def transaction_list():
+        transaction_pager.first_page(PAGE_SIZE)
+
+    def transaction_posting():
+        ledger.post(account_id(), "deposit", round(rng.uniform(20, 1500), 2))
+
+    def transfer():
+        # Small amounts, so that few transfers bounce; a rejected one still costs its transaction.
+        try:
+            ledger.transfer(account_id(), account_id(), round(rng.uniform(1, 50), 2), END_DATE.isoformat())
+        except LedgerError:
+            pass
+
+    def transfer_batch():
+        ledger.transfer_many([(account_id(), account_id(), round(rng.uniform(1, 50), 2), END_DATE.isoformat())
+                              for _ in range(TRANSFER_BATCH)])
+
+    def customer_portal():
+        # What CustomerInterface loads: the account cards and the first page
+        # of the first account's history.
+        summaries = accounts.summaries(customer_id())
+        if summaries:
+            transactions.account_pager(summaries[0][0]).first_page(PAGE_SIZE)
+
+    def login():
+        users.authenticate(*rng.choice(logins))
+
+    return {
+        "customer_list": customer_list,
+        "customer_search": customer_search,
+        "account_lookup": account_lookup,
+        "account_list": account_list,
+        "transaction_list": transaction_list,
+        "transaction_posting": transaction_posting,
+        "transfer": transfer,
+        "transfer_batch": transfer_batch,
+        "customer_portal": customer_portal,
+        "login": login,
+    }
+
+def measure(fn, iterations, warmup):
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "ops_per_s": iterations / elapsed if elapsed else 0,
+    }
+
+def run_tier(tier, args):
+    path = os.path.join(args.dir, f"bench_{tier}.db")
+    print(f"Tier {tier}:")
+    started = time.perf_counter()
+    seed_database(path, tier, args.seed, args.workers, args.reuse)
+    seed_seconds = time.perf_counter() - started
+
+    db = DatabaseManager(path)
+    try:
+        sizes = table_sizes(db)
+        ops = operations(db, sizes, random.Random(args.seed))
+        selected = args.only or OPERATIONS
+        results = {}
+        for name in selected:
+            results[name] = measure(ops[name], args.iterations, args.warmup)
+            r = results[name]
+            if name == "transfer_batch":
+                r["transfers_per_s"] = r["ops_per_s"] * TRANSFER_BATCH
+            print(f"  {name:<20} p50 {r['p50_ms']:8.3f} ms  p95 {r['p95_ms']:8.3f} ms  "
+                  f"p99 {r['p99_ms']:8.3f} ms  {r['ops_per_s']:10,.0f} ops/s"
+                  + (f"  ({r['transfers_per_s']:,.0f} transfers/s)" if "transfers_per_s" in r else ""))
+    finally:
+        db.close()
+    return {"rows": sizes, "seed_seconds": seed_seconds, "operations": results}
+
+def measure_cold_start(runs):
+    """Wall time of fresh interpreter runs of each entry point, plus whether the core pulls in tkinter."""
+    results = {}
+    for name, command in COLD_START.items():
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, *command], check=True, stdout=subprocess.DEVNULL, cwd=HERE)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        results[name] = {"p50_ms": percentile(timings, 50) * 1000, "max_ms": timings[-1] * 1000}
+        print(f"  {name:<24} p50 {results[name]['p50_ms']:8.1f} ms")
+    check = subprocess.run([sys.executable, "-c", "import sys, bank_core.ledger, bank_core.repositories, "
+                            "bank_core.statements; print('tkinter' in sys.modules)"], check=True, capture_output=True, text=True, cwd=HERE)
+    results["core_imports_tkinter"] = check.stdout.strip() == "True"
+    if results["core_imports_tkinter"]:
+        print("  WARNING: importing bank_core loads tkinter")
+    return results
+
+def compare(results, baseline, threshold):
+    """Prints p95 changes against a baseline run and returns the regressions."""
+    regressions = []
+    for tier, tier_results in results["tiers"].items():
+        before = baseline.get("tiers", {}).get(tier, {}).get("operations", {})
+        for name, r in tier_results["operations"].items():
+            if name not in before or not before[name]["p95_ms"]:
+                continue
+            ratio = r["p95_ms"] / before[name]["p95_ms"]
+            flag = ""
+            if ratio > 1 + threshold:
+                regressions.append((tier, name, ratio))
+                flag = "  REGRESSION"
+            print(f"  {tier:<5} {name:<20} p95 {before[name]['p95_ms']:8.3f} -> {r['p95_ms']:8.3f} ms "
+                  f"({ratio:5.2f}x){flag}")
+    for name, r in results.get("cold_start", {}).items():
+        before = baseline.get("cold_start", {}).get(name)
+        if not isinstance(r, dict) or not before:
+            continue
+        ratio = r["p50_ms"] / before["p50_ms"]
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(("cold start", name, ratio))
+            flag = "  REGRESSION"
+        print(f"  {'start':<5} {name:<24} p50 {before['p50_ms']:8.1f} -> {r['p50_ms']:8.1f} ms ({ratio:5.2f}x){flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the bank data layer without a display.")
+    parser.add_argument("--tiers", nargs="+", choices=populate_db.TIERS, default=["1k", "100k"])
+    parser.add_argument("--only", nargs="+", choices=OPERATIONS, help="operations to run (default: all)")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=0, help="processes used to seed the databases")
+    parser.add_argument("--dir", default="benchmarks", help="where the seeded databases are kept")
+    parser.add_argument("--reuse", action="store_true", help="reuse seeded databases from an earlier run")
+    parser.add_argument("-o", "--output", help="result file (default: benchmarks/results-<time>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="p95 slowdown reported as a regression (default: 0.2 = 20%%)")
+    parser.add_argument("--cold-start-runs", type=int, default=10,
+                        help="interpreter launches per entry point (0 = skip)")
+    parser.add_argument("--metrics", help="also write the SQL query metrics (.json or Prometheus text)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.dir, exist_ok=True)
+    results = {
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "iterations": args.iterations,
+        "tiers": {},
+    }
+    if args.cold_start_runs:
+        print("Cold start:")
+        results["cold_start"] = measure_cold_start(args.cold_start_runs)
+    for tier in args.tiers:
+        results["tiers"][tier] = run_tier(tier, args)
+
+    output = args.output or os.path.join(args.dir, f"results-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+    if args.metrics:
+        metrics.REGISTRY.export(args.metrics)
+        print(f"Query metrics written to {args.metrics}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.compare}:")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} operation(s) slower than the baseline by more than {args.threshold:.0%}.")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
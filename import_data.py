@@ -0,0 +1,270 @@
+"""Bulk import of customers, accounts or transactions from CSV or JSONL files.
+
+Rows are streamed through a generator pipeline (read -> validate -> chunk ->
+insert), so memory use does not grow with the file size. Valid rows are written
+with executemany in chunks, committing every few chunks; invalid rows go to a
+JSONL reject file together with the reason.
+
+    python import_data.py customers customers.csv
+    python import_data.py accounts accounts.jsonl --rejects bad_accounts.jsonl
+    python import_data.py transactions ledger.csv --chunk-size 10000
+
+An optional "id" field is kept, so accounts and transactions can refer to rows
+imported earlier. Imported transactions also move the account balances and the
+summary tables. Like a posting, a withdrawal the account cannot cover at that
+point of the file is rejected.
+"""
+import argparse
+import csv
+import json
+import sqlite3
+from collections import defaultdict
+from datetime import date
+
+from bank_core import DEFAULT_DB, DatabaseManager, LedgerService, Validator, aggregates
+from bank_core.batch import Progress, RejectFile, chunks
+
+class RejectedRow(Exception):
+    pass
+
+def read_records(path, fmt=None):
+    """Yields (line_number, record dict) from a CSV or JSONL file."""
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".json")) else "csv")
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            for line_no, record in enumerate(csv.DictReader(f), start=2):
+                yield line_no, record
+        else:
+            for line_no, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield line_no, json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield line_no, {"_error": f"Invalid JSON: {e}"}
+
+def _text(record, field):
+    value = record.get(field)
+    return "" if value is None else str(value).strip()
+
+def _optional_id(record):
+    value = _text(record, "id")
+    if not value:
+        return None
+    if not value.isdigit():
+        raise RejectedRow(f"Invalid id: {value}")
+    return int(value)
+
+def _required_id(record, field):
+    value = _text(record, field)
+    if not value.isdigit():
+        raise RejectedRow(f"Invalid {field}: {value or 'missing'}")
+    return int(value)
+
+def parse_customer(record):
+    name, email, phone = _text(record, "name"), _text(record, "email"), _text(record, "phone")
+    if not name:
+        raise RejectedRow("Name is required.")
+    if not Validator.is_valid_email(email):
+        raise RejectedRow("Invalid email format.")
+    if not Validator.is_valid_phone(phone):
+        raise RejectedRow("Invalid phone format.")
+    return (_optional_id(record), name, email, phone)
+
+def parse_account(record):
+    acc_type = _text(record, "account_type")
+    balance = _text(record, "balance") or "0"
+    if not acc_type:
+        raise RejectedRow("Account Type is required.")
+    if not Validator.is_valid_amount(balance):
+        raise RejectedRow("Invalid balance amount.")
+    return (_optional_id(record), _required_id(record, "customer_id"), acc_type, float(balance))
+
+def parse_transaction(record):
+    t_type = _text(record, "type").lower()
+    amount = _text(record, "amount")
+    day = _text(record, "date") or date.today().isoformat()
+    if t_type not in LedgerService.TYPES:
+        raise RejectedRow(f"Unknown transaction type: {t_type or 'missing'}")
+    if not Validator.is_valid_amount(amount) or float(amount) <= 0:
+        raise RejectedRow("Invalid amount. Must be a positive number.")
+    try:
+        day = date.fromisoformat(day).isoformat()
+    except ValueError:
+        raise RejectedRow(f"Invalid date: {day}")
+    return (_optional_id(record), _required_id(record, "account_id"), t_type, float(amount), day)
+
+# kind -> (row parser, INSERT statement, parent table checked for each row or None)
+KINDS = {
+    "customers": (parse_customer,
+                  "INSERT INTO customers (id, name, email, phone) VALUES (?, ?, ?, ?)",
+                  None),
+    "accounts": (parse_account,
+                 "INSERT INTO accounts (id, customer_id, account_type, balance) VALUES (?, ?, ?, ?)",
+                 "customers"),
+    "transactions": (parse_transaction,
+                     "INSERT INTO transactions (id, account_id, type, amount, date) VALUES (?, ?, ?, ?, ?)",
+                     "accounts"),
+}
+
+class Importer:
+    """Runs one import and keeps the counters for the final report."""
+
+    def __init__(self, db, kind, rejects, chunk_size=5000, chunks_per_commit=20):
+        self.db = db
+        self.kind = kind
+        self.parse, self.insert_sql, self.parent_table = KINDS[kind]
+        self.rejects = RejectFile(rejects)
+        self.chunk_size = chunk_size
+        self.chunks_per_commit = chunks_per_commit
+        self.accepted = 0
+
+    @property
+    def rejected(self):
+        return self.rejects.count
+
+    def validated(self, records):
+        """Parses each record, diverting the invalid ones to the reject file."""
+        for line_no, record in records:
+            try:
+                if "_error" in record:
+                    raise RejectedRow(record["_error"])
+                yield line_no, record, self.parse(record)
+            except RejectedRow as e:
+                self.rejects.add(line_no, str(e), record)
+
+    def run(self, records, progress=None):
+        """Loads the records; ``progress`` is called with the number done after each chunk."""
+        conn = self.db.connect()
+        cur = conn.cursor()
+        try:
+            for n, chunk in enumerate(chunks(self.validated(records), self.chunk_size), start=1):
+                self.load_chunk(cur, chunk)
+                self.rejects.flush()
+                if n % self.chunks_per_commit == 0:
+                    conn.commit()
+                if progress:
+                    progress(self.accepted + self.rejected)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self.rejects.flush()
+
+    def load_chunk(self, cur, chunk):
+        if self.parent_table:
+            chunk = self.with_existing_parents(cur, chunk)
+        if self.kind == "transactions":
+            chunk = self.with_funds(cur, chunk)
+        rows = [row for _, _, row in chunk]
+        if not cur.connection.in_transaction:
+            # Otherwise the savepoint would be the outermost transaction and
+            # RELEASE would commit every chunk.
+            cur.execute("BEGIN")
+        try:
+            cur.execute("SAVEPOINT import_chunk")
+            cur.executemany(self.insert_sql, rows)
+            self.update_derived(cur, rows)
+            cur.execute("RELEASE import_chunk")
+            self.accepted += len(rows)
+        except (sqlite3.IntegrityError, RejectedRow):
+            # Some row collides (e.g. a duplicate id), and a deposit skipped
+            # for that may leave a later withdrawal uncovered: retry this
+            # chunk row by row.
+            cur.execute("ROLLBACK TO import_chunk")
+            cur.execute("RELEASE import_chunk")
+            for line_no, record, row in chunk:
+                cur.execute("SAVEPOINT import_row")
+                try:
+                    cur.execute(self.insert_sql, row)
+                    self.update_derived(cur, [row])
+                except (sqlite3.IntegrityError, RejectedRow) as e:
+                    cur.execute("ROLLBACK TO import_row")
+                    self.rejects.add(line_no, str(e), record)
+                else:
+                    self.accepted += 1
+                cur.execute("RELEASE import_row")
+
+    def with_existing_parents(self, cur, chunk):
+        """Drops (and rejects) rows whose customer/account does not exist."""
+        parent_ids = sorted({row[1] for _, _, row in chunk})
+        marks = ",".join("?" * len(parent_ids))
+        cur.execute(f"SELECT id FROM {self.parent_table} WHERE id IN ({marks})", parent_ids)
+        existing = {row[0] for row in cur.fetchall()}
+        kept = []
+        for line_no, record, row in chunk:
+            if row[1] in existing:
+                kept.append((line_no, record, row))
+            else:
+                self.rejects.add(line_no, f"No {self.parent_table[:-1]} found with ID: {row[1]}", record)
+        return kept
+
+    def with_funds(self, cur, chunk):
+        """Drops (and rejects) withdrawals the account cannot cover at that point of the file."""
+        account_ids = sorted({row[1] for _, _, row in chunk})
+        marks = ",".join("?" * len(account_ids))
+        cur.execute(f"SELECT id, balance FROM accounts WHERE id IN ({marks})", account_ids)
+        balances = dict(cur.fetchall())
+        kept = []
+        for line_no, record, row in chunk:
+            _, account_id, t_type, amount, _ = row
+            if t_type == "deposit":
+                balances[account_id] += amount
+            elif balances[account_id] >= amount:
+                balances[account_id] -= amount
+            else:
+                self.rejects.add(line_no, "Insufficient funds for this withdrawal.", record)
+                continue
+            kept.append((line_no, record, row))
+        return kept
+
+    def update_derived(self, cur, rows):
+        """Moves account balances and the summary tables by the imported transactions.
+
+        Raises RejectedRow if that would overdraw an account; the caller then
+        rolls back to its savepoint.
+        """
+        if self.kind != "transactions":
+            return
+        deltas = defaultdict(float)
+        for _, account_id, t_type, amount, _ in rows:
+            deltas[account_id] += amount if t_type == "deposit" else -amount
+        for account_id, delta in deltas.items():
+            cur.execute("UPDATE accounts SET balance = balance + ?1, version = version + 1 "
+                        "WHERE id = ?2 AND balance + ?1 >= 0", (delta, account_id))
+            if cur.rowcount == 0:
+                raise RejectedRow("Insufficient funds for this withdrawal.")
+        aggregates.record_many(cur, [row[1:] for row in rows])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import CSV/JSONL data into the bank database.")
+    parser.add_argument("kind", choices=sorted(KINDS))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="defaults to the file extension")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    parser.add_argument("--rejects", help="reject file (default: <path>.rejects.jsonl)")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--chunks-per-commit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(args.db)
+    rejects_path = args.rejects or args.path + ".rejects.jsonl"
+    progress = Progress("rows")
+
+    with open(rejects_path, "w", encoding="utf-8") as rejects:
+        importer = Importer(db, args.kind, rejects, args.chunk_size, args.chunks_per_commit)
+        try:
+            importer.run(read_records(args.path, args.format), progress)
+        finally:
+            db.close()
+
+    elapsed = progress.elapsed()
+    total = importer.accepted + importer.rejected
+    progress.finish()
+    print(f"Imported {importer.accepted:,} {args.kind}, rejected {importer.rejected:,} "
+          f"in {elapsed:.2f}s ({total / elapsed if elapsed else 0:,.0f} rows/s).")
+    if importer.rejected:
+        print(f"Rejected rows written to {rejects_path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,79 +1,175 @@
-import sqlite3
+"""Fills the bank database with reproducible synthetic data.
+
+    python populate_db.py                      # small demo dataset (1k transactions)
+    python populate_db.py --tier 100k --seed 7
+    python populate_db.py --tier 10m --workers 4 --db bench.db
+
+The same tier, seed and --end-date always produce the same rows, whatever the
+number of workers: every chunk gets its own seed derived from (seed, chunk number).
+Rows are generated lazily chunk by chunk and inserted with executemany, and
+the secondary indexes are dropped during the load and rebuilt afterwards.
+"""
+import argparse
 import random
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
 from faker import Faker
-from datetime import date
 
-fake = Faker()
-DB_NAME = "bank.db"
+from bank_core import DEFAULT_DB, DatabaseManager, aggregates, archive
+
+CHUNK_SIZE = 10_000
+ACCOUNT_TYPES = ['Savings', 'Checking', 'Business']
+HISTORY_DAYS = 730
+
+# tier -> (customers, transactions); accounts follow at 1-3 per customer.
+TIERS = {
+    "1k": (50, 1_000),
+    "100k": (2_500, 100_000),
+    "10m": (250_000, 10_000_000),
+}
+
+_fake = None
 
 def clear_data(conn):
+    # Archived years would otherwise come back in the rebuilt summaries and
+    # clash with the new transaction ids.
+    archive.delete_archives(conn.execute("PRAGMA database_list").fetchone()[2])
     cur = conn.cursor()
+    # Rows that refer to transactions or periods of the old data.
+    for table in ("transfers", "alerts", "job_state", "accrual_runs"):
+        cur.execute(f"DELETE FROM {table}")
     cur.execute("DELETE FROM transactions")
     cur.execute("DELETE FROM accounts")
     cur.execute("DELETE FROM customers")
     cur.execute("DELETE FROM users WHERE role != 'admin'")
+    # Restart ids at 1 so that a seed always yields the same ids.
+    cur.execute("DELETE FROM sqlite_sequence WHERE name IN ('customers', 'accounts', 'transactions', 'transfers', 'alerts')")
     conn.commit()
 
-def create_customers(cur, n=50):
-    customers = []
-    for _ in range(n):
-        name = fake.name()
-        email = fake.email()
-        phone = fake.phone_number()
-        customers.append((name, email, phone))
-    cur.executemany("INSERT INTO customers (name, email, phone) VALUES (?, ?, ?)", customers)
-    cur.execute("SELECT id FROM customers")
-    return [row[0] for row in cur.fetchall()]
-
-def create_users_for_customers(cur, customer_ids):
-    users = []
-    for cust_id in customer_ids:
-        cur.execute("SELECT name FROM customers WHERE id = ?", (cust_id,))
-        customer_name = cur.fetchone()[0]
-        username = customer_name.lower().replace(" ", "") + str(cust_id)
-        password = "password123"
-        role = "customer"
-        users.append((username, password, role, cust_id))
-    cur.executemany("INSERT INTO users (username, password, role, customer_id) VALUES (?, ?, ?, ?)", users)
-
-def create_accounts(cur, customer_ids, min_acc=1, max_acc=3):
-    accounts = []
-    for cust_id in customer_ids:
-        for _ in range(random.randint(min_acc, max_acc)):
-            acc_type = random.choice(['Savings', 'Checking', 'Business'])
-            balance = round(random.uniform(500, 75000), 2)
-            accounts.append((cust_id, acc_type, balance))
-    cur.executemany("INSERT INTO accounts (customer_id, account_type, balance) VALUES (?, ?, ?)", accounts)
-    cur.execute("SELECT id FROM accounts")
-    return [row[0] for row in cur.fetchall()]
-
-def create_transactions(cur, account_ids, min_trans=5, max_trans=30):
-    transactions = []
-    for acc_id in account_ids:
-        for _ in range(random.randint(min_trans, max_trans)):
-            trans_type = random.choice(['deposit', 'withdraw'])
-            amount = round(random.uniform(20, 1500), 2)
-            trans_date = fake.date_between(start_date='-2y', end_date='today').isoformat()
-            transactions.append((acc_id, trans_type, amount, trans_date))
-    cur.executemany("INSERT INTO transactions (account_id, type, amount, date) VALUES (?, ?, ?, ?)", transactions)
-
-def main():
+def chunk_rng(seed, chunk):
+    return random.Random(seed * 1_000_003 + chunk)
+
+def fake_customers(seed, chunk, first_id, count):
+    """Generates one chunk of customer rows; runs in a worker process when --workers is set."""
+    global _fake
+    if _fake is None:
+        _fake = Faker()
+    _fake.seed_instance(seed * 1_000_003 + chunk)
+    return [(first_id + i, _fake.name(), _fake.email(), _fake.phone_number()) for i in range(count)]
+
+def customer_chunks(n, seed, workers=0):
+    """Yields chunks of (id, name, email, phone) for customers 1..n."""
+    jobs = [(seed, chunk, start + 1, min(CHUNK_SIZE, n - start))
+            for chunk, start in enumerate(range(0, n, CHUNK_SIZE))]
+    if workers:
+        with ProcessPoolExecutor(workers) as pool:
+            yield from pool.map(fake_customers, *zip(*jobs))
+    else:
+        for job in jobs:
+            yield fake_customers(*job)
+
+def user_rows(customers):
+    return [(name.lower().replace(" ", "") + str(cust_id), "password123", "customer", cust_id)
+            for cust_id, name, _, _ in customers]
+
+def account_rows(customers, seed, first_id, min_acc=1, max_acc=3):
+    rng = chunk_rng(seed, first_id)
+    rows = []
+    for cust_id, *_ in customers:
+        for _ in range(rng.randint(min_acc, max_acc)):
+            rows.append((first_id + len(rows), cust_id, rng.choice(ACCOUNT_TYPES), round(rng.uniform(500, 75000), 2)))
+    return rows
+
+def transaction_chunks(n, n_accounts, seed, end_date):
+    """Yields chunks of (account_id, type, amount, date) over the two years up to end_date."""
+    start = end_date - timedelta(days=HISTORY_DAYS)
+    days = [(start + timedelta(days=d)).isoformat() for d in range(HISTORY_DAYS + 1)]
+    for chunk, first in enumerate(range(0, n, CHUNK_SIZE)):
+        rng = chunk_rng(seed, -1 - chunk)
+        yield [(rng.randint(1, n_accounts),
+                rng.choice(('deposit', 'withdraw')),
+                round(rng.uniform(20, 1500), 2),
+                rng.choice(days))
+               for _ in range(min(CHUNK_SIZE, n - first))]
+
+def drop_indexes(cur):
+    """Drops the secondary indexes and returns their SQL so they can be rebuilt."""
+    cur.execute("SELECT name, sql FROM sqlite_master WHERE type='index' AND sql IS NOT NULL "
+                "AND tbl_name IN ('customers', 'accounts', 'transactions', 'users')")
+    indexes = cur.fetchall()
+    for name, _ in indexes:
+        cur.execute(f"DROP INDEX {name}")
+    return [sql for _, sql in indexes]
+
+def populate(db_name, tier, seed, workers=0, end_date=None, report=print):
+    n_customers, n_transactions = TIERS[tier]
+    DatabaseManager(db_name, pooled=False)  # makes sure the schema is current
+    conn = sqlite3.connect(db_name)
+    conn.execute("PRAGMA synchronous=OFF")
+    cur = conn.cursor()
+    started = time.perf_counter()
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cur = conn.cursor()
         clear_data(conn)
-        customer_ids = create_customers(cur, n=50)
-        create_users_for_customers(cur, customer_ids)
-        account_ids = create_accounts(cur, customer_ids)
-        create_transactions(cur, account_ids)
+        index_sql = drop_indexes(cur)
+
+        n_accounts = 0
+        for customers in customer_chunks(n_customers, seed, workers):
+            cur.executemany("INSERT INTO customers (id, name, email, phone) VALUES (?, ?, ?, ?)", customers)
+            cur.executemany("INSERT INTO users (username, password, role, customer_id) VALUES (?, ?, ?, ?)",
+                            user_rows(customers))
+            accounts = account_rows(customers, seed, n_accounts + 1)
+            cur.executemany("INSERT INTO accounts (id, customer_id, account_type, balance) VALUES (?, ?, ?, ?)",
+                            accounts)
+            n_accounts += len(accounts)
+        conn.commit()
+        report(f"{n_customers:,} customers, {n_accounts:,} accounts ({time.perf_counter() - started:.1f}s)")
+
+        loaded = 0
+        for transactions in transaction_chunks(n_transactions, n_accounts, seed, end_date or date.today()):
+            cur.executemany("INSERT INTO transactions (account_id, type, amount, date) VALUES (?, ?, ?, ?)",
+                            transactions)
+            loaded += len(transactions)
+            if loaded % (20 * CHUNK_SIZE) == 0:
+                conn.commit()
+        conn.commit()
+        report(f"{loaded:,} transactions ({time.perf_counter() - started:.1f}s)")
+
+        for sql in index_sql:
+            cur.execute(sql)
         conn.commit()
+        aggregates.rebuild(conn)
+        cur.execute("ANALYZE")
+        conn.commit()
+        report(f"Indexes and summaries rebuilt ({time.perf_counter() - started:.1f}s)")
+        return conn
+    except BaseException:
+        conn.rollback()
+        conn.close()
+        raise
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Populate the bank database with synthetic data.")
+    parser.add_argument("--tier", choices=TIERS, default="1k", help="number of transactions to generate")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=0, help="processes generating Faker columns (0 = none)")
+    parser.add_argument("--end-date", type=date.fromisoformat, help="last transaction date (default: today)")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    args = parser.parse_args(argv)
+
+    conn = None
+    try:
+        conn = populate(args.db, args.tier, args.seed, args.workers, args.end_date)
+        cur = conn.cursor()
         print("Database populated successfully.")
         print("Default Admin Login: admin / admin")
         cur.execute("""
-            SELECT u.username, u.password, c.name, u.customer_id 
-            FROM users u 
-            JOIN customers c ON u.customer_id = c.id 
-            WHERE u.role='customer' 
+            SELECT u.username, u.password, c.name, u.customer_id
+            FROM users u
+            JOIN customers c ON u.customer_id = c.id
+            WHERE u.role='customer'
             LIMIT 10
         """)
         sample_logins = cur.fetchall()
@@ -81,7 +177,6 @@ def main():
             print(f"{username} / {password} -> {name} (Customer ID: {cust_id})")
     except sqlite3.Error as e:
         print(f"Error: {e}")
-        conn.rollback()
     finally:
         if conn:
             conn.close()
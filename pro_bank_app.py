@@ -1,8 +1,20 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import sqlite3
+from tkinter import ttk, messagebox, filedialog
+import bisect
+import collections
+import concurrent.futures
+import contextlib
+import itertools
+import logging
+import queue
+import time
 from datetime import date
-import re  
+
+from bank_core import (AccountRepository, CustomerRepository, DatabaseManager, LedgerError, LedgerService,
+                       TransactionRepository, TransferRepository, UpdateConflict, UserRepository, Validator,
+                       metrics, statements)
+
+log = logging.getLogger("bank")
 
 BG_COLOR = "#F0F4F8"       
 FRAME_COLOR = "#FFFFFF"    
@@ -57,6 +69,11 @@ def setup_styles():
     style.map("Danger.TButton",
         background=[('active', "#FF4136"), ('!disabled', ALERT_COLOR)])
 
+    style.configure("Card.TFrame", background=FRAME_COLOR, relief="solid", borderwidth=1, padding=10)
+    style.configure("SelectedCard.TFrame", background=FRAME_COLOR, relief="solid", borderwidth=3,
+        bordercolor=PRIMARY_COLOR, padding=8)
+    style.configure("Balance.TLabel", foreground=PRIMARY_COLOR, font=(FONT_NAME, FONT_LARGE, "bold"))
+
     style.configure("TEntry", 
         fieldbackground=ENTRY_BG, 
         foreground=TEXT_COLOR,
@@ -99,98 +116,146 @@ def setup_styles():
         ]})
     ])
 
-class Validator:
-    @staticmethod
-    def is_valid_email(email):
-        """Simple regex for email validation."""
-        if not email: return True 
-        pattern = r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)"
-        return re.match(pattern, email)
-
-    @staticmethod
-    def is_valid_phone(phone):
-        """Simple regex for phone validation (10-15 digits, optional +)."""
-        if not phone: return True 
-        pattern = r"^\+?[0-9\s.-]{10,15}$"
-        return re.match(pattern, phone)
-
-    @staticmethod
-    def is_valid_amount(amount_str):
-        """Checks if a string is a valid positive float."""
+class QueryExecutor:
+    """Runs database work on a thread pool and hands the results back to Tk.
+
+    Worker threads never touch widgets: finished calls are queued and an
+    ``after()`` loop on the Tk thread passes them to their callbacks. Every call
+    is submitted for an owner widget under a key. Submitting again under the
+    same key, or calling ``cancel()``, makes the earlier call stale and its
+    result is dropped. Owners get ``<<QueryBusy>>`` and ``<<QueryIdle>>``
+    virtual events while they have calls in flight.
+    """
+
+    def __init__(self, root, workers=4, poll_ms=25):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._pool = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="db-worker")
+        self._done = queue.Queue()
+        self._latest = {}
+        self._pending = collections.Counter()
+        self._tickets = itertools.count()
+        self._closed = False
+        root.after(poll_ms, self._poll)
+
+    @classmethod
+    def of(cls, widget):
+        """Returns the executor shared by every widget in the widget's window."""
+        root = widget.winfo_toplevel()
+        if getattr(root, "query_executor", None) is None:
+            root.query_executor = cls(root)
+        return root.query_executor
+
+    def submit(self, owner, key, fn, *args, on_success=None, on_error=None):
+        """Runs ``fn(*args)`` on a worker; the callbacks run on the Tk thread."""
+        ticket = next(self._tickets)
+        future = self._pool.submit(fn, *args)
+        self._latest[(owner, key)] = (ticket, future)
+        self._set_pending(owner, 1)
+        future.add_done_callback(
+            lambda f: self._done.put((owner, key, ticket, f, on_success, on_error)))
+        return future
+
+    def cancel(self, owner, key=None):
+        """Drops the owner's outstanding calls (only those under ``key`` if given)."""
+        for owner_key in [k for k in self._latest if k[0] is owner and key in (None, k[1])]:
+            _, future = self._latest.pop(owner_key)
+            future.cancel()
+
+    def is_pending(self, owner, key):
+        return (owner, key) in self._latest
+
+    def shutdown(self):
+        self._closed = True
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def _set_pending(self, owner, delta):
+        self._pending[owner] += delta
+        count = self._pending[owner]
+        if count <= 0:
+            del self._pending[owner]
+        if count in (0, 1) and (delta > 0) == (count == 1):
+            with contextlib.suppress(tk.TclError):
+                if owner.winfo_exists():
+                    owner.event_generate("<<QueryBusy>>" if count else "<<QueryIdle>>", when="tail")
+
+    def _poll(self):
+        while True:
+            try:
+                owner, key, ticket, future, on_success, on_error = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._set_pending(owner, -1)
+            latest = self._latest.get((owner, key))
+            if latest is None or latest[0] != ticket or future.cancelled():
+                continue
+            del self._latest[(owner, key)]
+            self._deliver(owner, future, on_success, on_error)
+        if not self._closed:
+            self.root.after(self.poll_ms, self._poll)
+
+    def _deliver(self, owner, future, on_success, on_error):
         try:
-            amount = float(amount_str)
-            return amount >= 0
-        except ValueError:
-            return False
-
-class DatabaseManager:
-    """Handles all database operations for customers, accounts, and transactions."""
-
-    def __init__(self, db_name="bank.db"):
-        self.db_name = db_name
-        self.create_tables()
-
-    def connect(self):
-        return sqlite3.connect(self.db_name)
-
-    def create_tables(self):
-        conn = self.connect()
-        cur = conn.cursor()
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS customers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                email TEXT,
-                phone TEXT
-            )
-        """)
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS accounts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                customer_id INTEGER,
-                account_type TEXT,
-                balance REAL DEFAULT 0,
-                FOREIGN KEY (customer_id) REFERENCES customers(id) ON DELETE CASCADE
-            )
-        """)
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                account_id INTEGER,
-                type TEXT,
-                amount REAL,
-                date TEXT,
-                FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE
-            )
-        """)
-        
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                role TEXT NOT NULL DEFAULT 'customer',
-                customer_id INTEGER,
-                FOREIGN KEY (customer_id) REFERENCES customers(id)
-            )
-        """)
-        
-        cur.execute("INSERT OR IGNORE INTO users (username, password, role) VALUES ('admin', 'admin', 'admin')")
-        cur.execute("INSERT OR IGNORE INTO users (username, password, role, customer_id) VALUES ('user', 'user', 'customer', 1)")
-
-        conn.commit()
-        conn.close()
+            if not owner.winfo_exists():
+                return
+            error = future.exception()
+            if error is None:
+                if on_success:
+                    on_success(future.result())
+            elif on_error:
+                on_error(error)
+            else:
+                raise error
+        except Exception as e:
+            self.root.report_callback_exception(type(e), e, e.__traceback__)
 
 class BaseApp(ttk.Frame):
     """Reusable GUI structure for all sections."""
     def __init__(self, master, db):
         super().__init__(master, style="TFrame")
         self.db = db
+        self.executor = QueryExecutor.of(self)
         self.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
+        self.loading_label = ttk.Label(self, text="Loading…")
+        self.bind("<<QueryBusy>>", lambda e: self.loading_label.place(relx=1.0, y=0, anchor=tk.NE))
+        self.bind("<<QueryIdle>>", lambda e: self.loading_label.place_forget())
+
+    def run_query(self, fn, *args, on_success=None, on_error=None):
+        """Runs a database read in the background; errors are shown in a message box by default.
+
+        A newer call of the same ``fn`` replaces one still in flight, whose result is dropped.
+        """
+        return self.executor.submit(self, fn, fn, *args, on_success=on_success,
+                                    on_error=on_error or self.show_error)
+
+    def run_write(self, fn, *args, on_success=None, on_error=None):
+        """Like run_query, for changes: every call gets its own key, so each one's
+        outcome is reported even if the user saves again before it finishes."""
+        return self.executor.submit(self, object(), fn, *args, on_success=on_success,
+                                    on_error=on_error or self.show_error)
+
+    def show_error(self, error):
+        if isinstance(error, UpdateConflict):
+            messagebox.showwarning("Record Changed", str(error))
+            self.reload_row(error.record_id)
+        else:
+            messagebox.showerror("Error", str(error))
+
+    def reload_row(self, row_id):
+        """Shows the current version of a row after a conflicting edit."""
+        self.refresh()
+
+    def on_saved(self, message):
+        """Common follow-up after a successful add/update/delete."""
+        self.refresh()
+        self.clear_entries(self.entries)
+        messagebox.showinfo("Success", message)
+
+    def cancel_loading(self):
+        """Drops this tab's outstanding reads, e.g. when the user switches away."""
+        self.executor.cancel(self.grid_view)
+
     def clear_entries(self, entries):
         """Clear all entry widgets."""
         for entry in entries:
@@ -200,9 +265,208 @@ class BaseApp(ttk.Frame):
         """Binds the <Return> key on an entry to a submit function."""
         entry.bind("<Return>", lambda event: submit_func())
 
+class VirtualTreeview(ttk.Frame):
+    """Treeview that loads rows page by page as the user scrolls.
+
+    Only a bounded window of ``max_rows`` rows is kept in the widget: pages are
+    appended at the bottom when scrolling down and the rows that fall off the
+    top are dropped (and vice versa when scrolling back up).
+
+    ``refresh()`` brings the window up to date incrementally: it does nothing when
+    the database has not changed, otherwise it merges in rows added since the last
+    seen id and re-reads only the rows currently on screen.
+
+    All queries run on the QueryExecutor, so scrolling never blocks the UI.
+    """
+
+    def __init__(self, master, pager, page_size=100, max_rows=500, view_name=None, hidden_columns=()):
+        super().__init__(master)
+        self.pager = pager
+        self.page_size = page_size
+        self.max_rows = max(max_rows, 2 * page_size)
+        self.executor = QueryExecutor.of(self)
+        self._keys = {}
+        self._has_before = False
+        self._has_after = False
+        self._token = None
+        self._watermark = 0
+        self.view_name = view_name or type(master).__name__
+
+        cols = pager.columns
+        self.tree = ttk.Treeview(self, columns=cols, show="headings",
+                                 displaycolumns=[col for col in cols if col not in hidden_columns])
+        s = ttk.Style()
+        s.configure("Treeview.Heading", anchor="center")
+        for col in cols:
+            self.tree.heading(col, text=col.capitalize())
+            self.tree.column(col, anchor=tk.CENTER)
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.loading_label = ttk.Label(self, text="Loading…")
+        self.bind("<<QueryBusy>>", lambda e: self.loading_label.place(relx=0.5, rely=1.0, anchor=tk.S))
+        self.bind("<<QueryIdle>>", lambda e: self.loading_label.place_forget())
+
+    def set_pager(self, pager):
+        """Switches the grid to another row source, e.g. search results."""
+        self.pager = pager
+        self._token = None
+        self.reload()
+
+    def reload(self):
+        """Drops the current window and shows the first page again."""
+        self.executor.cancel(self)
+        requested = time.perf_counter()
+        self.executor.submit(self, "load", self._load_first,
+                             on_success=lambda result: self._show_first(result, requested),
+                             on_error=self._show_error)
+
+    def _load_first(self):
+        token = self.pager.db.change_token()
+        return token, self.pager.max_id(), self.pager.first_page(self.page_size)
+
+    def _show_first(self, result, requested):
+        self._token, self._watermark, rows = result
+        with metrics.REGISTRY.timer("bank_ui_render_seconds", view=self.view_name):
+            self.tree.delete(*self.tree.get_children())
+            self._keys.clear()
+            self._insert(rows, tk.END)
+            self._has_before = False
+            self._has_after = len(rows) == self.page_size
+            self.tree.yview_moveto(0)
+            self.tree.update_idletasks()
+        # From the request to rows on screen: query, queueing and rendering.
+        metrics.REGISTRY.observe("bank_ui_load_seconds", time.perf_counter() - requested, view=self.view_name)
+
+    def refresh(self):
+        """Applies changes made since the last load, if there were any."""
+        if self.executor.is_pending(self, "load") and self._token is None:
+            return  # the first load is still on its way
+        ids = [int(iid) for iid in self.tree.get_children()]
+        requested = time.perf_counter()
+        self.executor.submit(self, "refresh", self._load_changes, self._token, self._watermark, ids,
+                             on_success=lambda result: self._apply_changes(result, requested),
+                             on_error=self._show_error)
+
+    def _load_changes(self, token, watermark, ids):
+        current = self.pager.db.change_token()
+        if current == token:
+            return None
+        new_rows = self.pager.rows_since(watermark, self.max_rows)
+        return current, new_rows, self.pager.rows_by_id(ids), ids
+
+    def _apply_changes(self, result, requested):
+        if result is not None:
+            with metrics.REGISTRY.timer("bank_ui_render_seconds", view=self.view_name):
+                self._merge_changes(*result)
+                self.tree.update_idletasks()
+        metrics.REGISTRY.observe("bank_ui_refresh_seconds", time.perf_counter() - requested, view=self.view_name)
+
+    def _merge_changes(self, token, new_rows, current, ids):
+        if len(new_rows) == self.max_rows:
+            # Too much changed to merge row by row.
+            self.reload()
+            return
+        self._token = token
+        if new_rows:
+            self._watermark = max(self._watermark, new_rows[-1][self.pager.id_index])
+
+        for row_id in ids:
+            iid = str(row_id)
+            if not self.tree.exists(iid):
+                continue
+            row = current.get(row_id)
+            if row is None:
+                self._delete([iid])
+            else:
+                self.tree.item(iid, values=row)
+                self._keys[iid] = self.pager.key_of(row)
+
+        for row in new_rows:
+            self._merge(row)
+        children = self.tree.get_children()
+        if len(children) > self.max_rows:
+            self._delete(children[self.max_rows:])
+            self._has_after = True
+
+    def _merge(self, row):
+        """Inserts a new row at its sort position if it falls inside the window."""
+        iid = str(row[self.pager.id_index])
+        if self.tree.exists(iid):
+            return
+        key = self.pager.key_of(row)
+        keys = [self._keys[child] for child in self.tree.get_children()]
+        if self.pager.descending:
+            index = len(keys) - bisect.bisect_right(keys[::-1], key)
+        else:
+            index = bisect.bisect_left(keys, key)
+        if index == 0 and keys and self._has_before:
+            return
+        if index == len(keys) and self._has_after:
+            return
+        self.tree.insert("", index, iid=iid, values=row)
+        self._keys[iid] = key
+
+    def _insert(self, rows, index):
+        for row in (rows if index == tk.END else reversed(rows)):
+            iid = self.tree.insert("", index, iid=str(row[self.pager.id_index]), values=row)
+            self._keys[iid] = self.pager.key_of(row)
+
+    def _delete(self, iids):
+        self.tree.delete(*iids)
+        for iid in iids:
+            del self._keys[iid]
+
+    def _show_error(self, error):
+        messagebox.showerror("Error", f"Could not load data: {error}")
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        first, last = float(first), float(last)
+        wants_after = self._has_after and last > 0.9
+        wants_before = self._has_before and first < 0.1
+        if (wants_after or wants_before) and not self.executor.is_pending(self, "load"):
+            # yscrollcommand fires while Tk is laying out the tree; defer the query.
+            self.after_idle(self._fetch_more, wants_after)
+
+    def _fetch_more(self, forward):
+        children = self.tree.get_children()
+        if not children or self.executor.is_pending(self, "load"):
+            return
+        anchor = children[-1] if forward else children[0]
+        fetch = self.pager.page_after if forward else self.pager.page_before
+        self.executor.submit(self, "load", fetch, self._keys[anchor], self.page_size,
+                             on_success=lambda rows: self._show_page(rows, anchor, forward),
+                             on_error=self._show_error)
+
+    def _show_page(self, rows, anchor, forward):
+        if not self.tree.exists(anchor):
+            return  # the window was reloaded meanwhile
+        children = self.tree.get_children()
+        if forward:
+            self._has_after = len(rows) == self.page_size
+            self._insert(rows, tk.END)
+            excess = len(children) + len(rows) - self.max_rows
+            if excess > 0:
+                self._delete(children[:excess])
+                self._has_before = True
+        else:
+            self._has_before = len(rows) == self.page_size
+            self._insert(rows, 0)
+            excess = len(children) + len(rows) - self.max_rows
+            if excess > 0:
+                self._delete(children[-excess:])
+                self._has_after = True
+        # Keep the row the user was looking at in view after the window shifted.
+        self.tree.see(anchor)
+
 class CustomersApp(BaseApp):
     def __init__(self, master, db):
         super().__init__(master, db)
+        self.customers = CustomerRepository(db)
         self.create_form()
         self.create_buttons()
         self.create_table()
@@ -235,27 +499,40 @@ class CustomersApp(BaseApp):
         ttk.Button(btn_frame, text="Clear Fields", command=lambda: self.clear_entries(self.entries)).pack(side=tk.LEFT, padx=5)
 
     def create_table(self):
-        cols = ("id", "name", "email", "phone")
-        self.tree = ttk.Treeview(self, columns=cols, show="headings")
-        
-        s = ttk.Style()
-        s.configure("Treeview.Heading", anchor="center")
-
-        for col in cols:
-            self.tree.heading(col, text=col.capitalize())
-            self.tree.column(col, anchor=tk.CENTER) 
-            
-        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        search_frame = ttk.Frame(self)
+        search_frame.pack(fill=tk.X, padx=10)
+        ttk.Label(search_frame, text="Search").pack(side=tk.LEFT, padx=5, pady=5)
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=40)
+        search_entry.pack(side=tk.LEFT, padx=5, pady=5)
+        search_entry.bind("<KeyRelease>", self.on_search_typed)
+        self._search_job = None
+
+        self.all_customers = self.customers.pager()
+        self.grid_view = VirtualTreeview(self, self.all_customers, hidden_columns=("version",))
+        self.grid_view.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.tree = self.grid_view.tree
         self.tree.bind("<<TreeviewSelect>>", self.select_row)
 
     def load_customers(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-        with self.db.connect() as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT * FROM customers")
-            for customer in cur.fetchall():
-                self.tree.insert("", tk.END, values=customer)
+        self.grid_view.reload()
+
+    def refresh(self):
+        if self.grid_view.pager is self.all_customers:
+            self.grid_view.refresh()
+        else:
+            self.grid_view.reload()  # re-run the search; results are ranked, not id-ordered
+
+    def on_search_typed(self, event=None):
+        """Debounces typing so the search only runs once the user pauses."""
+        if self._search_job:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(250, self.run_search)
+
+    def run_search(self):
+        self._search_job = None
+        pager = self.customers.search_pager(self.search_var.get()) or self.all_customers
+        self.grid_view.set_pager(pager)
 
     def add_customer(self):
         name = self.name_entry.get()
@@ -272,14 +549,8 @@ class CustomersApp(BaseApp):
             messagebox.showerror("Error", "Invalid phone format. Must be 10-15 digits.")
             return
 
-        with self.db.connect() as conn:
-            cur = conn.cursor()
-            cur.execute("INSERT INTO customers (name, email, phone) VALUES (?, ?, ?)", (name, email, phone))
-            conn.commit()
-            
-        self.load_customers()
-        self.clear_entries(self.entries) 
-        messagebox.showinfo("Success", "Customer added successfully.")
+        self.run_write(self.customers.add, name, email, phone,
+                       on_success=lambda _: self.on_saved("Customer added successfully."))
 
     def update_customer(self):
         selected = self.tree.selection()
@@ -302,14 +573,12 @@ class CustomersApp(BaseApp):
             messagebox.showerror("Error", "Invalid phone format.")
             return
 
-        with self.db.connect() as conn:
-            cur = conn.cursor()
-            cur.execute("UPDATE customers SET name=?, email=?, phone=? WHERE id=?", (name, email, phone, cust_id))
-            conn.commit()
-            
-        self.load_customers()
-        self.clear_entries(self.entries)
-        messagebox.showinfo("Success", "Customer updated successfully.")
+        def saved(version):
+            self.selected_version = version
+            self.on_saved("Customer updated successfully.")
+
+        self.run_write(self.customers.update, cust_id, self.selected_version, name, email, phone,
+                       on_success=saved)
 
     def delete_customer(self):
         selected = self.tree.selection()
@@ -319,30 +588,35 @@ class CustomersApp(BaseApp):
             
         cust_id = self.tree.item(selected[0])["values"][0]
         
-        if not messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this customer? This will also delete all their accounts and transactions."):
+        if not messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this customer? This will also delete their login and all their accounts and transactions."):
             return
 
-        with self.db.connect() as conn:
-            cur = conn.cursor()
-            cur.execute("DELETE FROM customers WHERE id=?", (cust_id,))
-            conn.commit()
-            
-        self.load_customers()
-        self.clear_entries(self.entries)
-        messagebox.showinfo("Success", "Customer deleted successfully.")
+        self.run_write(self.customers.delete, cust_id, self.selected_version,
+                       on_success=lambda _: self.on_saved("Customer deleted successfully."))
 
     def select_row(self, event):
         selected = self.tree.selection()
         if selected:
-            values = self.tree.item(selected[0])["values"]
-            self.clear_entries(self.entries)
-            self.name_entry.insert(0, values[1])
-            self.email_entry.insert(0, values[2])
-            self.phone_entry.insert(0, values[3])
+            self.fill_form(self.tree.item(selected[0])["values"])
+
+    def fill_form(self, values):
+        self.clear_entries(self.entries)
+        if values is None:
+            return  # deleted meanwhile
+        self.name_entry.insert(0, values[1])
+        self.email_entry.insert(0, values[2])
+        self.phone_entry.insert(0, values[3])
+        # The version the edit is based on; saving fails if the row moves past it.
+        self.selected_version = values[4]
+
+    def reload_row(self, row_id):
+        self.refresh()
+        self.run_query(self.customers.get, row_id, on_success=self.fill_form)
 
 class AccountsApp(BaseApp):
     def __init__(self, master, db):
         super().__init__(master, db)
+        self.accounts = AccountRepository(db)
         self.create_form()
         self.create_buttons()
         self.create_table()
@@ -377,27 +651,16 @@ class AccountsApp(BaseApp):
         ttk.Button(btn_frame, text="Clear Fields", command=lambda: self.clear_entries(self.entries)).pack(side=tk.LEFT, padx=5)
 
     def create_table(self):
-        cols = ("id", "customer_id", "account_type", "balance")
-        self.tree = ttk.Treeview(self, columns=cols, show="headings")
-        
-        s = ttk.Style()
-        s.configure("Treeview.Heading", anchor="center")
-
-        for col in cols:
-            self.tree.heading(col, text=col.capitalize())
-            self.tree.column(col, anchor=tk.CENTER)
-            
-        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.grid_view = VirtualTreeview(self, self.accounts.pager(), hidden_columns=("version",))
+        self.grid_view.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.tree = self.grid_view.tree
         self.tree.bind("<<TreeviewSelect>>", self.select_row)
 
     def load_accounts(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-        with self.db.connect() as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT * FROM accounts")
-            for acc in cur.fetchall():
-                self.tree.insert("", tk.END, values=acc)
+        self.grid_view.reload()
+
+    def refresh(self):
+        self.grid_view.refresh()
 
     def add_account(self):
         cust_id = self.cust_entry.get()
@@ -416,20 +679,8 @@ class AccountsApp(BaseApp):
             
         balance = float(balance_str)
 
-        with self.db.connect() as conn:
-            cur = conn.cursor()
-            
-            cur.execute("SELECT 1 FROM customers WHERE id=?", (cust_id,))
-            if not cur.fetchone():
-                messagebox.showerror("Error", f"No customer found with ID: {cust_id}")
-                return
-                
-            cur.execute("INSERT INTO accounts (customer_id, account_type, balance) VALUES (?, ?, ?)", (cust_id, acc_type, balance))
-            conn.commit()
-            
-        self.load_accounts()
-        self.clear_entries(self.entries)
-        messagebox.showinfo("Success", "Account added successfully.")
+        self.run_write(self.accounts.add, cust_id, acc_type, balance,
+                       on_success=lambda _: self.on_saved("Account added successfully."))
 
     def update_account(self):
         selected = self.tree.selection()
@@ -451,14 +702,12 @@ class AccountsApp(BaseApp):
 
         balance = float(balance_str)
 
-        with self.db.connect() as conn:
-            cur = conn.cursor()
-            cur.execute("UPDATE accounts SET account_type=?, balance=? WHERE id=?", (acc_type, balance, acc_id))
-            conn.commit()
-            
-        self.load_accounts()
-        self.clear_entries(self.entries)
-        messagebox.showinfo("Success", "Account updated successfully.")
+        def saved(version):
+            self.selected_version = version
+            self.on_saved("Account updated successfully.")
+
+        self.run_write(self.accounts.update, acc_id, self.selected_version, acc_type, balance,
+                       on_success=saved)
 
     def delete_account(self):
         selected = self.tree.selection()
@@ -471,32 +720,37 @@ class AccountsApp(BaseApp):
         if not messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this account? This will also delete all its transactions."):
             return
 
-        with self.db.connect() as conn:
-            cur = conn.cursor()
-            cur.execute("DELETE FROM accounts WHERE id=?", (acc_id,))
-            conn.commit()
-            
-        self.load_accounts()
-        self.clear_entries(self.entries)
-        messagebox.showinfo("Success", "Account deleted successfully.")
+        self.run_write(self.accounts.delete, acc_id, self.selected_version,
+                       on_success=lambda _: self.on_saved("Account deleted successfully."))
 
     def select_row(self, event):
         selected = self.tree.selection()
         if selected:
-            values = self.tree.item(selected[0])["values"]
-            self.clear_entries(self.entries)
-            self.cust_entry.insert(0, values[1])
-            self.type_entry.insert(0, values[2])
-            self.balance_entry.insert(0, values[3])
+            self.fill_form(self.tree.item(selected[0])["values"])
+
+    def fill_form(self, values):
+        self.clear_entries(self.entries)
+        if values is None:
+            return  # deleted meanwhile
+        self.cust_entry.insert(0, values[1])
+        self.type_entry.insert(0, values[2])
+        self.balance_entry.insert(0, values[3])
+        # The version the edit is based on; saving fails if the row moves past it.
+        self.selected_version = values[4]
+
+    def reload_row(self, row_id):
+        self.refresh()
+        self.run_query(self.accounts.get, row_id, on_success=self.fill_form)
 
 class TransactionsApp(BaseApp):
     def __init__(self, master, db):
         super().__init__(master, db)
+        self.transactions = TransactionRepository(db)
+        self.ledger = LedgerService(db)
         self.create_form()
         self.create_buttons()
         self.create_table()
         self.load_transactions()
-        master.bind("<<NotebookTabChanged>>", self.on_tab_changed)
 
     def create_form(self):
         form = ttk.Frame(self)
@@ -526,39 +780,20 @@ class TransactionsApp(BaseApp):
         ttk.Button(btn_frame, text="Clear Fields", command=lambda: self.clear_entries(self.entries)).pack(side=tk.LEFT, padx=5)
 
     def create_table(self):
-        cols = ("id", "account_id", "type", "amount", "date")
-        self.tree = ttk.Treeview(self, columns=cols, show="headings")
-        
-        s = ttk.Style()
-        s.configure("Treeview.Heading", anchor="center")
-        
-        for col in cols:
-            self.tree.heading(col, text=col.capitalize())
-            self.tree.column(col, anchor=tk.CENTER)
-            
-        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.grid_view = VirtualTreeview(self, self.transactions.pager())
+        self.grid_view.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.tree = self.grid_view.tree
 
     def load_transactions(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-        with self.db.connect() as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT * FROM transactions ORDER BY date DESC, id DESC")
-            for t in cur.fetchall():
-                self.tree.insert("", tk.END, values=t)
-                
-    def on_tab_changed(self, event):
-        """Reloads data when this tab is selected."""
-        selected_tab = event.widget.select()
-        tab_text = event.widget.tab(selected_tab, "text")
-        if tab_text == "Transactions":
-            self.load_transactions()
+        self.grid_view.reload()
+
+    def refresh(self):
+        self.grid_view.refresh()
 
     def add_transaction(self):
         acc_id = self.acc_entry.get()
         t_type = self.type_var.get().lower()
         amount_str = self.amount_entry.get()
-        today = date.today().isoformat()
 
         if not acc_id:
             messagebox.showerror("Error", "Account ID is required.")
@@ -569,35 +804,86 @@ class TransactionsApp(BaseApp):
             
         amount = float(amount_str)
 
-        with self.db.connect() as conn:
-            cur = conn.cursor()
-            
-            cur.execute("SELECT balance FROM accounts WHERE id=?", (acc_id,))
-            row = cur.fetchone()
-            if not row:
-                messagebox.showerror("Error", f"No account found with ID: {acc_id}")
-                return
-            
-            current_balance = row[0]
-            
-            if t_type == "withdraw":
-                if current_balance < amount:
-                    messagebox.showerror("Error", "Insufficient funds for this withdrawal.")
-                    return
-                new_balance = current_balance - amount
-            else: 
-                new_balance = current_balance + amount
-
-            cur.execute("UPDATE accounts SET balance = ? WHERE id=?", (new_balance, acc_id))
-            
-            cur.execute("INSERT INTO transactions (account_id, type, amount, date) VALUES (?, ?, ?, ?)",
-                        (acc_id, t_type, amount, today))
-            
-            conn.commit()
+        self.run_write(self.ledger.post, acc_id, t_type, amount,
+                       on_success=lambda new_balance: self.on_saved(
+                           f"{t_type.capitalize()} recorded successfully! New balance: ${new_balance:,.2f}"),
+                       on_error=self.on_posting_failed)
 
-        self.load_transactions()
-        self.clear_entries(self.entries)
-        messagebox.showinfo("Success", f"{t_type.capitalize()} recorded successfully! New balance: ${new_balance:,.2f}")
+    def on_posting_failed(self, error):
+        if isinstance(error, LedgerError):
+            messagebox.showerror("Error", str(error))
+        else:
+            messagebox.showerror("Error", f"Could not record the transaction: {error}")
+
+class TransfersApp(BaseApp):
+    def __init__(self, master, db):
+        super().__init__(master, db)
+        self.transfers = TransferRepository(db)
+        self.ledger = LedgerService(db)
+        self.create_form()
+        self.create_buttons()
+        self.create_table()
+        self.load_transfers()
+
+    def create_form(self):
+        form = ttk.Frame(self)
+        form.pack(pady=10)
+        ttk.Label(form, text="From Account ID").grid(row=0, column=0, padx=5, pady=5)
+        ttk.Label(form, text="To Account ID").grid(row=1, column=0, padx=5, pady=5)
+        ttk.Label(form, text="Amount").grid(row=2, column=0, padx=5, pady=5)
+
+        self.from_entry = ttk.Entry(form, width=40)
+        self.to_entry = ttk.Entry(form, width=40)
+        self.amount_entry = ttk.Entry(form, width=40)
+
+        self.from_entry.grid(row=0, column=1, padx=5, pady=5)
+        self.to_entry.grid(row=1, column=1, padx=5, pady=5)
+        self.amount_entry.grid(row=2, column=1, padx=5, pady=5)
+
+        self.bind_enter_to_submit(self.amount_entry, self.add_transfer)
+        self.entries = [self.from_entry, self.to_entry, self.amount_entry]
+
+    def create_buttons(self):
+        btn_frame = ttk.Frame(self)
+        btn_frame.pack(pady=10)
+        ttk.Button(btn_frame, text="Transfer", command=self.add_transfer).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Clear Fields", command=lambda: self.clear_entries(self.entries)).pack(side=tk.LEFT, padx=5)
+
+    def create_table(self):
+        self.grid_view = VirtualTreeview(self, self.transfers.pager(), hidden_columns=("debit_id", "credit_id"))
+        self.grid_view.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.tree = self.grid_view.tree
+
+    def load_transfers(self):
+        self.grid_view.reload()
+
+    def refresh(self):
+        self.grid_view.refresh()
+
+    def add_transfer(self):
+        from_id = self.from_entry.get().strip()
+        to_id = self.to_entry.get().strip()
+        amount_str = self.amount_entry.get()
+
+        if not from_id.isdigit() or not to_id.isdigit():
+            messagebox.showerror("Error", "Both account IDs are required.")
+            return
+        if not Validator.is_valid_amount(amount_str) or float(amount_str) <= 0:
+            messagebox.showerror("Error", "Invalid amount. Must be a positive number.")
+            return
+
+        amount = float(amount_str)
+        self.run_write(self.ledger.transfer, int(from_id), int(to_id), amount,
+                       on_success=lambda transfer_id: self.on_saved(
+                           f"Transfer #{transfer_id} of ${amount:,.2f} from account {from_id} "
+                           f"to account {to_id} recorded successfully!"),
+                       on_error=self.on_transfer_failed)
+
+    def on_transfer_failed(self, error):
+        if isinstance(error, LedgerError):
+            messagebox.showerror("Error", str(error))
+        else:
+            messagebox.showerror("Error", f"Could not record the transfer: {error}")
 
 class AdminInterface(ttk.Frame):
     def __init__(self, master, db, logout_callback):
@@ -612,95 +898,190 @@ class AdminInterface(ttk.Frame):
         
         ttk.Button(header_frame, text="Logout", command=logout_callback).pack(side=tk.RIGHT, padx=20)
 
-        notebook = ttk.Notebook(self)
-        notebook.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+        self.notebook = ttk.Notebook(self)
+        self.notebook.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+
+        # Each tab starts as an empty frame and is built (and runs its first
+        # query) the first time it is selected, so logging in does not wait
+        # for tabs nobody opens.
+        self.tab_classes = {}
+        self.tabs = {}
+        for title, app_class in (("Customers", CustomersApp), ("Accounts", AccountsApp),
+                                 ("Transactions", TransactionsApp), ("Transfers", TransfersApp)):
+            placeholder = ttk.Frame(self.notebook)
+            self.notebook.add(placeholder, text=title)
+            self.tab_classes[str(placeholder)] = app_class
+        self.current_tab = None
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.show_tab(self.notebook.select())
 
-        customers_tab = CustomersApp(notebook, self.db)
-        accounts_tab = AccountsApp(notebook, self.db)
-        transactions_tab = TransactionsApp(notebook, self.db)
-
-        notebook.add(customers_tab, text="Customers")
-        notebook.add(accounts_tab, text="Accounts")
-        notebook.add(transactions_tab, text="Transactions")
+    def on_tab_changed(self, event):
+        self.show_tab(self.notebook.select())
+
+    def show_tab(self, name):
+        """Builds the tab on first use; afterwards brings it up to date with whatever changed meanwhile."""
+        tab = self.tabs.get(name)
+        if self.current_tab is not None and self.current_tab is not tab:
+            self.current_tab.cancel_loading()
+        if tab is None:
+            app_class = self.tab_classes[name]
+            with metrics.REGISTRY.timer("bank_ui_build_seconds", view=app_class.__name__):
+                tab = self.tabs[name] = app_class(self.notebook.nametowidget(name), self.db)
+        else:
+            tab.refresh()
+        self.current_tab = tab
 
 class CustomerInterface(ttk.Frame):
+    CARDS_PER_ROW = 3
+
     def __init__(self, master, db, customer_id, logout_callback):
         super().__init__(master, style="TFrame")
         self.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
         self.db = db
+        self.customers = CustomerRepository(db)
+        self.accounts = AccountRepository(db)
+        self.transactions = TransactionRepository(db)
         self.customer_id = customer_id
         self.logout_callback = logout_callback
-        
-        self.customer_name = self.get_customer_name()
+        self.executor = QueryExecutor.of(self)
         
         self.create_widgets()
+        self.executor.submit(self, "name", self.customers.name, customer_id, on_success=self.show_name)
         self.load_details()
-        
-    def get_customer_name(self):
-        with self.db.connect() as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT name FROM customers WHERE id=?", (self.customer_id,))
-            row = cur.fetchone()
-            return row[0] if row else "Valued Customer"
+
+    def show_name(self, name):
+        self.welcome_label.config(text=f"Welcome, {name or 'Valued Customer'}!")
 
     def create_widgets(self):
         header_frame = ttk.Frame(self)
         header_frame.pack(fill=tk.X, pady=10)
         
-        ttk.Label(header_frame, text=f"Welcome, {self.customer_name}!", style="Title.TLabel").pack(side=tk.LEFT)
+        self.welcome_label = ttk.Label(header_frame, text="Welcome!", style="Title.TLabel")
+        self.welcome_label.pack(side=tk.LEFT)
         
         ttk.Button(header_frame, text="Logout", command=self.logout_callback).pack(side=tk.RIGHT)
 
+        loading_label = ttk.Label(header_frame, text="Loading…")
+        self.bind("<<QueryBusy>>", lambda e: loading_label.pack(side=tk.RIGHT, padx=10))
+        self.bind("<<QueryIdle>>", lambda e: loading_label.pack_forget())
+
         content_frame = ttk.Frame(self, style="Login.TFrame") 
         content_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
         ttk.Label(content_frame, text="Your Accounts", style="Title.TLabel").pack(pady=10)
+
+        self.cards_frame = ttk.Frame(content_frame, style="Login.TFrame")
+        self.cards_frame.pack(fill=tk.X, padx=10)
+        self.cards = {}
+        self.selected_account = None
+        self.selected_type = None
+
+        export_frame = ttk.Frame(content_frame, style="Login.TFrame")
+        export_frame.pack(pady=5)
+        today = date.today()
+        ttk.Label(export_frame, text="From", style="Login.TLabel").pack(side=tk.LEFT, padx=5)
+        self.from_entry = ttk.Entry(export_frame, width=12)
+        self.from_entry.insert(0, today.replace(month=1, day=1).isoformat())
+        self.from_entry.pack(side=tk.LEFT, padx=5)
+        ttk.Label(export_frame, text="To", style="Login.TLabel").pack(side=tk.LEFT, padx=5)
+        self.to_entry = ttk.Entry(export_frame, width=12)
+        self.to_entry.insert(0, today.isoformat())
+        self.to_entry.pack(side=tk.LEFT, padx=5)
+        ttk.Button(export_frame, text="Export Statement", command=self.export_statement).pack(side=tk.LEFT, padx=5)
         
-        cols_acc = ("id", "account_type", "balance")
-        self.accounts_tree = ttk.Treeview(content_frame, columns=cols_acc, show="headings")
-        s = ttk.Style()
-        s.configure("Treeview.Heading", anchor="center")
-        for col in cols_acc:
-            self.accounts_tree.heading(col, text=col.capitalize())
-            self.accounts_tree.column(col, anchor=tk.CENTER)
-        self.accounts_tree.pack(fill=tk.X, padx=10)
-        
-        ttk.Label(content_frame, text="Your Transactions", style="Title.TLabel").pack(pady=20)
-        
-        cols_trans = ("id", "account_id", "type", "amount", "date")
-        self.trans_tree = ttk.Treeview(content_frame, columns=cols_trans, show="headings")
-        for col in cols_trans:
-            self.trans_tree.heading(col, text=col.capitalize())
-            self.trans_tree.column(col, anchor=tk.CENTER)
-        self.trans_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.history_label = ttk.Label(content_frame, text="Your Transactions", style="Title.TLabel")
+        self.history_label.pack(pady=(20, 5))
+        # Older transactions live in the yearly archive files; only read them on request.
+        self.include_archive = tk.BooleanVar(value=False)
+        ttk.Checkbutton(content_frame, text="Include archived history", variable=self.include_archive,
+                        command=lambda: self.select_account(self.selected_account, self.selected_type)).pack()
+        self.history_frame = ttk.Frame(content_frame, style="Login.TFrame")
+        self.history_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        # Created with the first account's pager once the summaries arrive.
+        self.history = None
 
     def load_details(self):
-        for tree in [self.accounts_tree, self.trans_tree]:
-            for row in tree.get_children():
-                tree.delete(row)
-        
-        with self.db.connect() as conn:
-            cur = conn.cursor()
-            
-            cur.execute("SELECT id, account_type, balance FROM accounts WHERE customer_id=?", (self.customer_id,))
-            account_ids = []
-            for acc in cur.fetchall():
-                account_ids.append(acc[0])
-                self.accounts_tree.insert("", tk.END, values=acc)
-            
-            if account_ids:
-                placeholders = ",".join("?" * len(account_ids))
-                query = f"SELECT * FROM transactions WHERE account_id IN ({placeholders}) ORDER BY date DESC"
-                cur.execute(query, account_ids)
-                for t in cur.fetchall():
-                    self.trans_tree.insert("", tk.END, values=t)
+        requested = time.perf_counter()
+        self.executor.submit(self, "details", self.accounts.summaries, self.customer_id,
+                             on_success=lambda summaries: self.show_summaries(summaries, requested),
+                             on_error=lambda e: messagebox.showerror("Error", f"Could not load your accounts: {e}"))
+
+    def export_statement(self):
+        account_id = self.selected_account
+        if account_id is None:
+            messagebox.showwarning("Warning", "Please select an account to export.")
+            return
+        try:
+            start = date.fromisoformat(self.from_entry.get()).isoformat()
+            end = date.fromisoformat(self.to_entry.get()).isoformat()
+        except ValueError:
+            messagebox.showerror("Error", "Dates must be in YYYY-MM-DD format.")
+            return
+
+        path = filedialog.asksaveasfilename(
+            defaultextension=".csv", initialfile=f"statement_{account_id}_{start}_{end}.csv",
+            filetypes=[("CSV", "*.csv"), ("HTML", "*.html")])
+        if not path:
+            return
+        fmt = "html" if path.lower().endswith((".html", ".htm")) else "csv"
+        self.executor.submit(self, "export", statements.export_statement, self.db, account_id, start, end, path, fmt,
+                             on_success=lambda result: messagebox.showinfo(
+                                 "Success", f"Statement saved: {result[0]:,} transactions, "
+                                            f"closing balance ${result[2]:,.2f}."),
+                             on_error=lambda e: messagebox.showerror("Error", f"Could not export the statement: {e}"))
+
+    def show_summaries(self, summaries, requested):
+        with metrics.REGISTRY.timer("bank_ui_render_seconds", view="CustomerInterface"):
+            for card in self.cards.values():
+                card.destroy()
+            self.cards.clear()
+            if not summaries:
+                ttk.Label(self.cards_frame, text="You have no accounts yet.", style="Login.TLabel").grid(row=0, column=0)
+            for index, summary in enumerate(summaries):
+                card = self.create_card(summary)
+                card.grid(row=index // self.CARDS_PER_ROW, column=index % self.CARDS_PER_ROW, padx=5, pady=5, sticky="nsew")
+                self.cards[summary[0]] = card
+            self.update_idletasks()
+        metrics.REGISTRY.observe("bank_ui_load_seconds", time.perf_counter() - requested, view="CustomerInterface")
+        if summaries:
+            self.select_account(summaries[0][0], summaries[0][1])
+
+    def create_card(self, summary):
+        account_id, acc_type, balance, last_activity, deposits, withdrawals = summary
+        card = ttk.Frame(self.cards_frame, style="Card.TFrame")
+        ttk.Label(card, text=f"{acc_type} #{account_id}", font=(FONT_NAME, FONT_SIZE, "bold")).pack(anchor=tk.W)
+        ttk.Label(card, text=f"${balance:,.2f}", style="Balance.TLabel").pack(anchor=tk.W)
+        ttk.Label(card, text=f"Last activity: {last_activity or 'none'}").pack(anchor=tk.W)
+        ttk.Label(card, text=f"Last 30 days: +${deposits:,.2f} / -${withdrawals:,.2f}").pack(anchor=tk.W)
+        for widget in (card, *card.winfo_children()):
+            widget.bind("<Button-1>", lambda e: self.select_account(account_id, acc_type))
+        return card
+
+    def select_account(self, account_id, acc_type):
+        """Highlights the account's card and pages in its transaction history."""
+        if account_id is None:
+            return
+        self.selected_account = account_id
+        self.selected_type = acc_type
+        for card_id, card in self.cards.items():
+            card.configure(style="SelectedCard.TFrame" if card_id == account_id else "Card.TFrame")
+        self.history_label.config(text=f"Transactions of {acc_type} #{account_id}")
+        pager = self.transactions.account_pager(account_id, history=self.include_archive.get())
+        if self.history is None:
+            self.history = VirtualTreeview(self.history_frame, pager, view_name="CustomerInterface")
+            self.history.pack(fill=tk.BOTH, expand=True)
+            self.history.reload()
+        else:
+            self.history.set_pager(pager)
 
 class LoginFrame(ttk.Frame):
     def __init__(self, master, db, login_success_callback):
         super().__init__(master, style="Login.TFrame")
         self.pack(fill=tk.BOTH, expand=True)
         self.db = db
+        self.users = UserRepository(db)
         self.login_success_callback = login_success_callback
+        self.executor = QueryExecutor.of(self)
 
         form_frame = ttk.Frame(self, style="TFrame", padding=40)
         form_frame.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
@@ -728,31 +1109,63 @@ class LoginFrame(ttk.Frame):
         username = self.user_entry.get()
         password = self.pass_entry.get()
 
-        with self.db.connect() as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT password, role, customer_id FROM users WHERE username=?", (username,))
-            row = cur.fetchone()
-
-            if row and row[0] == password:
-                role = row[1]
-                customer_id = row[2]
-                print(f"DEBUG: Login successful - Username: {username}, Role: {role}, Customer ID: {customer_id}")  # Debug line
-                self.login_success_callback(role, customer_id)
-            else:
-                messagebox.showerror("Login Failed", "Invalid username or password.")
+        self.login_button.state(["disabled"])
+        self.login_button.config(text="Signing in…")
+        self.executor.submit(self, "login", self.users.authenticate, username, password,
+                             on_success=lambda result: self.on_login_result(username, result),
+                             on_error=self.on_login_error)
+
+    def on_login_result(self, username, result):
+        self.reset_login_button()
+        if result:
+            role, customer_id = result
+            log.info("Login successful: username=%s role=%s customer_id=%s", username, role, customer_id)
+            self.login_success_callback(role, customer_id)
+        else:
+            messagebox.showerror("Login Failed", "Invalid username or password.")
+
+    def on_login_error(self, error):
+        self.reset_login_button()
+        messagebox.showerror("Login Failed", f"Could not reach the database: {error}")
+
+    def reset_login_button(self):
+        self.login_button.state(["!disabled"])
+        self.login_button.config(text="Login")
 
 class BankApp(tk.Tk):
-    def __init__(self):
+    METRICS_INTERVAL_MS = 15000
+
+    def __init__(self, metrics_path=None, slow_query_ms=100, trace_sql=False):
         super().__init__()
         self.title("🏦 Professional Bank Management System")
         self.geometry("1000x700") 
-        self.db = DatabaseManager()
+        self.db = DatabaseManager(slow_query_ms=slow_query_ms, trace_sql=trace_sql)
+        self.query_executor = QueryExecutor(self)
+        self.metrics_path = metrics_path
+        if metrics_path:
+            self.after(self.METRICS_INTERVAL_MS, self.export_metrics)
         
         setup_styles()
         self.configure(bg=BG_COLOR)
 
         self.current_frame = None
         self.show_login_screen()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def export_metrics(self):
+        """Rewrites the metrics file periodically so it can be scraped while the app runs."""
+        try:
+            metrics.REGISTRY.export(self.metrics_path)
+        except OSError as e:
+            log.warning("Could not write metrics to %s: %s", self.metrics_path, e)
+        self.after(self.METRICS_INTERVAL_MS, self.export_metrics)
+
+    def on_close(self):
+        self.query_executor.shutdown()
+        self.db.close()
+        if self.metrics_path:
+            self.export_metrics()
+        self.destroy()
 
     def show_login_screen(self):
         if self.current_frame:
@@ -772,6 +1185,17 @@ class BankApp(tk.Tk):
             self.title("Bank System - Customer Portal")
 
 if __name__ == "__main__":
-    app = BankApp()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bank management system.")
+    parser.add_argument("--metrics", help="write metrics to this file (.json for JSON, Prometheus text otherwise)")
+    parser.add_argument("--slow-query-ms", type=float, default=100, help="log queries slower than this")
+    parser.add_argument("--trace-sql", action="store_true",
+                        help="count every SQL statement (and log it at DEBUG level)")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    app = BankApp(args.metrics, args.slow_query_ms, args.trace_sql)
 
     app.mainloop()
@@ -0,0 +1,60 @@
+import pytest
+
+from bank_core import DatabaseManager
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "bank.db"))
+    yield db
+    db.close()
+
+@pytest.fixture
+def accounts(db):
+    """Ids of four accounts of one customer: Savings 1000, Checking 100, Checking 2000, Business 50."""
+    with db.session() as conn:
+        customer_id = conn.execute("INSERT INTO customers (name) VALUES ('Test Customer')").lastrowid
+        return [conn.execute("INSERT INTO accounts (customer_id, account_type, balance) VALUES (?, ?, ?)",
+                             (customer_id, acc_type, balance)).lastrowid
+                for acc_type, balance in (("Savings", 1000.0), ("Checking", 100.0),
+                                          ("Checking", 2000.0), ("Business", 50.0))]
+
+@pytest.fixture
+def balance(db):
+    """balance(account_id): the account's current balance."""
+    def balance(account_id):
+        with db.session() as conn:
+            return conn.execute("SELECT balance FROM accounts WHERE id=?", (account_id,)).fetchone()[0]
+    return balance
+
+@pytest.fixture
+def check_summaries(db):
+    """check_summaries(): asserts that the summary tables hold exactly what the
+    transactions table adds up to."""
+    return lambda: _check_summaries(db)
+
+def _check_summaries(db):
+    with db.session() as conn:
+        daily = conn.execute("""
+            SELECT account_id, day, ROUND(deposits, 2), ROUND(withdrawals, 2), tx_count
+            FROM daily_account_summary ORDER BY 1, 2
+        """).fetchall()
+        expected = conn.execute("""
+            SELECT account_id, date,
+                   ROUND(SUM(CASE WHEN type = 'deposit' THEN amount ELSE 0 END), 2),
+                   ROUND(SUM(CASE WHEN type = 'withdraw' THEN amount ELSE 0 END), 2),
+                   COUNT(*)
+            FROM transactions GROUP BY 1, 2 ORDER BY 1, 2
+        """).fetchall()
+        assert daily == expected
+        monthly = conn.execute("""
+            SELECT account_type, month, ROUND(deposits, 2), ROUND(withdrawals, 2), tx_count
+            FROM monthly_type_totals ORDER BY 1, 2
+        """).fetchall()
+        expected = conn.execute("""
+            SELECT a.account_type, substr(t.date, 1, 7),
+                   ROUND(SUM(CASE WHEN t.type = 'deposit' THEN t.amount ELSE 0 END), 2),
+                   ROUND(SUM(CASE WHEN t.type = 'withdraw' THEN t.amount ELSE 0 END), 2),
+                   COUNT(*)
+            FROM transactions t JOIN accounts a ON a.id = t.account_id GROUP BY 1, 2 ORDER BY 1, 2
+        """).fetchall()
+        assert monthly == expected
@@ -0,0 +1,61 @@
+from datetime import date
+
+import pytest
+
+from bank_core import LedgerService
+from bank_core.accrual import AccrualEngine, parse_period
+
+TODAY = date(2025, 2, 10)
+
+def test_accrues_interest_and_fees_per_account_type(db, accounts, balance, check_summaries):
+    accounts_charged, interest, fees, done = AccrualEngine(db).run("2025-01", today=TODAY)
+    savings, checking, checking_waived, business = (balance(account_id) for account_id in accounts)
+    assert savings == pytest.approx(1000 + round(1000 * 0.02 / 12, 2))
+    assert checking == pytest.approx(100 + round(100 * 0.001 / 12, 2) - 5)
+    assert checking_waived == pytest.approx(2000 + round(2000 * 0.001 / 12, 2))
+    # Business owes 15 a month but only holds 50 plus its interest.
+    assert business == pytest.approx(50 + round(50 * 0.005 / 12, 2) - 15)
+    assert (accounts_charged, done) == (4, False)
+    assert fees == pytest.approx(20)
+    with db.session() as conn:
+        assert conn.execute("SELECT DISTINCT date FROM transactions").fetchall() == [("2025-01-31",)]
+    check_summaries()
+
+def test_fee_never_exceeds_the_balance(db, accounts, balance):
+    with db.session() as conn:
+        conn.execute("UPDATE accounts SET balance = 3 WHERE id=?", (accounts[3],))
+    AccrualEngine(db).run("2025-01", today=TODAY)
+    assert balance(accounts[3]) == pytest.approx(0)
+
+def test_a_period_is_accrued_only_once(db, accounts, balance):
+    engine = AccrualEngine(db)
+    first = engine.run("2025-01", today=TODAY)
+    balances = [balance(account_id) for account_id in accounts]
+    assert engine.run("2025-01", today=TODAY) == (*first[:3], True)
+    assert [balance(account_id) for account_id in accounts] == balances
+    with db.session() as conn:
+        assert conn.execute("SELECT period FROM accrual_runs").fetchall() == [("2025-01",)]
+
+@pytest.mark.parametrize("period", ["2025-1", "2025-001", "2025-13", "2025-00", "25-01", "2025/01", ""])
+def test_malformed_periods_are_refused(db, accounts, period, balance):
+    with pytest.raises(ValueError):
+        AccrualEngine(db).run(period, today=TODAY)
+    assert balance(accounts[0]) == 1000.0
+
+@pytest.mark.parametrize("period", ["2025-02", "2025-03", "2030-01"])
+def test_periods_not_yet_ended_are_refused(db, accounts, period):
+    with pytest.raises(ValueError, match="not ended"):
+        AccrualEngine(db).run(period, today=TODAY)
+
+def test_parse_period_keeps_canonical_form():
+    assert parse_period(" 2024-12 ") == "2024-12"
+
+def test_accrues_on_the_balance_at_the_end_of_the_period(db, accounts, balance):
+    ledger = LedgerService(db)
+    # Checking held 100 on 2025-01-31, under the 1000 waiver, whatever came after.
+    ledger.post(accounts[1], "deposit", 5000, "2025-02-03")
+    # Savings held 1000 then; what it took out since must not shrink its interest.
+    ledger.post(accounts[0], "withdraw", 900, "2025-02-05")
+    AccrualEngine(db).run("2025-01", today=TODAY)
+    assert balance(accounts[1]) == pytest.approx(5100 + round(100 * 0.001 / 12, 2) - 5)
+    assert balance(accounts[0]) == pytest.approx(100 + round(1000 * 0.02 / 12, 2))
@@ -0,0 +1,44 @@
+from datetime import date
+
+import pytest
+
+from bank_core import AccountRepository, LedgerService, aggregates
+
+def post_history(db, account_id):
+    ledger = LedgerService(db)
+    for t_type, amount, day in (("deposit", 100, "2025-01-01"), ("withdraw", 30, "2025-01-01"),
+                                ("deposit", 250, "2025-01-15"), ("withdraw", 20, "2025-02-03")):
+        ledger.post(account_id, t_type, amount, day)
+
+def test_balance_on_works_back_from_the_current_balance(db, accounts):
+    post_history(db, accounts[1])
+    with db.session() as conn:
+        assert aggregates.balance_on(conn, accounts[1], "2024-12-31") == 100.0
+        assert aggregates.balance_on(conn, accounts[1], "2025-01-01") == 170.0
+        assert aggregates.balance_on(conn, accounts[1], "2025-01-31") == 420.0
+        assert aggregates.balance_on(conn, accounts[1], "2025-12-31") == 400.0
+        assert aggregates.balance_on(conn, 999, "2025-01-31") is None
+        assert aggregates.daily_activity(conn, accounts[1], "2025-01-01", "2025-01-31") == [
+            ("2025-01-01", 100.0, 30.0, 2), ("2025-01-15", 250.0, 0.0, 1)]
+
+def test_rebuild_reproduces_the_incremental_summaries(db, accounts, check_summaries):
+    post_history(db, accounts[1])
+    post_history(db, accounts[3])
+    with db.session() as conn:
+        before = conn.execute("SELECT * FROM daily_account_summary ORDER BY 1, 2").fetchall()
+        conn.execute("DELETE FROM daily_account_summary")
+        conn.execute("DELETE FROM monthly_type_totals")
+    aggregates.rebuild(db.connect())
+    with db.session() as conn:
+        assert conn.execute("SELECT * FROM daily_account_summary ORDER BY 1, 2").fetchall() == before
+    check_summaries()
+
+def test_balance_edits_leave_past_balances_alone(db, accounts, check_summaries):
+    post_history(db, accounts[1])
+    repo = AccountRepository(db)
+    _, _, acc_type, _, version = repo.get(accounts[1])
+    repo.update(accounts[1], version, acc_type, 1000.0)
+    with db.session() as conn:
+        assert aggregates.balance_on(conn, accounts[1], "2025-01-31") == 420.0
+        assert aggregates.balance_on(conn, accounts[1], date.today().isoformat()) == pytest.approx(1000.0)
+    check_summaries()
@@ -0,0 +1,56 @@
+import numpy as np
+
+from bank_core import LedgerService, anomalies
+
+def scan(db, tmp_path, **options):
+    return anomalies.scan(db.connect(), str(tmp_path / "columns"), report=lambda message: None, **options)
+
+def alerts(db):
+    with db.session() as conn:
+        return conn.execute("SELECT account_id, rule, day FROM alerts ORDER BY transaction_id, rule").fetchall()
+
+def test_rules(db, accounts, tmp_path):
+    ledger = LedgerService(db)
+    savings, checking, rich, business = accounts
+    # amount_zscore: a deposit far above the usual ones.
+    for day in range(1, 13):
+        ledger.post(savings, "deposit", 10 + day % 3, f"2025-01-{day:02d}")
+    ledger.post(savings, "deposit", 5000, "2025-01-20")
+    # velocity: an eleventh posting on the same day.
+    for _ in range(anomalies.MAX_PER_DAY + 1):
+        ledger.post(checking, "deposit", 1, "2025-02-01")
+    # balance_drain: most of the money leaves at once.
+    ledger.post(rich, "withdraw", 1900, "2025-03-01")
+
+    assert scan(db, tmp_path) == 3
+    assert alerts(db) == [(savings, "amount_zscore", "2025-01-20"),
+                          (checking, "velocity", "2025-02-01"),
+                          (rich, "balance_drain", "2025-03-01")]
+
+def test_scans_are_incremental(db, accounts, tmp_path):
+    ledger = LedgerService(db)
+    for _ in range(anomalies.MAX_PER_DAY + 1):
+        ledger.post(accounts[1], "deposit", 1, "2025-02-01")
+    assert scan(db, tmp_path) == 1
+    assert scan(db, tmp_path) == 0
+    # New postings are judged with the earlier ones as history.
+    ledger.post(accounts[1], "deposit", 1, "2025-02-01")
+    assert scan(db, tmp_path) == 1
+    assert scan(db, tmp_path, full=True) == 0
+    assert len(alerts(db)) == 2
+
+def test_chunking_does_not_change_the_result(db, tmp_path):
+    rng = np.random.default_rng(7)
+    with db.session() as conn:
+        ids = [conn.execute("INSERT INTO accounts (account_type, balance) VALUES ('Checking', 5000)").lastrowid
+               for _ in range(30)]
+    ledger = LedgerService(db)
+    for account_id, amount, day in zip(rng.choice(ids, 600), rng.lognormal(3, 1.5, 600), rng.integers(1, 20, 600)):
+        ledger.post(int(account_id), "deposit", round(float(amount), 2), f"2025-01-{day:02d}")
+
+    scan(db, tmp_path, accounts_per_chunk=7)
+    chunked = alerts(db)
+    with db.session() as conn:
+        conn.execute("DELETE FROM alerts")
+    scan(db, tmp_path, full=True)
+    assert chunked and alerts(db) == chunked
@@ -0,0 +1,69 @@
+import os
+
+from bank_core import DatabaseManager, LedgerService, TransactionRepository, archive
+from bank_core.statements import export_statement
+
+def post_years(db, account_id):
+    ledger = LedgerService(db)
+    for day in ("2022-03-01", "2022-11-30", "2023-06-15", "2024-02-01", "2025-01-10"):
+        ledger.post(account_id, "deposit", 100, day)
+
+def attached(conn):
+    return sorted(name for _, name, _ in conn.execute("PRAGMA database_list") if name.startswith("archive_"))
+
+def test_move_keeps_the_history_whole(db, accounts):
+    post_years(db, accounts[0])
+    conn = db.connect()
+    assert archive.move_to_archive(conn, "2024-01-01", batch_size=1, report=lambda message: None) == 3
+    assert archive.archive_years(db.db_name) == [2022, 2023]
+    assert os.path.exists(archive.archive_path(db.db_name, 2022))
+    assert [row[:2] for row in archive.archive_counts(conn)] == [(2022, 2), (2023, 1)]
+    assert attached(conn) == []
+
+    with db.session() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 2
+    repo = TransactionRepository(db)
+    assert len(repo.account_pager(accounts[0]).first_page(10)) == 2
+    history = repo.account_pager(accounts[0], history=True).first_page(10)
+    assert [row[4] for row in history] == ["2025-01-10", "2024-02-01", "2023-06-15", "2022-11-30", "2022-03-01"]
+    # The summaries still cover the archived years.
+    with db.session() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM daily_account_summary").fetchone()[0] == 5
+
+def test_moving_again_skips_archived_rows(db, accounts):
+    post_years(db, accounts[0])
+    conn = db.connect()
+    archive.move_to_archive(conn, "2024-01-01", report=lambda message: None)
+    assert archive.move_to_archive(conn, "2024-01-01", report=lambda message: None) == 0
+
+def test_reads_detach_the_archives_afterwards(db, accounts, tmp_path):
+    post_years(db, accounts[0])
+    archive.move_to_archive(db.connect(), "2024-01-01", report=lambda message: None)
+    path = str(tmp_path / "statement.csv")
+    assert export_statement(db, accounts[0], "2022-01-01", "2023-12-31", path) == (3, 1000.0, 1300.0)
+    TransactionRepository(db).account_pager(accounts[0], history=True).first_page(10)
+    with db.session() as conn:
+        assert attached(conn) == []
+        assert conn.execute("SELECT 1 FROM sqlite_temp_master WHERE name = ?", (archive.VIEW,)).fetchone() is None
+
+def test_read_only_connections_attach_archives_by_uri(tmp_path):
+    directory = tmp_path / "bank data #1"
+    directory.mkdir()
+    db = DatabaseManager(str(directory / "bank.db"))
+    try:
+        with db.session() as conn:
+            account_id = conn.execute("INSERT INTO accounts (account_type, balance) VALUES ('Savings', 0)").lastrowid
+        post_years(db, account_id)
+        archive.move_to_archive(db.connect(), "2024-01-01", report=lambda message: None)
+    finally:
+        db.close()
+
+    reader = DatabaseManager(str(directory / "bank.db"), read_only=True)
+    try:
+        with reader.session() as conn:
+            with archive.archives_attached(conn) as years:
+                assert years == [2022, 2023]
+                assert conn.execute(f"SELECT COUNT(*) FROM {archive.VIEW}").fetchone()[0] == 5
+            assert attached(conn) == []
+    finally:
+        reader.close()
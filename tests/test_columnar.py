@@ -0,0 +1,48 @@
+import numpy as np
+
+from bank_core import LedgerService, archive
+from bank_core.columnar import NO_DAY, ColumnarLedger, export
+
+def post(db, postings):
+    ledger = LedgerService(db)
+    for account_id, t_type, amount, day in postings:
+        ledger.post(account_id, t_type, amount, day)
+
+def test_export_matches_the_ledger(db, accounts, tmp_path):
+    post(db, [(accounts[0], "deposit", 100, "2023-05-01"), (accounts[1], "withdraw", 40, "2025-01-02"),
+              (accounts[0], "withdraw", 25.5, "2025-01-03")])
+    archive.move_to_archive(db.connect(), "2024-01-01", report=lambda message: None)
+    directory = str(tmp_path / "columns")
+    assert export(db.connect(), directory, chunk_size=2) == 3
+
+    ledger = ColumnarLedger(directory)
+    assert ledger.rows == 3
+    assert ledger.id.tolist() == [1, 2, 3]
+    assert ledger.account_id.tolist() == [accounts[0], accounts[1], accounts[0]]
+    assert ledger.dates().astype(str).tolist() == ["2023-05-01", "2025-01-02", "2025-01-03"]
+    assert ledger.signed_amount().tolist() == [100.0, -40.0, -25.5]
+    net = np.bincount(ledger.account_id, weights=ledger.signed_amount())
+    assert net[accounts[0]] == 74.5
+
+def test_export_appends_only_new_rows(db, accounts, tmp_path):
+    directory = str(tmp_path / "columns")
+    assert export(db.connect(), directory) == 0
+    assert ColumnarLedger(directory).rows == 0
+
+    post(db, [(accounts[0], "deposit", 10, "2025-01-01")])
+    assert export(db.connect(), directory) == 1
+    post(db, [(accounts[0], "deposit", 20, "2025-01-02"), (accounts[0], "deposit", 30, "2025-01-03")])
+    assert export(db.connect(), directory) == 2
+    assert ColumnarLedger(directory).amount.tolist() == [10.0, 20.0, 30.0]
+    assert export(db.connect(), directory, full=True) == 3
+    assert ColumnarLedger(directory).rows == 3
+
+def test_missing_values_get_sentinels(db, accounts, tmp_path):
+    with db.session() as conn:
+        conn.execute("INSERT INTO transactions (account_id, type, amount, date) VALUES (NULL, 'fee', 1.5, NULL)")
+    directory = str(tmp_path / "columns")
+    export(db.connect(), directory)
+    ledger = ColumnarLedger(directory)
+    assert ledger.account_id.tolist() == [-1]
+    assert ledger.day.tolist() == [NO_DAY]
+    assert ledger.types[ledger.type[0]] == "fee"
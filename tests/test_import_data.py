@@ -0,0 +1,74 @@
+import io
+import json
+
+from import_data import Importer, read_records
+
+def run_import(db, kind, lines, path, chunk_size=5000):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    rejects = io.StringIO()
+    importer = Importer(db, kind, rejects, chunk_size=chunk_size)
+    importer.run(read_records(str(path)))
+    return importer, [json.loads(line) for line in rejects.getvalue().splitlines()]
+
+def test_invalid_rows_are_rejected_with_the_reason(db, tmp_path):
+    importer, rejects = run_import(db, "customers", [
+        "name,email,phone",
+        "Ann Lee,ann@example.com,0612345678",
+        ",nobody@example.com,",
+        "Bob Ray,not-an-email,",
+    ], tmp_path / "customers.csv")
+    assert (importer.accepted, importer.rejected) == (1, 2)
+    assert [(r["line"], r["error"]) for r in rejects] == [(3, "Name is required."), (4, "Invalid email format.")]
+
+def test_rows_without_a_parent_are_rejected(db, accounts, tmp_path):
+    importer, rejects = run_import(db, "accounts", [
+        json.dumps({"customer_id": 1, "account_type": "Savings", "balance": 10}),
+        json.dumps({"customer_id": 999, "account_type": "Savings"}),
+        "{not json",
+    ], tmp_path / "accounts.jsonl")
+    assert importer.accepted == 1
+    # The bad JSON is caught before the missing customer, but rejects are written in file order.
+    assert [r["line"] for r in rejects] == [2, 3]
+    assert rejects[0]["error"] == "No customer found with ID: 999"
+    assert rejects[1]["error"].startswith("Invalid JSON")
+
+def test_duplicate_ids_fall_back_to_row_by_row(db, accounts, balance, check_summaries, tmp_path):
+    # The second row collides with the first, so the whole chunk is retried
+    # row by row; the rows around it must still go in exactly once.
+    importer, rejects = run_import(db, "transactions", [
+        "id,account_id,type,amount,date",
+        f"100,{accounts[1]},deposit,10,2025-01-01",
+        f"100,{accounts[1]},deposit,20,2025-01-02",
+        f"101,{accounts[1]},withdraw,5,2025-01-03",
+    ], tmp_path / "ledger.csv")
+    assert (importer.accepted, importer.rejected) == (2, 1)
+    assert rejects[0]["line"] == 3 and "UNIQUE" in rejects[0]["error"]
+    assert balance(accounts[1]) == 105.0
+    check_summaries()
+
+def test_withdrawals_that_would_overdraw_are_rejected(db, accounts, balance, check_summaries, tmp_path):
+    importer, rejects = run_import(db, "transactions", [
+        "account_id,type,amount,date",
+        f"{accounts[3]},withdraw,80,2025-01-01",
+        f"{accounts[3]},deposit,40,2025-01-02",
+        f"{accounts[3]},withdraw,80,2025-01-03",
+        f"{accounts[3]},withdraw,20,2025-01-04",
+    ], tmp_path / "ledger.csv")
+    assert (importer.accepted, importer.rejected) == (2, 2)
+    assert [(r["line"], r["error"]) for r in rejects] == [(2, "Insufficient funds for this withdrawal."),
+                                                          (5, "Insufficient funds for this withdrawal.")]
+    assert balance(accounts[3]) == 10.0
+    check_summaries()
+
+def test_a_rejected_deposit_does_not_fund_later_withdrawals(db, accounts, balance, check_summaries, tmp_path):
+    importer, rejects = run_import(db, "transactions", [
+        "id,account_id,type,amount,date",
+        f"200,{accounts[3]},deposit,10,2025-01-01",
+        f"200,{accounts[3]},deposit,100,2025-01-02",
+        f"201,{accounts[3]},withdraw,120,2025-01-03",
+    ], tmp_path / "ledger.csv")
+    assert importer.accepted == 1
+    assert [r["line"] for r in rejects] == [3, 4]
+    assert rejects[1]["error"] == "Insufficient funds for this withdrawal."
+    assert balance(accounts[3]) == 60.0
+    check_summaries()
@@ -0,0 +1,43 @@
+import math
+
+import pytest
+
+from bank_core import AccountNotFound, InsufficientFunds, LedgerError, LedgerService
+
+DAY = "2025-01-15"
+
+def rows(db, table):
+    with db.session() as conn:
+        return conn.execute(f"SELECT * FROM {table} ORDER BY 1").fetchall()
+
+def version(db, account_id):
+    with db.session() as conn:
+        return conn.execute("SELECT version FROM accounts WHERE id=?", (account_id,)).fetchone()[0]
+
+def test_post_moves_balance_and_records_transaction(db, accounts, check_summaries):
+    ledger = LedgerService(db)
+    assert ledger.post(accounts[0], "deposit", 250.0, DAY) == 1250.0
+    assert ledger.post(accounts[0], "withdraw", 1000.0, DAY) == 250.0
+    assert [row[1:] for row in rows(db, "transactions")] == [
+        (accounts[0], "deposit", 250.0, DAY), (accounts[0], "withdraw", 1000.0, DAY)]
+    assert version(db, accounts[0]) == 2
+    check_summaries()
+
+def test_withdrawal_beyond_balance_is_refused_without_writes(db, accounts, balance):
+    with pytest.raises(InsufficientFunds):
+        LedgerService(db).post(accounts[1], "withdraw", 100.01, DAY)
+    assert balance(accounts[1]) == 100.0
+    assert version(db, accounts[1]) == 0
+    assert rows(db, "transactions") == []
+    assert rows(db, "daily_account_summary") == []
+
+def test_unknown_account(db, accounts):
+    with pytest.raises(AccountNotFound):
+        LedgerService(db).post(999, "deposit", 1.0, DAY)
+
+@pytest.mark.parametrize("t_type, amount", [
+    ("deposit", 0.0), ("deposit", -5.0), ("deposit", math.inf), ("deposit", math.nan), ("refund", 5.0)])
+def test_invalid_postings_are_refused(db, accounts, t_type, amount, balance):
+    with pytest.raises(LedgerError):
+        LedgerService(db).post(accounts[0], t_type, amount, DAY)
+    assert balance(accounts[0]) == 1000.0
@@ -0,0 +1,83 @@
+import sqlite3
+import time
+
+from bank_core import CustomerRepository, DatabaseManager
+from bank_core import maintenance
+
+def test_new_database_has_incremental_vacuum_and_foreign_keys(db):
+    conn = db.connect()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2  # INCREMENTAL
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+def test_opening_a_connection_does_not_wait_for_a_writer(db):
+    writer = sqlite3.connect(db.db_name)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.perf_counter()
+        other = DatabaseManager(db.db_name)
+        try:
+            other.connect().execute("SELECT COUNT(*) FROM accounts").fetchone()
+        finally:
+            other.close()
+        assert time.perf_counter() - started < 1
+    finally:
+        writer.rollback()
+        writer.close()
+
+def test_deleting_a_customer_cascades(db, accounts):
+    with db.session() as conn:
+        conn.execute("INSERT INTO transactions (account_id, type, amount, date) VALUES (?, 'deposit', 1, '2025-01-01')",
+                     (accounts[0],))
+        customer_id, version = conn.execute("SELECT id, version FROM customers").fetchone()
+    CustomerRepository(db).delete(customer_id, version)
+    with db.session() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM accounts").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 0
+
+def add_orphans(db):
+    """Rows left behind by deletes made before foreign keys were enforced."""
+    conn = sqlite3.connect(db.db_name)  # foreign keys are off on a plain connection
+    conn.execute("INSERT INTO users (username, password, role, customer_id) VALUES ('gone', 'x', 'customer', 900)")
+    conn.execute("INSERT INTO accounts (id, customer_id, account_type, balance) VALUES (901, 900, 'Savings', 5)")
+    conn.executemany("INSERT INTO transactions (account_id, type, amount, date) VALUES (?, 'deposit', 5, '2025-01-01')",
+                     [(901,), (902,)])
+    conn.execute("INSERT INTO daily_account_summary (account_id, day, deposits, tx_count) VALUES (903, '2025-01-01', 5, 1)")
+    conn.commit()
+    conn.close()
+
+def test_purge_orphans_deletes_only_orphans(db, accounts):
+    with db.session() as conn:
+        conn.execute("INSERT INTO transactions (account_id, type, amount, date) VALUES (?, 'deposit', 1, '2025-01-01')",
+                     (accounts[0],))
+    add_orphans(db)
+    conn = db.connect()
+    assert maintenance.count_orphans(conn) == {
+        "users": 1, "accounts": 1, "transactions": 1, "daily_account_summary": 1}
+    purged = maintenance.purge_orphans(conn, batch_size=100, pause=0, report=lambda message: None)
+    # The orphaned account takes its transaction with it, by cascade.
+    assert purged == {"users": 1, "accounts": 1, "transactions": 1, "daily_account_summary": 1}
+    assert set(maintenance.count_orphans(conn).values()) == {0}
+    assert conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM accounts").fetchone()[0] == len(accounts)
+    assert conn.execute("SELECT COUNT(*) FROM users WHERE username = 'admin'").fetchone()[0] == 1
+
+def test_purge_keeps_seeded_and_staff_logins(db):
+    conn = sqlite3.connect(db.db_name)
+    conn.execute("INSERT INTO users (username, password, role, customer_id) VALUES ('teller', 'x', 'admin', 900)")
+    conn.commit()
+    conn.close()
+    conn = db.connect()
+    # No customer exists at all, so the seeded demo login points nowhere.
+    assert maintenance.count_orphans(conn)["users"] == 0
+    maintenance.purge_orphans(conn, pause=0, report=lambda message: None)
+    assert {row[0] for row in conn.execute("SELECT username FROM users")} == {"admin", "user", "teller"}
+
+def test_incremental_vacuum_releases_free_pages(db):
+    with db.session() as conn:
+        conn.executemany("INSERT INTO transactions (type, date) VALUES ('deposit', ?)", [("x" * 500,)] * 2000)
+    with db.session() as conn:
+        conn.execute("DELETE FROM transactions")
+    conn = db.connect()
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] > 0
+    assert maintenance.incremental_vacuum(conn, pages_per_step=50, pause=0) > 0
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
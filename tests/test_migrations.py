@@ -0,0 +1,53 @@
+import sqlite3
+
+from bank_core import DatabaseManager
+from bank_core.db import MIGRATIONS
+
+LATEST = MIGRATIONS[-1][0]
+
+def pragma(conn, name):
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+def test_new_database_is_fully_migrated(db):
+    conn = db.connect()
+    assert db.schema_version(conn) == LATEST
+    assert pragma(conn, "journal_mode") == "wal"
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert {"customers", "accounts", "transactions", "users", "daily_account_summary",
+            "monthly_type_totals", "alerts", "account_type_rates", "transfers"} <= tables
+
+def test_migrate_is_idempotent(db):
+    with db.session() as conn:
+        conn.execute("INSERT INTO customers (name) VALUES ('Kept')")
+    db.migrate()
+    again = DatabaseManager(db.db_name)
+    try:
+        with again.session() as conn:
+            assert again.schema_version(conn) == LATEST
+            assert conn.execute("SELECT name FROM customers").fetchall() == [("Kept",)]
+            assert conn.execute("SELECT COUNT(*) FROM users WHERE username='admin'").fetchone()[0] == 1
+    finally:
+        again.close()
+
+def test_migrate_upgrades_an_older_schema(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    for version, statements in MIGRATIONS:
+        if version > 4:
+            break
+        for sql in statements:
+            conn.execute(sql)
+    conn.execute("PRAGMA user_version=4")
+    conn.execute("INSERT INTO customers (id, name) VALUES (1, 'Old')")
+    conn.execute("INSERT INTO accounts (id, customer_id, account_type, balance) VALUES (7, 1, 'Savings', 10)")
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(path)
+    try:
+        with db.session() as conn:
+            assert db.schema_version(conn) == LATEST
+            assert conn.execute("SELECT id, balance, version FROM accounts").fetchall() == [(7, 10.0, 0)]
+            assert conn.execute("SELECT COUNT(*) FROM account_type_rates").fetchone()[0] == 3
+    finally:
+        db.close()
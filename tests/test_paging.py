@@ -0,0 +1,72 @@
+from bank_core import CustomerRepository, TransactionRepository
+
+def add_transactions(db, account_id, days):
+    with db.session() as conn:
+        conn.executemany("INSERT INTO transactions (account_id, type, amount, date) VALUES (?, 'deposit', 1.0, ?)",
+                         [(account_id, day) for day in days])
+
+def test_pages_walk_every_row_once_in_both_directions(db, accounts):
+    # Several rows share a date, so pages must break ties on id.
+    add_transactions(db, accounts[0], [f"2025-01-{day:02d}" for day in (1, 2, 2, 2, 3, 5, 5, 9)] * 3)
+    pager = TransactionRepository(db).pager()
+    pages = [pager.first_page(5)]
+    while len(pages[-1]) == 5:
+        pages.append(pager.page_after(pager.key_of(pages[-1][-1]), 5))
+    walked = [row for page in pages for row in page]
+
+    with db.session() as conn:
+        expected = conn.execute("SELECT id, account_id, type, amount, date FROM transactions "
+                                "ORDER BY date DESC, id DESC").fetchall()
+    assert walked == expected
+    assert pager.page_before(pager.key_of(pages[2][0]), 5) == pages[1]
+    assert pager.page_before(pager.key_of(walked[0]), 5) == []
+
+def test_account_pager_only_shows_that_account(db, accounts):
+    add_transactions(db, accounts[0], ["2025-01-01"] * 3)
+    add_transactions(db, accounts[1], ["2025-01-02"] * 2)
+    rows = TransactionRepository(db).account_pager(accounts[1]).first_page(10)
+    assert [row[1] for row in rows] == [accounts[1]] * 2
+
+
+def add_customers(db, names):
+    with db.session() as conn:
+        conn.executemany("INSERT INTO customers (name, email) VALUES (?, ?)",
+                         [(name, f"{name.split()[0].lower()}@example.com") for name in names])
+
+def test_search_pager_refreshes_the_rows_on_screen(db):
+    add_customers(db, ["Alice Martin", "Alicia Keys", "Bob Stone"])
+    pager = CustomerRepository(db).search_pager("ali")
+    rows = pager.first_page(10)
+    assert {row[1] for row in rows} == {"Alice Martin", "Alicia Keys"}
+
+    with db.session() as conn:
+        conn.execute("UPDATE customers SET phone = '0600000000' WHERE name = 'Alice Martin'")
+        conn.execute("UPDATE customers SET name = 'Robert Stone', email = 'rob@example.com' WHERE name = 'Alicia Keys'")
+    current = pager.rows_by_id([row[0] for row in rows])
+    # The edited match is re-read; the one that no longer matches drops out.
+    assert [row[1:4] for row in current.values()] == [("Alice Martin", "alice@example.com", "0600000000")]
+
+def test_watermark_picks_up_only_new_rows(db, accounts):
+    add_transactions(db, accounts[0], ["2025-01-01"] * 3)
+    pager = TransactionRepository(db).account_pager(accounts[0])
+    watermark = pager.max_id()
+    assert pager.rows_since(watermark, 100) == []
+
+    add_transactions(db, accounts[1], ["2025-01-02"])
+    add_transactions(db, accounts[0], ["2025-01-03"] * 2)
+    new = pager.rows_since(watermark, 100)
+    assert [row[1] for row in new] == [accounts[0]] * 2
+    assert [row[0] for row in new] == sorted(row[0] for row in new)
+    assert pager.rows_since(watermark, 1) == new[:1]
+
+def test_rows_by_id_drops_deleted_rows(db, accounts):
+    add_transactions(db, accounts[0], ["2025-01-01"] * 3)
+    pager = TransactionRepository(db).pager()
+    ids = [row[0] for row in pager.first_page(10)]
+    with db.session() as conn:
+        conn.execute("UPDATE transactions SET amount = 7.5 WHERE id = ?", (ids[0],))
+        conn.execute("DELETE FROM transactions WHERE id = ?", (ids[1],))
+    current = pager.rows_by_id(ids)
+    assert sorted(current) == sorted([ids[0], ids[2]])
+    assert current[ids[0]][3] == 7.5
+    assert pager.rows_by_id([]) == {}
@@ -0,0 +1,20 @@
+import pytest
+
+from bank_core import InsufficientFunds, LedgerService, PostingQueue
+
+DAY = "2025-01-15"
+
+def test_posting_queue_resolves_each_future(db, accounts, check_summaries):
+    queue = PostingQueue(LedgerService(db), max_batch=10)
+    futures = [queue.submit(accounts[1], "withdraw", 60.0, DAY) for _ in range(2)]
+    futures.append(queue.submit(accounts[1], "deposit", 5.0, DAY))
+    queue.close()
+    assert futures[0].result() == 40.0
+    with pytest.raises(InsufficientFunds):
+        futures[1].result()
+    assert futures[2].result() == 45.0
+    check_summaries()
+
+def test_posting_queue_checks_synchronous(db):
+    with pytest.raises(ValueError):
+        PostingQueue(LedgerService(db), synchronous="NORMAL; DROP TABLE accounts")
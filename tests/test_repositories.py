@@ -0,0 +1,30 @@
+import pytest
+
+from bank_core import AccountRepository, CustomerRepository, LedgerService, RecordNotFound, UpdateConflict
+
+def test_customer_edit_applies_only_at_the_version_read(db):
+    customers = CustomerRepository(db)
+    customer_id = customers.add("Ann Lee", "ann@example.com", "")
+    version = customers.get(customer_id)[4]
+    assert customers.update(customer_id, version, "Ann Lee-Ray", "ann@example.com", "") == version + 1
+    with pytest.raises(UpdateConflict):
+        customers.update(customer_id, version, "Ann Stale", "ann@example.com", "")
+    assert customers.get(customer_id)[1:] == ("Ann Lee-Ray", "ann@example.com", "", version + 1)
+
+def test_a_posting_makes_a_pending_balance_edit_conflict(db, accounts, balance):
+    repo = AccountRepository(db)
+    _, _, acc_type, _, version = repo.get(accounts[0])
+    LedgerService(db).post(accounts[0], "deposit", 50, "2025-01-02")
+    with pytest.raises(UpdateConflict):
+        repo.update(accounts[0], version, acc_type, 900.0)
+    assert balance(accounts[0]) == 1050.0
+
+def test_stale_delete_is_refused_and_missing_rows_reported(db, accounts):
+    repo = AccountRepository(db)
+    version = repo.get(accounts[1])[4]
+    LedgerService(db).post(accounts[1], "deposit", 1, "2025-01-02")
+    with pytest.raises(UpdateConflict):
+        repo.delete(accounts[1], version)
+    repo.delete(accounts[1], version + 1)
+    with pytest.raises(RecordNotFound):
+        repo.delete(accounts[1], version + 1)
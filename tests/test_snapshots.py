@@ -0,0 +1,44 @@
+import os
+import sqlite3
+
+import pytest
+
+from bank_core import DatabaseManager, LedgerService
+from bank_core.snapshots import Snapshotter
+
+def count(db, table):
+    with db.session() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+def test_snapshot_is_a_complete_read_only_copy(db, accounts, tmp_path):
+    LedgerService(db).post(accounts[0], "deposit", 10, "2025-01-01")
+    target = str(tmp_path / "snapshot.db")
+    assert db.snapshot(target, pages_per_step=1) > 0
+    assert not os.path.exists(target + ".partial")
+
+    reader = DatabaseManager(target, read_only=True)
+    try:
+        assert count(reader, "accounts") == 4
+        assert count(reader, "transactions") == 1
+        with pytest.raises(sqlite3.OperationalError):
+            with reader.session() as conn:
+                conn.execute("DELETE FROM transactions")
+    finally:
+        reader.close()
+
+def test_open_readers_keep_their_copy_across_a_refresh(db, accounts, tmp_path):
+    snapshotter = Snapshotter(db, str(tmp_path / "snapshot.db"), interval=3600)
+    try:
+        snapshotter.refresh()
+        before = snapshotter.open_reader()
+        assert count(before, "transactions") == 0
+
+        LedgerService(db).post(accounts[0], "deposit", 10, "2025-01-01")
+        snapshotter.refresh()
+        after = snapshotter.open_reader()
+        assert count(after, "transactions") == 1
+        assert count(before, "transactions") == 0
+        before.close()
+        after.close()
+    finally:
+        snapshotter.close()
@@ -0,0 +1,38 @@
+import csv
+
+import pytest
+
+from bank_core import LedgerService
+from bank_core.statements import export_statement
+
+def post_history(db, account_id):
+    ledger = LedgerService(db)
+    for t_type, amount, day in (("deposit", 500, "2024-12-30"), ("withdraw", 200, "2025-01-05"),
+                                ("deposit", 50, "2025-01-05"), ("withdraw", 25, "2025-01-20"),
+                                ("deposit", 1000, "2025-02-01")):
+        ledger.post(account_id, t_type, amount, day)
+
+def test_statement_runs_from_opening_to_closing_balance(db, accounts, tmp_path):
+    post_history(db, accounts[1])
+    path = tmp_path / "statement.csv"
+    assert export_statement(db, accounts[1], "2025-01-01", "2025-01-31", str(path)) == (3, 600.0, 425.0)
+
+    with open(path, newline="", encoding="utf-8") as f:
+        lines = list(csv.reader(f))
+    assert lines[1] == ["Opening balance", "600.00"]
+    assert [(day, t_type, amount, running) for _, day, t_type, amount, running in lines[3:-1]] == [
+        ("2025-01-05", "withdraw", "200.00", "400.00"),
+        ("2025-01-05", "deposit", "50.00", "450.00"),
+        ("2025-01-20", "withdraw", "25.00", "425.00"),
+    ]
+    assert lines[-1] == ["Closing balance", "425.00"]
+
+def test_empty_period_keeps_the_balance(db, accounts, tmp_path):
+    post_history(db, accounts[1])
+    path = tmp_path / "statement.html"
+    assert export_statement(db, accounts[1], "2025-01-21", "2025-01-31", str(path), "html") == (0, 425.0, 425.0)
+    assert "Closing balance: $425.00" in path.read_text(encoding="utf-8")
+
+def test_unknown_account(db, tmp_path):
+    with pytest.raises(LookupError):
+        export_statement(db, 999, "2025-01-01", "2025-01-31", str(tmp_path / "statement.csv"))
@@ -0,0 +1,72 @@
+import io
+import json
+import math
+
+import pytest
+
+from bank_core import AccountNotFound, InsufficientFunds, InvalidTransfer, LedgerError, LedgerService
+from bank_core.transfers import BatchRun
+
+DAY = "2025-01-15"
+
+def rows(db, table):
+    with db.session() as conn:
+        return conn.execute(f"SELECT * FROM {table} ORDER BY 1").fetchall()
+
+def test_transfer_writes_linked_debit_and_credit(db, accounts, balance, check_summaries):
+    transfer_id = LedgerService(db).transfer(accounts[0], accounts[1], 300.0, DAY)
+    assert balance(accounts[0]) == 700.0
+    assert balance(accounts[1]) == 400.0
+    debit, credit = rows(db, "transactions")
+    assert debit[1:] == (accounts[0], "withdraw", 300.0, DAY)
+    assert credit[1:] == (accounts[1], "deposit", 300.0, DAY)
+    assert rows(db, "transfers") == [(transfer_id, accounts[0], accounts[1], 300.0, DAY, debit[0], credit[0])]
+    check_summaries()
+
+@pytest.mark.parametrize("source, target, amount, error", [
+    (0, 0, 10.0, InvalidTransfer),
+    (0, None, 10.0, AccountNotFound),
+    (None, 0, 10.0, AccountNotFound),
+    (1, 0, 100.01, InsufficientFunds),
+    (0, 1, math.inf, LedgerError),
+])
+def test_rejected_transfer_leaves_nothing_behind(db, accounts, source, target, amount, error, balance):
+    source = 999 if source is None else accounts[source]
+    target = 999 if target is None else accounts[target]
+    with pytest.raises(error):
+        LedgerService(db).transfer(source, target, amount, DAY)
+    assert [balance(account_id) for account_id in accounts] == [1000.0, 100.0, 2000.0, 50.0]
+    assert rows(db, "transactions") == []
+    assert rows(db, "transfers") == []
+
+def test_transfer_many_applies_in_order_and_reports_each_outcome(db, accounts, balance, check_summaries):
+    a, b, c, _ = accounts
+    outcomes = LedgerService(db).transfer_many([
+        (b, c, 150.0, DAY),   # bounces: b only has 100 yet
+        (a, b, 100.0, DAY),
+        (b, c, 150.0, DAY),   # now fine
+        (c, c, 1.0, DAY),
+    ])
+    assert [type(error) for _, error in outcomes] == [InsufficientFunds, type(None), type(None), InvalidTransfer]
+    assert [transfer_id is not None for transfer_id, _ in outcomes] == [False, True, True, False]
+    assert [balance(account_id) for account_id in (a, b, c)] == [900.0, 50.0, 2150.0]
+    assert len(rows(db, "transfers")) == 2
+    assert len(rows(db, "transactions")) == 4
+    check_summaries()
+
+def test_batch_run_writes_rejects_in_file_order(db, accounts, balance):
+    a, b, c, _ = accounts
+    records = [(line_no, {"from_account_id": str(source), "to_account_id": str(target), "amount": amount, "date": DAY})
+               for line_no, (source, target, amount) in enumerate([
+                   (b, c, "150"),   # bounces in the ledger
+                   (a, b, "oops"),  # refused while parsing, i.e. first
+                   (a, b, "100"),
+                   (b, c, "150"),
+               ], start=2)]
+    rejects = io.StringIO()
+    done = []
+    batch = BatchRun(LedgerService(db), rejects, batch_size=3)
+    batch.run(records, done.append)
+    assert (batch.applied, batch.rejected, done) == (2, 2, [3, 4])
+    assert [json.loads(line)["line"] for line in rejects.getvalue().splitlines()] == [2, 3]
+    assert [balance(account_id) for account_id in (a, b, c)] == [900.0, 50.0, 2150.0]